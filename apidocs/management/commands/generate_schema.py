@@ -0,0 +1,31 @@
+"""
+Write the OpenAPI schema for the current code version to SCHEMA_DIR.
+Run it at build or deploy time so workers do not generate it themselves.
+
+Example:
+    APP_VERSION=$(git rev-parse --short HEAD) python manage.py generate_schema
+"""
+
+from django.core.management.base import BaseCommand
+
+from apidocs.schema import code_version, schema_path, write_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema file served at /swagger.json."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate even if the file for this version exists.",
+        )
+
+    def handle(self, *args, **options):
+        version = code_version()
+        path = schema_path(version)
+        if path.exists() and not options["force"]:
+            self.stdout.write(f"Schema for version {version} already at {path}")
+            return
+        path = write_schema(version)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
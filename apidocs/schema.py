@@ -0,0 +1,103 @@
+"""
+Precomputed OpenAPI schema.
+
+drf-yasg builds the schema by inspecting every view and serializer,
+which is too slow to do on every request. The schema is generated once
+per code version and kept:
+- in SCHEMA_DIR/swagger-<version>.json (written by generate_schema or by
+  the first request)
+- in memory, for the rest of the process
+
+The code version is APP_VERSION when set (e.g. the git commit of the
+deploy), otherwise a fingerprint of the project's Python files.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import drf_yasg
+from django.apps import apps
+from django.conf import settings
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson
+
+API_INFO = openapi.Info(
+    title="Lokanetra API",
+    default_version="v1",
+    description="API for OTP login + wallet + transactions",
+)
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def code_version():
+    """
+    Return APP_VERSION, or a hash of the path, size and modification
+    time of every Python file in the project's apps.
+    """
+    if settings.APP_VERSION:
+        return settings.APP_VERSION
+
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = {base_dir / "lokanetra"}
+    for app_config in apps.get_app_configs():
+        path = Path(app_config.path).resolve()
+        if base_dir in path.parents:
+            roots.add(path)
+
+    digest = hashlib.sha1(drf_yasg.__version__.encode())
+    for root in sorted(roots):
+        for path in sorted(root.rglob("*.py")):
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+def schema_path(version):
+    return Path(settings.SCHEMA_DIR) / f"swagger-{version}.json"
+
+
+def generate_schema():
+    """
+    Build the schema from the URLconf and return it as JSON bytes.
+    """
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(API_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def write_schema(version=None):
+    """
+    Generate the schema and save it for the given code version.
+    Returns the file path.
+    """
+    path = schema_path(version or code_version())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    content = generate_schema()
+
+    # Write to a temporary file first so readers never see half a file
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    tmp_path.replace(path)
+    return path
+
+
+def get_schema():
+    """
+    Return (content, etag) of the schema for the running code version.
+    """
+    if "content" not in _cache:
+        with _lock:
+            if "content" not in _cache:
+                version = code_version()
+                path = schema_path(version)
+                if not path.exists():
+                    write_schema(version)
+                content = path.read_bytes()
+                _cache["etag"] = hashlib.sha256(content).hexdigest()[:32]
+                _cache["content"] = content
+    return _cache["content"], _cache["etag"]
@@ -0,0 +1,29 @@
+"""
+URL routes for the API documentation.
+Includes:
+- swagger.json (precomputed schema)
+- Swagger UI
+- ReDoc
+"""
+
+from django.conf import settings
+from django.urls import path
+
+from .views import schema_json, schema_view
+
+urlpatterns = [
+    # Swagger JSON schema
+    path("swagger.json", schema_json, name="schema-json"),
+    # Swagger UI documentation
+    path(
+        "swagger/",
+        schema_view.with_ui("swagger", cache_timeout=settings.SCHEMA_CACHE_SECONDS),
+        name="schema-swagger-ui",
+    ),
+    # ReDoc documentation UI
+    path(
+        "redoc/",
+        schema_view.with_ui("redoc", cache_timeout=settings.SCHEMA_CACHE_SECONDS),
+        name="schema-redoc",
+    ),
+]
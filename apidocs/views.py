@@ -0,0 +1,36 @@
+"""
+API documentation views.
+- swagger.json: the precomputed schema, with ETag and Cache-Control
+- swagger/ and redoc/: drf-yasg UI pages, which load swagger.json
+"""
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_GET
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+from .schema import API_INFO, get_schema
+
+# Only used for the UI pages; the spec itself comes from get_schema()
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+
+def _schema_etag(request):
+    return get_schema()[1]
+
+
+@require_GET
+@condition(etag_func=_schema_etag)
+def schema_json(request):
+    """
+    Serve the schema. Unchanged schemas answer 304 Not Modified.
+    """
+    content, _etag = get_schema()
+    response = HttpResponse(content, content_type="application/json")
+    response["Cache-Control"] = f"public, max-age={settings.SCHEMA_CACHE_SECONDS}"
+    return response
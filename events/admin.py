@@ -0,0 +1,28 @@
+from django.contrib import admin
+
+from .models import ConsumerOffset, WalletEvent
+
+
+@admin.register(WalletEvent)
+class WalletEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "event_type",
+        "amount",
+        "sender_id",
+        "receiver_id",
+        "created_at",
+    )
+    list_filter = ("event_type",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ConsumerOffset)
+class ConsumerOffsetAdmin(admin.ModelAdmin):
+    list_display = ("consumer", "position", "updated_at")
+    search_fields = ("consumer",)
@@ -0,0 +1,63 @@
+"""
+Read the wallet activity stream as a named consumer.
+
+Each batch of events is passed to the handler, then the consumer's
+offset is stored, so an event is handled at least once: after a crash
+the last batch is handled again.
+
+Examples:
+    python manage.py consume_events --consumer analytics          # print events as JSON lines
+    python manage.py consume_events --consumer fraud --handler fraud.checks.handle_events --loop
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from events import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver wallet events in order to a handler and store the offset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consumer", required=True, help="Consumer name.")
+        parser.add_argument(
+            "--handler",
+            help="Dotted path to a function called with a list of event "
+            "dicts (default: print them as JSON lines).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.WALLET_EVENT_BATCH_SIZE
+        )
+        parser.add_argument("--loop", action="store_true", help="Run forever.")
+        parser.add_argument(
+            "--from-start",
+            action="store_true",
+            help="Ignore the stored offset and start at the first event.",
+        )
+
+    def handle(self, *args, **options):
+        consumer = options["consumer"]
+        handler = (
+            import_string(options["handler"]) if options["handler"] else self._print
+        )
+        after = 0 if options["from_start"] else outbox.position(consumer)
+
+        while True:
+            close_old_connections()
+            timeout = settings.WALLET_EVENT_MAX_WAIT if options["loop"] else 0
+            events = outbox.wait_for_events(after, options["batch_size"], timeout)
+            if events:
+                handler([event.as_dict() for event in events])
+                after = events[-1].id
+                outbox.commit(consumer, after)
+            elif not options["loop"]:
+                return
+
+    def _print(self, events):
+        for event in events:
+            self.stdout.write(json.dumps(event))
@@ -0,0 +1,26 @@
+"""
+Delete old wallet events that every consumer has read.
+
+Example:
+    python manage.py prune_events --older-than-days 7
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from events import outbox
+
+
+class Command(BaseCommand):
+    help = "Delete read wallet events older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.WALLET_EVENT_RETENTION_DAYS,
+        )
+
+    def handle(self, *args, **options):
+        deleted = outbox.prune(options["older_than_days"])
+        self.stdout.write(f"Deleted {deleted} events")
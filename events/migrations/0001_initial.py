@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+import lokanetra.money
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="ConsumerOffset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("consumer", models.CharField(max_length=100, unique=True)),
+                ("position", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="WalletEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "event_type",
+                    models.CharField(
+                        choices=[
+                            ("CREDIT", "Credit"),
+                            ("DEBIT", "Debit"),
+                            ("TRANSFER", "Transfer"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("sender_id", models.BigIntegerField(null=True)),
+                ("receiver_id", models.BigIntegerField(null=True)),
+                ("amount", lokanetra.money.MoneyField(decimal_places=2, max_digits=12)),
+                ("remarks", models.TextField(blank=True)),
+            ],
+        ),
+    ]
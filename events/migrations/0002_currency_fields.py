@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+import lokanetra.money
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="walletevent",
+            name="currency",
+            field=models.CharField(blank=True, max_length=3, null=True),
+        ),
+        migrations.AddField(
+            model_name="walletevent",
+            name="fx_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=8, max_digits=18, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="walletevent",
+            name="received_amount",
+            field=lokanetra.money.MoneyField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="walletevent",
+            name="received_currency",
+            field=models.CharField(blank=True, max_length=3, null=True),
+        ),
+    ]
@@ -0,0 +1,89 @@
+"""
+Wallet activity stream.
+
+WalletEvent is a transactional outbox: one row per credit, debit or
+transfer, added in the same database transaction as the balance change
+(see events/outbox.py). The id is the position in the stream.
+
+ConsumerOffset stores how far each downstream consumer (fraud,
+notifications, analytics, ...) has read.
+"""
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from lokanetra.money import MoneyField
+
+
+class WalletEvent(models.Model):
+    """
+    One money movement, in commit order by id.
+    """
+
+    EVENT_TYPES = (
+        ("CREDIT", "Credit"),
+        ("DEBIT", "Debit"),
+        ("TRANSFER", "Transfer"),
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPES)
+
+    # Plain ids like LedgerJournal: no foreign key checks on the hot path
+    sender_id = models.BigIntegerField(null=True)
+    receiver_id = models.BigIntegerField(null=True)
+
+    amount = MoneyField(max_digits=12, decimal_places=2)
+
+    remarks = models.TextField(blank=True)
+
+    # Cross-currency transfers only: amount is in currency and the
+    # receiver got received_amount in received_currency. Empty means
+    # DEFAULT_CURRENCY on both sides.
+    currency = models.CharField(max_length=3, null=True, blank=True)
+    received_amount = MoneyField(null=True, blank=True)
+    received_currency = models.CharField(max_length=3, null=True, blank=True)
+    fx_rate = models.DecimalField(
+        max_digits=18, decimal_places=8, null=True, blank=True
+    )
+
+    def __str__(self):
+        """Example: '42 TRANSFER 25.00'"""
+        return f"{self.id} {self.event_type} {self.amount}"
+
+    def as_dict(self):
+        data = {
+            "id": self.id,
+            "type": self.event_type,
+            "created_at": self.created_at.isoformat(),
+            "sender_id": self.sender_id,
+            "receiver_id": self.receiver_id,
+            "amount": str(self.amount),
+            "currency": self.currency or settings.DEFAULT_CURRENCY,
+            "remarks": self.remarks,
+        }
+        if self.received_currency:
+            data.update(
+                received_amount=str(self.received_amount),
+                received_currency=self.received_currency,
+                fx_rate=str(self.fx_rate),
+            )
+        return data
+
+
+class ConsumerOffset(models.Model):
+    """
+    The id of the last event a consumer has processed.
+    """
+
+    consumer = models.CharField(max_length=100, unique=True)
+
+    position = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Example: 'fraud @ 1042'"""
+        return f"{self.consumer} @ {self.position}"
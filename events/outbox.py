@@ -0,0 +1,223 @@
+"""
+Writes and reads the wallet activity stream.
+
+The money services call publish(), publish_transfers() or
+publish_exchange() inside their atomic block, so an event exists exactly
+when its balance change was committed. Consumers read events after their offset with read() (or
+wait_for_events() for long polling) and store the new offset with
+commit().
+
+Ids are handed out when rows are inserted, not when they commit, so a
+transaction can commit id 11 while id 10 is still open. read() therefore
+stops before a missing id until the event after it is
+WALLET_EVENT_GAP_WAIT seconds old; after that the missing id is taken as
+rolled back. An event whose transaction commits even later than that is
+skipped by every consumer: the wait must be longer than the slowest
+money transaction. Skipped ids are logged and counted in
+wallet_event_gaps_skipped_total so they can be reconciled. Ids below the
+oldest kept event are not gaps: they were pruned, or the consumer starts
+before the first event, so read() goes straight to that event.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from monitoring.metrics import WALLET_EVENT_GAPS_SKIPPED, WALLET_EVENTS_PUBLISHED
+
+from .models import ConsumerOffset, WalletEvent
+
+logger = logging.getLogger(__name__)
+
+
+class _NewEvents:
+    """
+    Wakes long polls in this process when events were committed.
+    Polls from other processes see them at the next poll interval.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+
+    def notify(self):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, timeout):
+        with self._condition:
+            version = self._version
+            self._condition.wait_for(lambda: self._version != version, timeout)
+
+
+new_events = _NewEvents()
+
+
+def publish(event_type, sender, receiver, amount, remarks=""):
+    """
+    Add one event to the stream. Call inside the money operation's
+    atomic block.
+    """
+    if not settings.WALLET_EVENTS:
+        return
+    WalletEvent.objects.create(
+        event_type=event_type,
+        sender_id=sender.id if sender else None,
+        receiver_id=receiver.id if receiver else None,
+        amount=amount,
+        remarks=remarks,
+    )
+    db_transaction.on_commit(new_events.notify)
+    WALLET_EVENTS_PUBLISHED.inc(type=event_type)
+
+
+def publish_transfers(transfers, currency=None):
+    """
+    Add one TRANSFER event per (sender, receiver, amount, remarks),
+    with one insert. currency is left empty for DEFAULT_CURRENCY.
+    """
+    if not settings.WALLET_EVENTS or not transfers:
+        return
+    if currency == settings.DEFAULT_CURRENCY:
+        currency = None
+    WalletEvent.objects.bulk_create(
+        [
+            WalletEvent(
+                event_type="TRANSFER",
+                sender_id=sender.id,
+                receiver_id=receiver.id,
+                amount=amount,
+                currency=currency,
+                remarks=remarks,
+            )
+            for sender, receiver, amount, remarks in transfers
+        ]
+    )
+    db_transaction.on_commit(new_events.notify)
+    WALLET_EVENTS_PUBLISHED.inc(len(transfers), type="TRANSFER")
+
+
+def publish_exchange(
+    sender, receiver, amount, currency, received, received_currency, rate, remarks=""
+):
+    """
+    Add the TRANSFER event of a cross-currency transfer.
+    """
+    if not settings.WALLET_EVENTS:
+        return
+    WalletEvent.objects.create(
+        event_type="TRANSFER",
+        sender_id=sender.id,
+        receiver_id=receiver.id,
+        amount=amount,
+        currency=currency,
+        received_amount=received,
+        received_currency=received_currency,
+        fx_rate=rate,
+        remarks=remarks,
+    )
+    db_transaction.on_commit(new_events.notify)
+    WALLET_EVENTS_PUBLISHED.inc(type="TRANSFER")
+
+
+def read(after=0, limit=None):
+    """
+    Return up to limit events with an id above after, oldest first,
+    stopping at an id that may still commit.
+    """
+    limit = limit or settings.WALLET_EVENT_BATCH_SIZE
+    gap_cutoff = timezone.now() - timedelta(seconds=settings.WALLET_EVENT_GAP_WAIT)
+
+    events = []
+    expected = after + 1
+    for event in WalletEvent.objects.filter(id__gt=after).order_by("id")[:limit]:
+        # Ids below the oldest kept event were pruned, not rolled back
+        if event.id != expected and (events or not _is_oldest(event.id)):
+            if event.created_at > gap_cutoff:
+                break
+            missing = event.id - expected
+            WALLET_EVENT_GAPS_SKIPPED.inc(missing)
+            logger.warning(
+                "Skipping wallet event ids %s-%s as rolled back",
+                expected,
+                event.id - 1,
+            )
+        events.append(event)
+        expected = event.id + 1
+    return events
+
+
+def _is_oldest(event_id):
+    return not WalletEvent.objects.filter(id__lt=event_id).exists()
+
+
+def wait_for_events(after=0, limit=None, timeout=0):
+    """
+    Like read(), but wait up to timeout seconds for the first event.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        events = read(after, limit)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        new_events.wait(min(remaining, settings.WALLET_EVENT_POLL_INTERVAL))
+
+
+def position(consumer):
+    """
+    Return the consumer's stored offset (0 for a new consumer).
+    """
+    return (
+        ConsumerOffset.objects.filter(consumer=consumer)
+        .values_list("position", flat=True)
+        .first()
+        or 0
+    )
+
+
+def commit(consumer, offset):
+    """
+    Store the consumer's offset: the id of the last event it processed.
+    """
+    ConsumerOffset.objects.update_or_create(
+        consumer=consumer, defaults={"position": offset}
+    )
+
+
+def consumer_lag():
+    """
+    Number of event ids the slowest consumer is behind, or None when
+    there are no consumers.
+    """
+    slowest = ConsumerOffset.objects.aggregate(position=Min("position"))["position"]
+    if slowest is None:
+        return None
+    last = WalletEvent.objects.aggregate(id=Max("id"))["id"] or 0
+    return max(last - slowest, 0)
+
+
+def prune(older_than_days=None):
+    """
+    Delete events that every consumer has read and that are older than
+    older_than_days (default WALLET_EVENT_RETENTION_DAYS). Returns the
+    number deleted.
+    """
+    days = settings.WALLET_EVENT_RETENTION_DAYS
+    if older_than_days is not None:
+        days = older_than_days
+    events = WalletEvent.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=days)
+    )
+    slowest = ConsumerOffset.objects.aggregate(position=Min("position"))["position"]
+    if slowest is not None:
+        events = events.filter(id__lte=slowest)
+    deleted, _by_model = events.delete()
+    return deleted
@@ -0,0 +1,14 @@
+"""
+Serializers for the wallet activity stream API.
+"""
+
+from rest_framework import serializers
+
+
+class OffsetSerializer(serializers.Serializer):
+    """
+    Stores a consumer's offset: the id of the last event it processed.
+    """
+
+    consumer = serializers.SlugField(max_length=100)
+    position = serializers.IntegerField(min_value=0)
@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from . import outbox
+from .models import WalletEvent
+
+
+@override_settings(WALLET_EVENTS=True, WALLET_EVENT_GAP_WAIT=120)
+class ReadGapTests(TestCase):
+    def setUp(self):
+        self.events = [
+            WalletEvent.objects.create(
+                event_type="CREDIT", receiver_id=1, amount=Decimal("1.00")
+            )
+            for _ in range(4)
+        ]
+
+    def ids(self, events):
+        return [event.id for event in events]
+
+    def test_pruned_ids_are_not_gaps(self):
+        WalletEvent.objects.filter(id__lte=self.events[1].id).delete()
+
+        with self.assertNoLogs("events.outbox"):
+            events = outbox.read(after=0)
+
+        self.assertEqual(self.ids(events), self.ids(self.events[2:]))
+
+    def test_waits_for_recent_gap(self):
+        self.events[1].delete()
+
+        events = outbox.read(after=0)
+
+        self.assertEqual(self.ids(events), self.ids(self.events[:1]))
@@ -0,0 +1,14 @@
+"""
+URLs for the wallet activity stream.
+"""
+
+from django.urls import path
+
+from .views import ConsumerOffsetView, EventStreamView
+
+urlpatterns = [
+    # Long-poll for new events
+    path("", EventStreamView.as_view(), name="event-stream"),
+    # Consumer offsets
+    path("offsets/", ConsumerOffsetView.as_view(), name="event-offsets"),
+]
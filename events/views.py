@@ -0,0 +1,88 @@
+"""
+Wallet activity stream API for downstream systems (admin accounts).
+
+- GET /events/?consumer=fraud&wait=25 long-polls for events after the
+  consumer's stored offset (or after=<id>)
+- POST /events/offsets/ stores a consumer's offset once it processed
+  the events
+"""
+
+from django.conf import settings
+from rest_framework import permissions, views
+from rest_framework.response import Response
+
+from lokanetra.docs import swagger_auto_schema
+from lokanetra.renderers import FastJSONMixin
+
+from . import outbox
+from .models import ConsumerOffset
+from .serializers import OffsetSerializer
+
+
+def _int_param(params, name, default, maximum=None):
+    try:
+        value = max(int(params.get(name, default)), 0)
+    except (TypeError, ValueError):
+        value = default
+    return min(value, maximum) if maximum is not None else value
+
+
+class EventStreamView(FastJSONMixin, views.APIView):
+    """
+    Return events in order, waiting up to `wait` seconds when there is
+    none yet. Pass `consumer` to start after its stored offset, or
+    `after` to start after a given event id.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        consumer = params.get("consumer")
+        if "after" in params:
+            after = _int_param(params, "after", 0)
+        else:
+            after = outbox.position(consumer) if consumer else 0
+        limit = _int_param(
+            params,
+            "limit",
+            settings.WALLET_EVENT_BATCH_SIZE,
+            settings.WALLET_EVENT_BATCH_SIZE,
+        )
+        wait = _int_param(params, "wait", 0, settings.WALLET_EVENT_MAX_WAIT)
+
+        events = outbox.wait_for_events(after, limit, wait)
+        return Response(
+            {
+                "events": [event.as_dict() for event in events],
+                # Pass as "after" next time, or store it as the offset
+                "last_id": events[-1].id if events else after,
+            }
+        )
+
+
+class ConsumerOffsetView(FastJSONMixin, views.APIView):
+    """
+    List the consumers' offsets, or store one.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            list(
+                ConsumerOffset.objects.order_by("consumer").values(
+                    "consumer", "position", "updated_at"
+                )
+            )
+        )
+
+    @swagger_auto_schema(request_body=OffsetSerializer)
+    def post(self, request):
+        serializer = OffsetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outbox.commit(
+            serializer.validated_data["consumer"],
+            serializer.validated_data["position"],
+        )
+        return Response(serializer.validated_data)
@@ -0,0 +1,141 @@
+"""
+Django admin helpers for tables with millions of rows.
+
+LargeTableAdmin is a ModelAdmin that avoids the admin's full scans:
+
+- EstimatedCountPaginator: the unfiltered list uses the database's row
+  estimate instead of COUNT(*); filtered lists count at most
+  ADMIN_COUNT_LIMIT rows
+- show_full_result_count = False: no second COUNT(*) for "x of y"
+- RangeDatesQuerySet: the date_hierarchy links are built from MIN() and
+  MAX() of the (indexed) date column instead of SELECT DISTINCT over
+  every row. Every year, month or day in the range is listed, also ones
+  without rows. Picking one filters with an indexed range, as usual.
+"""
+
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+def estimated_count(model, using="default"):
+    """
+    Return the database's estimate of the table's row count, or None
+    when it has none (no statistics yet, or another database).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "sqlite":
+            # Filled by ANALYZE / PRAGMA optimize; the first number is
+            # the row count
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # PostgreSQL reports -1 for tables that were never analyzed
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never counts more than ADMIN_COUNT_LIMIT rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        # COUNT(*) over a LIMIT subquery stops after limit rows
+        return queryset.order_by()[:limit].count()
+
+
+def _date_range(first, last, kind):
+    """
+    Every year, month or day from first to last, as dates.
+    """
+    if kind == "year":
+        return [date(year, 1, 1) for year in range(first.year, last.year + 1)]
+    if kind == "month":
+        months = []
+        current = date(first.year, first.month, 1)
+        while current <= last:
+            months.append(current)
+            current = (current + timedelta(days=32)).replace(day=1)
+        return months
+    return [first + timedelta(days=n) for n in range((last - first).days + 1)]
+
+
+class RangeDatesQuerySet(QuerySet):
+    """
+    QuerySet whose dates() and datetimes() are calendar ranges between
+    MIN() and MAX() of the field.
+    """
+
+    def _bounds(self, field_name):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds["first"] is None:
+            return None
+        return bounds["first"], bounds["last"]
+
+    def dates(self, field_name, kind, order="ASC"):
+        bounds = self._bounds(field_name)
+        if bounds is None:
+            return []
+        values = _date_range(*bounds, kind)
+        return values[::-1] if order == "DESC" else values
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None, **kwargs):
+        bounds = self._bounds(field_name)
+        if bounds is None:
+            return []
+        first, last = (timezone.localtime(value, tzinfo).date() for value in bounds)
+        values = [
+            timezone.make_aware(datetime.combine(day, datetime.min.time()), tzinfo)
+            for day in _date_range(first, last, kind)
+        ]
+        return values[::-1] if order == "DESC" else values
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for big tables; see the module docstring.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if not self.date_hierarchy:
+            return queryset
+        return RangeDatesQuerySet(
+            model=queryset.model,
+            query=queryset.query,
+            using=queryset._db,
+            hints=queryset._hints,
+        )
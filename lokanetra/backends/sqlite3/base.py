@@ -0,0 +1,25 @@
+"""
+SQLite backend tuned for the wallet workload.
+
+On every new connection it applies the PRAGMAS from the database
+settings (WAL mode, busy timeout, cache size ...). Transactions can be
+started with BEGIN IMMEDIATE, so two writers queue up on the write lock
+instead of both reading and then failing with "database is locked".
+"""
+
+from django.db.backends.sqlite3 import base
+
+from lokanetra.database import SQLITE_PRAGMAS
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict.get("PRAGMAS", SQLITE_PRAGMAS)
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get("TRANSACTION_MODE") or "DEFERRED"
+        self.cursor().execute(f"BEGIN {mode}")
@@ -0,0 +1,22 @@
+"""
+Helpers so API views do not import drf-yasg themselves.
+
+drf-yasg pulls in jsonschema and the spec validators, which slows down
+worker startup. With API_ONLY the docs are not served, so the decorator
+below does nothing and drf-yasg is never imported.
+"""
+
+from django.conf import settings
+
+
+def swagger_auto_schema(**kwargs):
+    """
+    drf_yasg.utils.swagger_auto_schema when the docs are enabled,
+    otherwise a decorator that returns the view method unchanged.
+    """
+    if settings.API_ONLY:
+        return lambda view_method: view_method
+
+    from drf_yasg.utils import swagger_auto_schema as drf_yasg_swagger_auto_schema
+
+    return drf_yasg_swagger_auto_schema(**kwargs)
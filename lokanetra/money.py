@@ -0,0 +1,186 @@
+"""
+Money columns.
+
+MoneyField is used for every amount and balance. In Python it is always
+a Decimal with two places, so views, serializers and the API keep their
+decimal strings. How it is stored depends on MONEY_STORAGE:
+
+- "decimal" (default): a DECIMAL(12, 2) column, as before.
+- "minor": a BIGINT column holding minor units (paise/cents). Integer
+  columns are smaller and compare and sum faster.
+
+Values are converted when they are sent to and read from the database,
+including filters, bulk_update and Sum(). Avg() and raw SQL see minor
+units.
+
+Amounts carry no currency of their own: tables with amounts in several
+currencies have a currency column (default: default_currency()).
+
+The columns of an existing database are converted by the wallet and
+transactions migrations and by "manage.py convert_money_storage", which
+both use convert_table().
+"""
+
+from contextlib import contextmanager
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import models
+
+MINOR_UNITS = 100
+CENT = Decimal("0.01")
+
+STORAGES = ("decimal", "minor")
+
+_forced_storage = None
+
+
+def default_currency():
+    """
+    Default for currency columns: DEFAULT_CURRENCY.
+    """
+    return settings.DEFAULT_CURRENCY
+
+
+def money_storage():
+    return _forced_storage or settings.MONEY_STORAGE
+
+
+@contextmanager
+def using_storage(storage):
+    """
+    Make MoneyField columns use the given storage, e.g. while converting
+    a database away from the configured one.
+    """
+    global _forced_storage
+    previous, _forced_storage = _forced_storage, storage
+    try:
+        yield
+    finally:
+        _forced_storage = previous
+
+
+def to_minor(value):
+    """
+    Decimal('12.34') -> 1234
+    """
+    return int((value * MINOR_UNITS).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def from_minor(value):
+    """
+    1234 -> Decimal('12.34')
+    """
+    return (Decimal(value) / MINOR_UNITS).quantize(CENT)
+
+
+class MoneyField(models.DecimalField):
+    """
+    DecimalField stored as DECIMAL or as BIGINT minor units.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_digits", 12)
+        kwargs.setdefault("decimal_places", 2)
+        super().__init__(*args, **kwargs)
+
+    def get_internal_type(self):
+        if money_storage() == "minor":
+            return "BigIntegerField"
+        return "DecimalField"
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None or money_storage() != "minor":
+            return value
+        return to_minor(value)
+
+    def get_db_prep_save(self, value, connection):
+        if money_storage() != "minor" or hasattr(value, "as_sql"):
+            return super().get_db_prep_save(value, connection)
+        return self.get_db_prep_value(value, connection)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or money_storage() != "minor":
+            return value
+        return from_minor(value)
+
+
+def money_fields(model):
+    return [
+        field
+        for field in model._meta.local_concrete_fields
+        if isinstance(field, MoneyField)
+    ]
+
+
+def column_storage(connection, table, column):
+    """
+    Return how a money column is stored right now: "decimal" or "minor".
+    """
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        description = introspection.get_table_description(cursor, table)
+    for info in description:
+        if info.name == column:
+            field_type = introspection.get_field_type(info.type_code, info)
+            return "decimal" if field_type == "DecimalField" else "minor"
+    raise LookupError(f"{table}.{column} does not exist")
+
+
+def convert_table(schema_editor, model, storage=None):
+    """
+    Convert the model's money columns to the storage (default:
+    MONEY_STORAGE), scaling the values. Columns already stored that way
+    are left alone. Returns the names of the converted columns.
+    """
+    storage = storage or settings.MONEY_STORAGE
+    connection = schema_editor.connection
+    table = model._meta.db_table
+    quote = schema_editor.quote_name
+
+    fields = [
+        field
+        for field in money_fields(model)
+        if column_storage(connection, table, field.column) != storage
+    ]
+    if not fields:
+        return []
+
+    if connection.vendor == "postgresql":
+        for field in fields:
+            column = quote(field.column)
+            if storage == "minor":
+                sql = f"TYPE bigint USING round({column} * {MINOR_UNITS})"
+            else:
+                sql = (
+                    f"TYPE numeric({field.max_digits}, {field.decimal_places}) "
+                    f"USING {column} / {MINOR_UNITS}.0"
+                )
+            schema_editor.execute(
+                f"ALTER TABLE {quote(table)} ALTER COLUMN {column} {sql}"
+            )
+    elif connection.vendor == "sqlite":
+        # SQLite cannot change a column type in place: the table is
+        # rebuilt with the new column types. SQLite does not enforce
+        # DECIMAL precision, so values are scaled in the old column.
+        if storage == "minor":
+            _scale_sqlite(schema_editor, table, fields, f"* {MINOR_UNITS}", 0)
+        with using_storage(storage):
+            schema_editor._remake_table(model)
+        if storage == "decimal":
+            _scale_sqlite(schema_editor, table, fields, f"/ {MINOR_UNITS}.0", 2)
+    else:
+        raise NotImplementedError(
+            f"Money storage cannot be converted on {connection.vendor}"
+        )
+    return [field.name for field in fields]
+
+
+def _scale_sqlite(schema_editor, table, fields, operation, places):
+    quote = schema_editor.quote_name
+    assignments = ", ".join(
+        f"{quote(field.column)} = round({quote(field.column)} {operation}, {places})"
+        for field in fields
+    )
+    schema_editor.execute(f"UPDATE {quote(table)} SET {assignments}")
@@ -0,0 +1,61 @@
+"""
+Fast JSON rendering for hot API endpoints.
+
+FastJSONRenderer writes compact JSON with orjson when it is installed,
+else with the standard json module. Decimals become strings, like the
+amounts and balances the API already returns.
+
+FastJSONMixin makes a view always answer JSON with this renderer,
+without content negotiation or the browsable API.
+"""
+
+import json
+from decimal import Decimal
+
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    # Dates, UUIDs, lazy translations, ... as DRF renders them
+    return _fallback_encoder.default(obj)
+
+
+class FastJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is not None:
+            return orjson.dumps(data, default=_default)
+        return json.dumps(
+            data, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+
+class FirstRendererNegotiation(DefaultContentNegotiation):
+    """
+    Skips Accept header parsing: always the view's first renderer.
+    Request parsers are still picked by Content-Type.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class FastJSONMixin:
+    renderer_classes = [FastJSONRenderer]
+    content_negotiation_class = FirstRendererNegotiation
@@ -0,0 +1,162 @@
+"""
+Database router that sends reporting reads to a read replica.
+
+Reads go to the "replica" alias only inside read_from_replica(), which
+admin listing, export and reporting views enter through
+ReplicaReadMixin. Everything else, including all writes, uses "default".
+
+The replica is skipped when it lags more than REPLICA_MAX_LAG seconds.
+Users who just moved money are pinned to the primary for the same
+window, so their balance always shows their own writes. The pins live
+in the Django cache; with a per-process cache (no REDIS_URL) a pin is
+not seen by the other workers, so per-user reads always use the primary.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+REPLICA_ALIAS = "replica"
+PRIMARY_ALIAS = "default"
+
+# Caches whose entries only the current process sees
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_read_alias = ContextVar("read_alias", default=None)
+
+# Per process: (checked_at, lag_seconds)
+_lag_cache = {"checked_at": 0.0, "lag": None}
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_lag():
+    """
+    Return the replica lag in seconds, or None if it cannot be measured.
+    The value is cached for REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    if now - _lag_cache["checked_at"] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return _lag_cache["lag"]
+
+    connection = connections[REPLICA_ALIAS]
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT CASE WHEN pg_is_in_recovery() "
+                    "THEN COALESCE(EXTRACT(EPOCH FROM "
+                    "now() - pg_last_xact_replay_timestamp()), 0) "
+                    "ELSE 0 END"
+                )
+                lag = float(cursor.fetchone()[0])
+        else:
+            # No replication to measure (e.g. two local SQLite files)
+            lag = 0.0
+    except DatabaseError:
+        lag = None
+
+    _lag_cache.update(checked_at=now, lag=lag)
+    return lag
+
+
+def _pin_key(user_id):
+    return f"replica:pin:{user_id}"
+
+
+def pin_to_primary(*user_ids):
+    """
+    Send reads for these users to the primary for REPLICA_MAX_LAG seconds.
+    Call after committing a write that changes what they will read next.
+    """
+    if not replica_configured():
+        return
+    cache.set_many(
+        {_pin_key(user_id): True for user_id in user_ids if user_id},
+        timeout=settings.REPLICA_MAX_LAG,
+    )
+
+
+def pins_shared():
+    """
+    True when pins are stored in a cache every worker shares.
+    """
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHES
+
+
+def is_pinned(user_id):
+    if not user_id:
+        return False
+    # A pin set by another worker would not be seen
+    return not pins_shared() or cache.get(_pin_key(user_id)) is not None
+
+
+def replica_alias(user_id=None):
+    """
+    Return the alias to read from: the replica when it is configured,
+    healthy and not lagging, otherwise the primary.
+    """
+    if not replica_configured() or is_pinned(user_id):
+        return PRIMARY_ALIAS
+
+    lag = replica_lag()
+    if lag is None or lag > settings.REPLICA_MAX_LAG:
+        return PRIMARY_ALIAS
+    return REPLICA_ALIAS
+
+
+@contextmanager
+def read_from_replica(user_id=None):
+    """
+    Route ORM reads inside the block to the replica when possible.
+    """
+    token = _read_alias.set(replica_alias(user_id))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    API view mixin: run the view handler against the replica.
+    Authentication and permission checks still use the primary.
+    Use only for read-only views (admin listings, exports, reports).
+    """
+
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = _read_alias.set(replica_alias())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            _read_alias.reset(self._replica_token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Reads use the alias chosen by read_from_replica(), writes use default.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
@@ -10,12 +10,30 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from decimal import Decimal
 from pathlib import Path
 
+from lokanetra.database import database_from_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_bool(name, default=False):
+    """Read a True/False flag from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_decimal(name, default=None):
+    """Read an amount from the environment; empty means None."""
+    value = os.environ.get(name, default)
+    return Decimal(value) if value else None
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -42,9 +60,29 @@ INSTALLED_APPS = [
     "drf_yasg",
     "users",
     "wallet",
+    "monitoring",
+    "sms",
+    "events",
+    "webhooks",
+    "reporting",
+    "apidocs",
 ]
 
+# API-only profile
+# API_ONLY=true leaves out the admin site and the API docs (drf-yasg) so
+# API workers start faster; run the admin and docs on separate pods.
+
+API_ONLY = env_bool("API_ONLY", False)
+if API_ONLY:
+    INSTALLED_APPS = [
+        app
+        for app in INSTALLED_APPS
+        if app not in ("django.contrib.admin", "drf_yasg", "apidocs")
+    ]
+
 MIDDLEWARE = [
+    # Removed at startup unless PROFILING_ENABLED is set
+    "monitoring.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -77,15 +115,68 @@ WSGI_APPLICATION = "lokanetra.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
+# Configured from DATABASE_URL (see lokanetra/database.py). Connections
+# are kept open for DB_CONN_MAX_AGE seconds and checked before reuse.
+# DB_POOL turns on Django's psycopg pool for PostgreSQL (Django 5.1+).
 
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": database_from_url(
+        os.environ.get("DATABASE_URL", "sqlite:///db.sqlite3"),
+        base_dir=BASE_DIR,
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        health_checks=env_bool("DB_CONN_HEALTH_CHECKS", True),
+        pool=env_bool("DB_POOL"),
+        pool_min_size=int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+        pool_max_size=int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+        sqlite_busy_timeout=int(os.environ.get("DB_SQLITE_BUSY_TIMEOUT", "5000")),
+        sqlite_transaction_mode=os.environ.get(
+            "DB_SQLITE_TRANSACTION_MODE", "IMMEDIATE"
+        ),
+    )
 }
 
+# Read replica
+# When REPLICA_DATABASE_URL is set, admin listings and reports read from
+# it (see lokanetra/routers.py). The replica is skipped while it lags more
+# than REPLICA_MAX_LAG seconds, and users who just moved money read from
+# the primary for that long. Those pins need a shared cache (REDIS_URL):
+# without one, per-user reads such as the balance always use the primary.
+
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+if REPLICA_DATABASE_URL:
+    DATABASES["replica"] = database_from_url(
+        REPLICA_DATABASE_URL,
+        base_dir=BASE_DIR,
+        conn_max_age=DATABASES["default"]["CONN_MAX_AGE"],
+        health_checks=DATABASES["default"]["CONN_HEALTH_CHECKS"],
+    )
+    # Tests use the default database for both aliases
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_ROUTERS = ["lokanetra.routers.ReplicaRouter"]
+
+REPLICA_MAX_LAG = int(os.environ.get("REPLICA_MAX_LAG", "5"))
+REPLICA_LAG_CHECK_INTERVAL = int(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", "5"))
+
+
+# Cache
+# Shared by all workers when REDIS_URL is set, otherwise per process.
+
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -136,6 +227,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # OTP rate limits (see users/throttling.py)
+    "DEFAULT_THROTTLE_RATES": {
+        "otp_send_phone": os.environ.get("THROTTLE_OTP_SEND_PHONE", "3/min"),
+        "otp_send_ip": os.environ.get("THROTTLE_OTP_SEND_IP", "30/min"),
+        "otp_verify_phone": os.environ.get("THROTTLE_OTP_VERIFY_PHONE", "10/hour"),
+        "otp_verify_ip": os.environ.get("THROTTLE_OTP_VERIFY_IP", "60/min"),
+    },
+    # Proxies in front of the app; 0 means the client IP is REMOTE_ADDR
+    # and X-Forwarded-For is ignored
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", "0")),
 }
 
 from datetime import timedelta
@@ -158,4 +259,244 @@ SWAGGER_SETTINGS = {
             "description": "JWT Authorization header using the Bearer scheme. Example: 'Bearer <access_token>'",
         }
     },
+    # The UI pages load the precomputed schema (see apidocs/schema.py)
+    "SPEC_URL": "schema-json",
 }
+
+REDOC_SETTINGS = {
+    "SPEC_URL": "schema-json",
+}
+
+# Django admin for big tables (see lokanetra/admin_tools.py)
+# Lists count at most ADMIN_COUNT_LIMIT rows (the unfiltered list uses the
+# database's row estimate), and the transaction search keeps the newest
+# ADMIN_SEARCH_LIMIT matches.
+
+ADMIN_COUNT_LIMIT = int(os.environ.get("ADMIN_COUNT_LIMIT", "10000"))
+ADMIN_SEARCH_LIMIT = int(os.environ.get("ADMIN_SEARCH_LIMIT", "1000"))
+
+# API schema
+# swagger.json is generated once per code version and saved in
+# SCHEMA_DIR ("manage.py generate_schema" at build time, or the first
+# request). APP_VERSION names the code version, e.g. the git commit;
+# without it the version is a hash of the project's Python files.
+
+APP_VERSION = os.environ.get("APP_VERSION", "")
+SCHEMA_DIR = os.environ.get("SCHEMA_DIR", str(BASE_DIR / "schema"))
+SCHEMA_CACHE_SECONDS = int(os.environ.get("SCHEMA_CACHE_SECONDS", "300"))
+
+
+# Metrics
+# Each worker writes its metrics to its own file in METRICS_DIR so that
+# /metrics/ can sum all Gunicorn workers. Leave unset for a single process.
+# Clear the directory when the server is restarted.
+
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+
+# Bearer token required by the /metrics/ endpoint. Without it only staff
+# users logged in to the admin can open /metrics/.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+
+# Request profiling
+# Off by default. When on, a PROFILING_SAMPLE_RATE share of requests is
+# profiled with cProfile, and requests slower than PROFILING_SLOW_MS get
+# stack samples. Both record their SQL. The newest PROFILING_MAX_ENTRIES
+# profiles are kept in PROFILING_DIR and listed in the Django admin.
+
+PROFILING_ENABLED = env_bool("PROFILING_ENABLED")
+PROFILING_SLOW_MS = int(os.environ.get("PROFILING_SLOW_MS", "1000"))
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_SAMPLE_INTERVAL_MS = int(os.environ.get("PROFILING_SAMPLE_INTERVAL_MS", "10"))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", BASE_DIR / "profiles")
+PROFILING_MAX_ENTRIES = int(os.environ.get("PROFILING_MAX_ENTRIES", "200"))
+
+
+# Transaction storage
+# partition_transactions keeps TRANSACTION_HOT_MONTHS months (including
+# the current one) in the Transaction table and moves older months into
+# monthly tables. archive_transactions writes partitions older than
+# TRANSACTION_ARCHIVE_AFTER_MONTHS to gzip files in TRANSACTION_ARCHIVE_DIR.
+
+TRANSACTION_HOT_MONTHS = int(os.environ.get("TRANSACTION_HOT_MONTHS", "3"))
+TRANSACTION_ARCHIVE_AFTER_MONTHS = int(
+    os.environ.get("TRANSACTION_ARCHIVE_AFTER_MONTHS", "12")
+)
+TRANSACTION_ARCHIVE_DIR = os.environ.get(
+    "TRANSACTION_ARCHIVE_DIR", BASE_DIR / "archive"
+)
+
+# How amounts and balances are stored (see lokanetra/money.py):
+# "decimal" DECIMAL(12, 2) columns, or "minor" BIGINT paise/cents.
+# After changing it run "manage.py convert_money_storage".
+MONEY_STORAGE = os.environ.get("MONEY_STORAGE", "decimal")
+
+# Currencies (see wallet/fx.py)
+# Every user has a DEFAULT_CURRENCY wallet and can open one per currency
+# in CURRENCIES. Limits, statements and the admin summary count the
+# DEFAULT_CURRENCY. FX rates are cached in each process and reloaded when
+# they changed, checked every FX_RATE_CHECK_INTERVAL seconds.
+
+DEFAULT_CURRENCY = os.environ.get("DEFAULT_CURRENCY", "INR").upper()
+CURRENCIES = [
+    code.strip().upper()
+    for code in os.environ.get("CURRENCIES", "INR,USD,EUR,GBP").split(",")
+    if code.strip()
+]
+FX_RATE_CHECK_INTERVAL = float(os.environ.get("FX_RATE_CHECK_INTERVAL", "30"))
+
+# Monthly statements (manage.py generate_statements) are written to
+# STATEMENT_DIR/<YYYY-MM>/.
+STATEMENT_DIR = os.environ.get("STATEMENT_DIR", BASE_DIR / "statements")
+
+# "sync": money views create Transaction rows while holding the wallet lock.
+# "journal": they write one compact LedgerJournal row instead, and a
+# background writer creates the Transaction rows in batches. Set
+# TRANSACTION_JOURNAL_THREAD to False when running drain_journal as a
+# separate worker instead of the in-process thread.
+TRANSACTION_LOG_MODE = os.environ.get("TRANSACTION_LOG_MODE", "sync")
+TRANSACTION_JOURNAL_THREAD = env_bool("TRANSACTION_JOURNAL_THREAD", True)
+TRANSACTION_JOURNAL_BATCH_SIZE = int(
+    os.environ.get("TRANSACTION_JOURNAL_BATCH_SIZE", "500")
+)
+TRANSACTION_JOURNAL_INTERVAL = float(
+    os.environ.get("TRANSACTION_JOURNAL_INTERVAL", "1")
+)
+
+
+# Transfers
+# "direct": each transfer request locks and updates the wallets itself.
+# "queued": requests are batched per sender shard by a worker thread, so
+# many transfers share one lock acquisition (see wallet/transfer_queue.py).
+# Batching needs a threaded server, e.g. gunicorn --threads 32.
+
+TRANSFER_ENGINE = os.environ.get("TRANSFER_ENGINE", "direct")
+TRANSFER_QUEUE_SHARDS = int(os.environ.get("TRANSFER_QUEUE_SHARDS", "4"))
+TRANSFER_QUEUE_BATCH_SIZE = int(os.environ.get("TRANSFER_QUEUE_BATCH_SIZE", "100"))
+TRANSFER_QUEUE_MAX_WAIT_MS = float(os.environ.get("TRANSFER_QUEUE_MAX_WAIT_MS", "2"))
+TRANSFER_QUEUE_TIMEOUT = float(os.environ.get("TRANSFER_QUEUE_TIMEOUT", "10"))
+
+# Wallet activity stream (see events/)
+# Every credit, debit and transfer adds a WalletEvent in the same
+# transaction. Consumers long-poll GET /events/ or run
+# "manage.py consume_events". An event after a missing id is held back
+# until it is WALLET_EVENT_GAP_WAIT seconds old, in case the missing id
+# is still committing; keep it above the slowest money transaction.
+# prune_events deletes events every consumer read.
+
+WALLET_EVENTS = env_bool("WALLET_EVENTS", True)
+WALLET_EVENT_BATCH_SIZE = int(os.environ.get("WALLET_EVENT_BATCH_SIZE", "500"))
+WALLET_EVENT_GAP_WAIT = float(os.environ.get("WALLET_EVENT_GAP_WAIT", "120"))
+WALLET_EVENT_POLL_INTERVAL = float(os.environ.get("WALLET_EVENT_POLL_INTERVAL", "0.5"))
+WALLET_EVENT_MAX_WAIT = int(os.environ.get("WALLET_EVENT_MAX_WAIT", "25"))
+WALLET_EVENT_RETENTION_DAYS = int(os.environ.get("WALLET_EVENT_RETENTION_DAYS", "7"))
+
+# Webhooks (see webhooks/)
+# "manage.py deliver_webhooks --loop" sends them. Requests to different
+# endpoints run concurrently (WEBHOOK_CONCURRENCY); failures are retried
+# after WEBHOOK_RETRY_DELAY * 2^attempts seconds. Private and loopback
+# addresses are refused unless WEBHOOK_ALLOW_PRIVATE is set.
+
+WEBHOOK_BATCH_SIZE = int(os.environ.get("WEBHOOK_BATCH_SIZE", "500"))
+WEBHOOK_MAX_EVENTS_PER_REQUEST = int(
+    os.environ.get("WEBHOOK_MAX_EVENTS_PER_REQUEST", "100")
+)
+WEBHOOK_CONCURRENCY = int(os.environ.get("WEBHOOK_CONCURRENCY", "50"))
+WEBHOOK_CONNECTIONS_PER_HOST = int(os.environ.get("WEBHOOK_CONNECTIONS_PER_HOST", "4"))
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_RETRY_DELAY = int(os.environ.get("WEBHOOK_RETRY_DELAY", "30"))
+WEBHOOK_LEASE_SECONDS = int(os.environ.get("WEBHOOK_LEASE_SECONDS", "120"))
+WEBHOOK_INTERVAL = float(os.environ.get("WEBHOOK_INTERVAL", "1"))
+WEBHOOK_ALLOW_PRIVATE = env_bool("WEBHOOK_ALLOW_PRIVATE", False)
+
+# Admin summary (see reporting/)
+# GET /reporting/summary/ is built from counters kept up to date from the
+# wallet event stream and cached. Once it is REPORTING_SUMMARY_TTL seconds
+# old it is still served while a background thread (REPORTING_REFRESH_THREAD)
+# or "manage.py update_reports --loop" builds the next one.
+
+REPORTING_SUMMARY_TTL = int(os.environ.get("REPORTING_SUMMARY_TTL", "10"))
+REPORTING_REFRESH_THREAD = env_bool("REPORTING_REFRESH_THREAD", True)
+REPORTING_TOP_RECEIVERS = int(os.environ.get("REPORTING_TOP_RECEIVERS", "10"))
+REPORTING_RECEIVER_DAYS = int(os.environ.get("REPORTING_RECEIVER_DAYS", "31"))
+
+# Text messages (see sms/)
+# send-otp only queues the SMS; a background thread in each process
+# (SMS_DISPATCH_THREAD) or "manage.py send_sms --loop" sends it.
+# SMS_PROVIDER: "console" (log only, refuses to send unless DEBUG),
+# "fake" (tests), "http" or a dotted path to a sms.providers.BaseProvider
+# subclass.
+
+SMS_PROVIDER = os.environ.get("SMS_PROVIDER", "console")
+SMS_GATEWAY_URL = os.environ.get("SMS_GATEWAY_URL", "")
+SMS_GATEWAY_TOKEN = os.environ.get("SMS_GATEWAY_TOKEN", "")
+SMS_GATEWAY_TIMEOUT = float(os.environ.get("SMS_GATEWAY_TIMEOUT", "5"))
+SMS_DISPATCH_THREAD = env_bool("SMS_DISPATCH_THREAD", True)
+SMS_DISPATCH_INTERVAL = float(os.environ.get("SMS_DISPATCH_INTERVAL", "2"))
+SMS_BATCH_SIZE = int(os.environ.get("SMS_BATCH_SIZE", "100"))
+SMS_MAX_ATTEMPTS = int(os.environ.get("SMS_MAX_ATTEMPTS", "5"))
+SMS_RETRY_DELAY = float(os.environ.get("SMS_RETRY_DELAY", "5"))
+# A claimed batch must be sent within SMS_LEASE_SECONDS, so a batch is at
+# most SMS_LEASE_SECONDS / (2 * SMS_GATEWAY_TIMEOUT) messages (6 by default)
+SMS_LEASE_SECONDS = int(os.environ.get("SMS_LEASE_SECONDS", "60"))
+
+# Return the OTP in the send-otp response (machine test / development only)
+OTP_RETURN_IN_RESPONSE = env_bool("OTP_RETURN_IN_RESPONSE", DEBUG)
+
+# Scheduled transfers (see wallet/scheduler.py)
+# Run "manage.py run_scheduled_transfers --loop"; several can run at once.
+# A failed run is retried after RETRY_DELAY seconds, MAX_FAILURES times,
+# then skipped until the next date.
+
+SCHEDULED_TRANSFER_BATCH_SIZE = int(
+    os.environ.get("SCHEDULED_TRANSFER_BATCH_SIZE", "500")
+)
+SCHEDULED_TRANSFER_INTERVAL = float(os.environ.get("SCHEDULED_TRANSFER_INTERVAL", "5"))
+SCHEDULED_TRANSFER_RETRY_DELAY = int(
+    os.environ.get("SCHEDULED_TRANSFER_RETRY_DELAY", "3600")
+)
+SCHEDULED_TRANSFER_MAX_FAILURES = int(
+    os.environ.get("SCHEDULED_TRANSFER_MAX_FAILURES", "3")
+)
+
+# Wallet locks (see wallet/locking.py)
+# Transactions that hit a deadlock or lock timeout are retried
+# WALLET_LOCK_RETRIES times, sleeping a random time up to
+# BASE_DELAY * 2^attempt (at most MAX_DELAY) seconds in between.
+# WALLET_LOCK_NOWAIT makes busy wallets fail fast and go to the retry
+# path instead of waiting in the database.
+
+WALLET_LOCK_RETRIES = int(os.environ.get("WALLET_LOCK_RETRIES", "3"))
+WALLET_LOCK_RETRY_BASE_DELAY = float(
+    os.environ.get("WALLET_LOCK_RETRY_BASE_DELAY", "0.02")
+)
+WALLET_LOCK_RETRY_MAX_DELAY = float(
+    os.environ.get("WALLET_LOCK_RETRY_MAX_DELAY", "0.5")
+)
+WALLET_LOCK_NOWAIT = env_bool("WALLET_LOCK_NOWAIT", False)
+
+# Spending limits (see wallet/services.py)
+# Debits and outgoing transfers per wallet per calendar day / month
+# (TIME_ZONE). A wallet's own daily_limit / monthly_limit overrides them;
+# set a variable to "" for no limit.
+
+WALLET_DAILY_LIMIT = env_decimal("WALLET_DAILY_LIMIT", "100000.00")
+WALLET_MONTHLY_LIMIT = env_decimal("WALLET_MONTHLY_LIMIT", "1000000.00")
+
+# Velocity limits (see wallet/velocity.py)
+# Checked by debit, transfer and split-transfer before any wallet lock.
+# VELOCITY_RULES is comma separated "<dimension>:<measure>:<limit>/<period>"
+# with dimension sender, receiver or device (X-Device-ID header) and
+# measure count or amount. Counters live in the cache (see REDIS_URL).
+
+VELOCITY_CHECKS = env_bool("VELOCITY_CHECKS", True)
+VELOCITY_RULES = [
+    rule.strip()
+    for rule in os.environ.get(
+        "VELOCITY_RULES",
+        "sender:count:30/min,sender:amount:100000/min,"
+        "receiver:count:600/min,device:count:60/min",
+    ).split(",")
+    if rule.strip()
+]
@@ -6,43 +6,43 @@ This file connects:
 - User & OTP routes
 - Wallet routes
 - Transaction routes
+- Wallet activity stream
+- Webhook subscriptions
+- Admin dashboard summary
+- Prometheus metrics
 - Swagger and ReDoc API documentation
+
+With API_ONLY the admin panel and the docs are left out, and their
+modules are never imported.
 """
 
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
-
-# Swagger / API documentation setup
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Lokanetra API",
-        default_version="v1",
-        description="API for OTP login + wallet + transactions",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
 
 urlpatterns = [
-    # Django admin panel
-    path("admin/", admin.site.urls),
     # User & OTP-related endpoints
     path("auth/", include("users.urls")),
     # Wallet operations
     path("wallet/", include("wallet.urls")),
     # Transaction-related admin endpoints
     path("transactions/", include("transactions.urls")),
-    # Swagger JSON schema
-    path("swagger.json", schema_view.without_ui(cache_timeout=0), name="schema-json"),
-    # Swagger UI documentation
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    # ReDoc documentation UI
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    # Wallet activity stream for downstream systems
+    path("events/", include("events.urls")),
+    # Webhook subscriptions
+    path("webhooks/", include("webhooks.urls")),
+    # Admin dashboard summary
+    path("reporting/", include("reporting.urls")),
+    # Prometheus metrics
+    path("metrics/", include("monitoring.urls")),
 ]
+
+if not settings.API_ONLY:
+    from django.contrib import admin
+
+    urlpatterns = [
+        # Django admin panel
+        path("admin/", admin.site.urls),
+        *urlpatterns,
+        # Swagger JSON schema, Swagger UI and ReDoc
+        path("", include("apidocs.urls")),
+    ]
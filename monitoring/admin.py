@@ -0,0 +1,67 @@
+from django.contrib import admin
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .models import ProfileSample
+from .profiling import get_profile, list_profiles
+
+
+@admin.register(ProfileSample)
+class ProfileSampleAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for request profiles stored on disk.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "",
+                self.admin_site.admin_view(self.changelist_view),
+                name="%s_%s_changelist" % info,
+            ),
+            path(
+                "<str:profile_id>/",
+                self.admin_site.admin_view(self.detail_view),
+                name="%s_%s_detail" % info,
+            ),
+        ]
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            raise Http404
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Request profiles",
+            "profiles": list_profiles(),
+        }
+        return TemplateResponse(
+            request, "admin/monitoring/profilesample/change_list.html", context
+        )
+
+    def detail_view(self, request, profile_id):
+        if not self.has_view_permission(request):
+            raise Http404
+        profile = get_profile(profile_id)
+        if profile is None:
+            raise Http404
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"{profile['method']} {profile['path']}",
+            "profile": profile,
+        }
+        return TemplateResponse(
+            request, "admin/monitoring/profilesample/detail.html", context
+        )
@@ -0,0 +1,132 @@
+"""
+Compare CPU time per request of the wallet endpoints' fast JSON path
+with DRF's default rendering (content negotiation, JSONRenderer and,
+for the balance, WalletSerializer).
+
+Example:
+    python manage.py bench_render --iterations 5000
+"""
+
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from lokanetra.renderers import FastJSONRenderer
+from wallet.models import Wallet
+from wallet.serializers import WalletSerializer
+from wallet.views import WalletBalanceView
+
+TRANSFER_RESULT = {
+    "message": "Transfer successful",
+    "debit_transaction_id": 123456,
+    "credit_transaction_id": 123457,
+    "sender_balance": "1500.25",
+    "receiver_balance": "320.00",
+}
+
+
+class DefaultBalanceView(APIView):
+    """
+    The balance view as it was: serializer, then patch the balance.
+    """
+
+    def get(self, request):
+        wallet = Wallet.objects.select_related("user").get(
+            user=request.user, currency=settings.DEFAULT_CURRENCY
+        )
+        data = WalletSerializer(wallet).data
+        data["balance"] = str(wallet.balance)
+        return Response(data)
+
+
+class TransferResultView(APIView):
+    """
+    Renders a fixed transfer response, to time rendering alone.
+    """
+
+    def get(self, request):
+        return Response(dict(TRANSFER_RESULT))
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark the fast JSON path of the wallet endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument(
+            "--username", help="User whose wallet is read (default: first wallet)."
+        )
+
+    def handle(self, *args, **options):
+        user = self._user(options["username"])
+        factory = APIRequestFactory()
+        default = {
+            "renderer_classes": api_settings.DEFAULT_RENDERER_CLASSES,
+            "content_negotiation_class": DefaultContentNegotiation,
+        }
+
+        cases = [
+            ("balance, DRF default", DefaultBalanceView.as_view(**default)),
+            ("balance, fast path", WalletBalanceView.as_view()),
+            ("transfer body, DRF default", TransferResultView.as_view(**default)),
+            (
+                "transfer body, fast path",
+                TransferResultView.as_view(
+                    renderer_classes=[FastJSONRenderer],
+                    content_negotiation_class=WalletBalanceView.content_negotiation_class,
+                ),
+            ),
+        ]
+
+        self.stdout.write(f"{'case':<30}{'CPU us/request':>16}")
+        for name, view in cases:
+            cpu = self._time(factory, user, view, options["iterations"])
+            self.stdout.write(f"{name:<30}{cpu * 1e6:>16.1f}")
+
+        self.stdout.write("")
+        self.stdout.write(f"{'encoder only':<30}{'CPU us/call':>16}")
+        data = {"user": "user_9999999999", "balance": Decimal("1500.25")}
+        for name, renderer in (
+            ("JSONRenderer", JSONRenderer()),
+            ("FastJSONRenderer", FastJSONRenderer()),
+        ):
+            start = time.process_time()
+            for _ in range(options["iterations"] * 10):
+                renderer.render(data)
+            cpu = (time.process_time() - start) / (options["iterations"] * 10)
+            self.stdout.write(f"{name:<30}{cpu * 1e6:>16.1f}")
+
+    def _user(self, username):
+        users = User.objects.filter(wallet__currency=settings.DEFAULT_CURRENCY)
+        if username:
+            users = users.filter(username=username)
+        user = users.order_by("id").first()
+        if user is None:
+            raise CommandError("No user with a wallet found.")
+        return user
+
+    def _time(self, factory, user, view, iterations):
+        def request():
+            # Browsers and API clients send an Accept header
+            req = factory.get("/wallet/balance/", HTTP_ACCEPT="application/json")
+            force_authenticate(req, user=user)
+            response = view(req)
+            response.render()
+            return response
+
+        for _ in range(50):
+            request()
+
+        start = time.process_time()
+        for _ in range(iterations):
+            request()
+        return (time.process_time() - start) / iterations
@@ -0,0 +1,116 @@
+"""
+Measure how fast a fresh worker becomes ready.
+
+Each run starts a new Python process that, like a Gunicorn worker:
+1. imports Django and runs django.setup() (settings, apps, models)
+2. loads the URLconf (all view modules)
+3. serves one request through the WSGI application
+
+Examples:
+    python manage.py bench_startup
+    python manage.py bench_startup --runs 10 --path /wallet/balance/
+    python manage.py bench_startup --compare     # full vs API_ONLY
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+
+from wsgiref.util import setup_testing_defaults
+from django.core.wsgi import get_wsgi_application
+environ = {"PATH_INFO": sys.argv[1], "REQUEST_METHOD": "GET"}
+setup_testing_defaults(environ)
+status = []
+body = get_wsgi_application()(environ, lambda s, h: status.append(s))
+b"".join(body)
+request_done = time.perf_counter()
+
+print(json.dumps({
+    "setup": setup_done - start,
+    "urls": urls_done - setup_done,
+    "first_request": request_done - urls_done,
+    "total": request_done - start,
+    "status": status[0],
+    "modules": len(sys.modules),
+}))
+"""
+
+COLUMNS = ("setup", "urls", "first_request", "total")
+
+
+class Command(BaseCommand):
+    help = "Benchmark worker startup: import time and first-request latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--path",
+            default="/wallet/balance/",
+            help="Path of the first request (default: /wallet/balance/).",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Run with API_ONLY off and on and print both.",
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            profiles = [("full", "false"), ("api-only", "true")]
+        else:
+            profiles = [("api-only" if settings.API_ONLY else "full", None)]
+
+        self.stdout.write(
+            f"{'profile':<10}"
+            + "".join(f"{name + ' ms':>18}" for name in COLUMNS)
+            + f"{'modules':>10}"
+        )
+        for label, api_only in profiles:
+            results = [
+                self._run_once(options["path"], api_only)
+                for _ in range(options["runs"])
+            ]
+            medians = {
+                name: statistics.median(r[name] for r in results) * 1000
+                for name in COLUMNS
+            }
+            self.stdout.write(
+                f"{label:<10}"
+                + "".join(f"{medians[name]:>18.1f}" for name in COLUMNS)
+                + f"{results[-1]['modules']:>10}"
+            )
+        self.stdout.write(
+            f"Median of {options['runs']} runs, first request: {results[-1]['status']}"
+        )
+
+    def _run_once(self, path, api_only):
+        env = dict(os.environ)
+        if api_only is not None:
+            env["API_ONLY"] = api_only
+
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT, path],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,522 @@
+"""
+Small in-process metrics registry with Prometheus text output.
+
+Each process keeps its own values, so no lock is ever shared between
+workers. When METRICS_DIR is set, every process writes its values into
+its own memory-mapped file in that directory, and the metrics view sums
+the files of all Gunicorn workers when it is scraped.
+
+Metrics used by the app are defined at the bottom of this file.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Buckets for money amounts
+AMOUNT_BUCKETS = (10, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+_INITIAL_FILE_SIZE = 64 * 1024
+_HEADER = struct.Struct("i4x")  # used bytes, padding
+_KEY_LEN = struct.Struct("i")
+_VALUE = struct.Struct("d")
+
+
+class _MemoryStore:
+    """
+    Keeps values in a plain dict.
+    Used when METRICS_DIR is not configured (single process setups).
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class _MmapStore:
+    """
+    Keeps values of one process in a memory-mapped file.
+
+    File layout:
+    - header: number of used bytes
+    - entries: key length, key (utf-8, padded to 8 bytes), float64 value
+
+    Existing keys are updated in place, new keys are appended.
+    Only this process writes to the file, readers just scan it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._positions = {}
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, _INITIAL_FILE_SIZE)
+            self._file = os.fdopen(fd, "r+b")
+        except Exception:
+            os.close(fd)
+            raise
+
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _HEADER.unpack_from(self._map, 0)[0]
+        if self._used == 0:
+            self._used = _HEADER.size
+            _HEADER.pack_into(self._map, 0, self._used)
+
+        for key, _value, pos in _read_entries(self._map, self._used):
+            self._positions[key] = pos
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while self._used + needed > size:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def _add_key(self, key):
+        encoded = key.encode("utf-8")
+        padded = len(encoded) + (8 - (_KEY_LEN.size + len(encoded)) % 8) % 8
+        entry_size = _KEY_LEN.size + padded + _VALUE.size
+        if self._used + entry_size > len(self._map):
+            self._grow(entry_size)
+
+        start = self._used
+        _KEY_LEN.pack_into(self._map, start, len(encoded))
+        self._map[start + _KEY_LEN.size : start + _KEY_LEN.size + len(encoded)] = (
+            encoded
+        )
+        pos = start + _KEY_LEN.size + padded
+        _VALUE.pack_into(self._map, pos, 0.0)
+
+        # Publish the entry only after it is fully written
+        self._used += entry_size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = pos
+        return pos
+
+    def inc(self, key, amount):
+        with self._lock:
+            pos = self._positions.get(key)
+            if pos is None:
+                pos = self._add_key(key)
+            current = _VALUE.unpack_from(self._map, pos)[0]
+            _VALUE.pack_into(self._map, pos, current + amount)
+
+    def items(self):
+        with self._lock:
+            return [
+                (key, _VALUE.unpack_from(self._map, pos)[0])
+                for key, pos in self._positions.items()
+            ]
+
+
+def _read_entries(data, used):
+    """
+    Yield (key, value, value_position) for every entry in a metrics file.
+    """
+    pos = _HEADER.size
+    while pos < used:
+        length = _KEY_LEN.unpack_from(data, pos)[0]
+        key = bytes(data[pos + _KEY_LEN.size : pos + _KEY_LEN.size + length])
+        padded = length + (8 - (_KEY_LEN.size + length) % 8) % 8
+        value_pos = pos + _KEY_LEN.size + padded
+        yield key.decode("utf-8"), _VALUE.unpack_from(data, value_pos)[0], value_pos
+        pos = value_pos + _VALUE.size
+
+
+def _read_file(path):
+    """
+    Read all entries of a metrics file written by any process.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return []
+    used = _HEADER.unpack_from(data, 0)[0]
+    return [(key, value) for key, value, _pos in _read_entries(data, used)]
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    """
+    Return the value store of the current process.
+    A new store is opened after a fork, so workers never share a file.
+    """
+    global _store, _store_pid
+
+    pid = os.getpid()
+    if _store is not None and _store_pid == pid:
+        return _store
+
+    with _store_lock:
+        if _store is None or _store_pid != pid:
+            metrics_dir = getattr(settings, "METRICS_DIR", None)
+            if metrics_dir:
+                os.makedirs(metrics_dir, exist_ok=True)
+                _store = _MmapStore(os.path.join(metrics_dir, f"metrics-{pid}.db"))
+            else:
+                _store = _MemoryStore()
+            _store_pid = pid
+    return _store
+
+
+def _make_key(sample_name, labels):
+    return json.dumps([sample_name, labels], separators=(",", ":"))
+
+
+def _collect_values():
+    """
+    Return summed values of all processes as {key: value}.
+    """
+    metrics_dir = getattr(settings, "METRICS_DIR", None)
+    totals = {}
+
+    if metrics_dir:
+        # Make sure this process has a file too, then read everybody's
+        _get_store()
+        entries = []
+        for path in glob.glob(os.path.join(metrics_dir, "metrics-*.db")):
+            try:
+                entries.extend(_read_file(path))
+            except OSError:
+                continue
+    else:
+        entries = _get_store().items()
+
+    for key, value in entries:
+        totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+class _Metric:
+    """
+    Base class for all metrics.
+    Registers itself so it shows up in the metrics output.
+    """
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _label_values(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return [[name, str(labels[name])] for name in self.labelnames]
+
+    def samples(self, values):
+        """
+        Return (sample_name, labels, value) tuples for this metric.
+        """
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    A value that only goes up (requests, failures, amounts).
+    """
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be increased")
+        key = _make_key(self.name, self._label_values(labels))
+        _get_store().inc(key, float(amount))
+
+    def samples(self, values):
+        result = []
+        for key, value in values.items():
+            sample_name, labels = json.loads(key)
+            if sample_name == self.name:
+                result.append((sample_name, labels, value))
+        return sorted(result, key=lambda s: s[1])
+
+
+class Histogram(_Metric):
+    """
+    Counts observations into buckets and keeps their sum and count.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value, **labels):
+        value = float(value)
+        label_values = self._label_values(labels)
+        store = _get_store()
+
+        # Only the first matching bucket is stored, buckets are
+        # made cumulative when the output is rendered
+        bound = "+Inf"
+        for upper in self.buckets:
+            if value <= upper:
+                bound = _format_value(upper)
+                break
+
+        store.inc(_make_key(self.name + "_bucket", label_values + [["le", bound]]), 1.0)
+        store.inc(_make_key(self.name + "_sum", label_values), value)
+        store.inc(_make_key(self.name + "_count", label_values), 1.0)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the block in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, values):
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        buckets = {}
+        sums = {}
+        counts = {}
+
+        for key, value in values.items():
+            sample_name, labels = json.loads(key)
+            if sample_name == self.name + "_bucket":
+                base = tuple(tuple(label) for label in labels if label[0] != "le")
+                le = dict(labels)["le"]
+                buckets.setdefault(base, {})[le] = value
+            elif sample_name == self.name + "_sum":
+                sums[tuple(tuple(label) for label in labels)] = value
+            elif sample_name == self.name + "_count":
+                counts[tuple(tuple(label) for label in labels)] = value
+
+        result = []
+        for base in sorted(counts):
+            cumulative = 0.0
+            for bound in bounds:
+                cumulative += buckets.get(base, {}).get(bound, 0.0)
+                result.append(
+                    (self.name + "_bucket", list(base) + [["le", bound]], cumulative)
+                )
+            result.append((self.name + "_sum", list(base), sums.get(base, 0.0)))
+            result.append((self.name + "_count", list(base), counts[base]))
+        return result
+
+
+class CallbackGauge(_Metric):
+    """
+    A value computed when metrics are scraped (queue sizes, lag).
+    The callback returns a number, or None to leave the metric out.
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, callback):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def samples(self, values):
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        return [(self.name, [], float(value))]
+
+
+REGISTRY = []
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_metrics():
+    """
+    Render every registered metric in Prometheus text format.
+    """
+    values = _collect_values()
+    lines = []
+
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+        for sample_name, labels, value in metric.samples(values):
+            if labels:
+                label_text = ",".join(
+                    f'{name}="{_escape(label_value)}"' for name, label_value in labels
+                )
+                lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# --- Application metrics ---
+
+WALLET_OPERATION_AMOUNT = Histogram(
+    "wallet_operation_amount",
+    "Amounts of completed wallet operations (count and sum per operation).",
+    ["operation"],
+    buckets=AMOUNT_BUCKETS,
+)
+
+WALLET_OPERATION_FAILURES = Counter(
+    "wallet_operation_failures_total",
+    "Rejected wallet operations by reason.",
+    ["operation", "reason"],
+)
+
+WALLET_LOCK_WAIT = Histogram(
+    "wallet_lock_wait_seconds",
+    "Time spent waiting for wallet row locks.",
+    ["operation"],
+)
+
+WALLET_LOCK_RETRIES = Counter(
+    "wallet_lock_retries_total",
+    "Wallet transactions retried after a deadlock or lock timeout.",
+    ["operation"],
+)
+
+WALLET_TRANSFER_BATCH_SIZE = Histogram(
+    "wallet_transfer_batch_size",
+    "Transfers applied together by the queued transfer engine.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+
+WALLET_VELOCITY_BLOCKED = Counter(
+    "wallet_velocity_blocked_total",
+    "Operations rejected by a velocity rule, by dimension and measure.",
+    ["dimension", "measure"],
+)
+
+SCHEDULED_TRANSFERS = Counter(
+    "scheduled_transfers_total",
+    "Scheduled transfer runs by result (paid, failed, skipped).",
+    ["result"],
+)
+
+OTP_SENT = Counter(
+    "otp_sent_total",
+    "OTP codes created.",
+)
+
+OTP_VERIFICATIONS = Counter(
+    "otp_verifications_total",
+    "OTP verification attempts by result.",
+    ["result"],
+)
+
+SMS_SENT = Counter(
+    "sms_sent_total",
+    "Text message send attempts by provider and result.",
+    ["provider", "result"],
+)
+
+OTP_THROTTLED = Counter(
+    "otp_throttled_total",
+    "OTP requests rejected by a rate limit, by throttle scope.",
+    ["scope"],
+)
+
+TRANSACTION_JOURNAL_MATERIALIZED = Counter(
+    "transaction_journal_materialized_total",
+    "Journal entries turned into Transaction rows.",
+)
+
+
+def _journal_pending():
+    from transactions.journal import journal_lag
+
+    return journal_lag()[0]
+
+
+def _journal_lag_seconds():
+    from transactions.journal import journal_lag
+
+    return journal_lag()[1]
+
+
+TRANSACTION_JOURNAL_PENDING = CallbackGauge(
+    "transaction_journal_pending",
+    "Journal entries not yet turned into Transaction rows.",
+    _journal_pending,
+)
+
+TRANSACTION_JOURNAL_LAG = CallbackGauge(
+    "transaction_journal_lag_seconds",
+    "Age of the oldest journal entry not yet turned into Transaction rows.",
+    _journal_lag_seconds,
+)
+
+WALLET_EVENTS_PUBLISHED = Counter(
+    "wallet_events_published_total",
+    "Events added to the wallet activity stream by type.",
+    ["type"],
+)
+
+WALLET_EVENT_GAPS_SKIPPED = Counter(
+    "wallet_event_gaps_skipped_total",
+    "Missing event ids that a read passed over as rolled back.",
+)
+
+
+def _event_consumer_lag():
+    from events.outbox import consumer_lag
+
+    return consumer_lag()
+
+
+WALLET_EVENT_CONSUMER_LAG = CallbackGauge(
+    "wallet_event_consumer_lag",
+    "Events the slowest stream consumer has not read yet.",
+    _event_consumer_lag,
+)
+
+WEBHOOK_DELIVERIES = Counter(
+    "webhook_deliveries_total",
+    "Webhook delivery attempts by result (sent, retry, failed).",
+    ["result"],
+)
@@ -0,0 +1,152 @@
+"""
+Opt-in profiling middleware for slow requests.
+
+When PROFILING_ENABLED is off, Django drops this middleware at startup
+so it costs nothing. When on:
+- a random PROFILING_SAMPLE_RATE share of requests runs under cProfile
+- any request slower than PROFILING_SLOW_MS gets stack samples
+Both kinds also record the SQL they executed, and are saved with
+monitoring.profiling so they can be browsed in the Django admin.
+"""
+
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from .profiling import SlowRequestSampler, save_profile
+
+# Keep stored profiles small
+MAX_QUERIES = 500
+MAX_STACKS = 50
+PROFILE_LINES = 60
+
+
+class _QueryCollector:
+    """
+    Database execute wrapper that records every SQL statement and its time.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += 1
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append(
+                    {
+                        "alias": context["connection"].alias,
+                        "sql": sql,
+                        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    }
+                )
+
+
+class ProfilingMiddleware:
+    """
+    Capture cProfile output, stack samples and SQL for sampled or slow
+    requests and store them in the on-disk ring buffer.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.threshold = settings.PROFILING_SLOW_MS / 1000
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.sampler = SlowRequestSampler(
+            threshold=self.threshold,
+            interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000,
+        )
+
+    def __call__(self, request):
+        sampled = random.random() < self.sample_rate
+        profiler = cProfile.Profile() if sampled else None
+        collector = _QueryCollector()
+        started_at = timezone.now()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+
+            self.sampler.begin()
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler:
+                    profiler.disable()
+                duration = time.perf_counter() - start
+                stacks = self.sampler.end()
+
+        if sampled or duration >= self.threshold:
+            self._save(
+                request,
+                response,
+                started_at,
+                duration,
+                "sampled" if sampled else "slow",
+                profiler,
+                stacks,
+                collector,
+            )
+        return response
+
+    def _save(
+        self,
+        request,
+        response,
+        started_at,
+        duration,
+        reason,
+        profiler,
+        stacks,
+        collector,
+    ):
+        profile_text = None
+        if profiler:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(
+                PROFILE_LINES
+            )
+            profile_text = out.getvalue()
+
+        top_stacks = sorted(stacks.items(), key=lambda item: item[1], reverse=True)
+
+        save_profile(
+            {
+                "started_at": started_at.isoformat(),
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 3),
+                "reason": reason,
+                "thread": threading.current_thread().name,
+                "query_count": collector.total,
+                "query_time_ms": round(
+                    sum(q["duration_ms"] for q in collector.queries), 3
+                ),
+                "queries": collector.queries,
+                "profile": profile_text,
+                "stacks": [
+                    {"frames": key.split(";"), "count": count}
+                    for key, count in top_stacks[:MAX_STACKS]
+                ],
+            }
+        )
@@ -0,0 +1,19 @@
+"""
+Models for the monitoring app.
+Profiles are stored on disk, not in the database. ProfileSample only
+exists so the Django admin has an entry to browse them.
+"""
+
+from django.db import models
+
+
+class ProfileSample(models.Model):
+    """
+    Placeholder for profiles saved by ProfilingMiddleware.
+    No table is created for it.
+    """
+
+    class Meta:
+        managed = False
+        verbose_name = "request profile"
+        verbose_name_plural = "request profiles"
@@ -0,0 +1,185 @@
+"""
+Bounded on-disk store for request profiles.
+
+Every profile is one JSON file in PROFILING_DIR. File names start with
+the capture time, so the newest files are kept and the oldest ones are
+removed once PROFILING_MAX_ENTRIES is reached.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+_NAME_RE = re.compile(r"^\d{20}-[0-9a-f]{8}\.json$")
+
+
+def _profile_dir():
+    return str(settings.PROFILING_DIR)
+
+
+def save_profile(record):
+    """
+    Write a profile to disk and drop the oldest ones above the limit.
+    Returns the profile id.
+    """
+    directory = _profile_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.json"
+    record["id"] = name[:-5]
+
+    # Write to a temp file first so readers never see half a profile
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, default=str)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+    _prune(directory)
+    return record["id"]
+
+
+def _prune(directory):
+    """
+    Keep only the newest PROFILING_MAX_ENTRIES profiles.
+    """
+    names = sorted(n for n in os.listdir(directory) if _NAME_RE.match(n))
+    for name in names[: max(len(names) - settings.PROFILING_MAX_ENTRIES, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            # Another worker removed it already
+            pass
+
+
+def list_profiles():
+    """
+    Return a summary of every stored profile, newest first.
+    """
+    directory = _profile_dir()
+    if not os.path.isdir(directory):
+        return []
+
+    summaries = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not _NAME_RE.match(name):
+            continue
+        record = get_profile(name[:-5])
+        if record is None:
+            continue
+        summaries.append(
+            {
+                key: record.get(key)
+                for key in (
+                    "id",
+                    "started_at",
+                    "method",
+                    "path",
+                    "status",
+                    "duration_ms",
+                    "reason",
+                    "query_count",
+                )
+            }
+        )
+    return summaries
+
+
+def get_profile(profile_id):
+    """
+    Load a single profile by id. Returns None if it does not exist.
+    """
+    name = f"{profile_id}.json"
+    if not _NAME_RE.match(name):
+        return None
+    try:
+        with open(os.path.join(_profile_dir(), name), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class SlowRequestSampler:
+    """
+    One background thread that samples the stacks of slow requests.
+
+    Requests register their thread when they start. Once a request runs
+    longer than the threshold, its stack is sampled every interval until
+    it finishes. Fast requests are never sampled.
+    """
+
+    def __init__(self, threshold, interval):
+        self.threshold = threshold
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="slow-request-sampler", daemon=True
+            )
+            self._thread.start()
+
+    def begin(self):
+        """
+        Start watching the current thread.
+        """
+        with self._lock:
+            self._ensure_started()
+            self._active[threading.get_ident()] = (time.monotonic(), {})
+
+    def end(self):
+        """
+        Stop watching the current thread. Returns a copy of the stack
+        counts collected for this request.
+        """
+        with self._lock:
+            _started, stacks = self._active.pop(threading.get_ident(), (None, {}))
+            return dict(stacks)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                slow = [
+                    ident
+                    for ident, (started, _stacks) in self._active.items()
+                    if now - started >= self.threshold
+                ]
+            if not slow:
+                continue
+
+            frames = sys._current_frames()
+            keys = {
+                ident: _collapse_stack(frames[ident])
+                for ident in slow
+                if ident in frames
+            }
+            # The counts are only changed under the lock, so end() gets
+            # a consistent copy
+            with self._lock:
+                for ident, key in keys.items():
+                    entry = self._active.get(ident)
+                    if entry is not None:
+                        stacks = entry[1]
+                        stacks[key] = stacks.get(key, 0) + 1
+
+
+def _collapse_stack(frame):
+    """
+    Turn a frame into 'file:function:line;...' from outermost to innermost.
+    """
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
@@ -0,0 +1,14 @@
+"""
+URL routes for monitoring.
+Includes:
+- Prometheus metrics
+"""
+
+from django.urls import path
+
+from .views import metrics_view
+
+urlpatterns = [
+    # Prometheus scrape endpoint
+    path("", metrics_view, name="metrics"),
+]
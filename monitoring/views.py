@@ -0,0 +1,27 @@
+"""
+This file exposes application metrics for Prometheus.
+"""
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import CONTENT_TYPE, render_metrics
+
+
+def metrics_view(request):
+    """
+    Return all metrics in Prometheus text format.
+    The scraper must send METRICS_TOKEN as a Bearer token. Without a
+    token only staff users logged in to the admin can read them.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token:
+        sent = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+            return HttpResponseForbidden("Invalid metrics token")
+    elif not request.user.is_staff:
+        return HttpResponseForbidden("Set METRICS_TOKEN to scrape metrics")
+
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from .models import DailyReceiver, DailyVolume, Totals
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    # Counters are kept by reporting/aggregator.py
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Totals)
+class TotalsAdmin(ReadOnlyAdmin):
+    list_display = ("users", "wallets", "balance_held", "updated_at")
+
+
+@admin.register(DailyVolume)
+class DailyVolumeAdmin(ReadOnlyAdmin):
+    list_display = ("day", "event_type", "count", "amount")
+    list_filter = ("event_type",)
+    date_hierarchy = "day"
+
+
+@admin.register(DailyReceiver)
+class DailyReceiverAdmin(ReadOnlyAdmin):
+    list_display = ("day", "receiver_id", "count", "amount")
+    date_hierarchy = "day"
@@ -0,0 +1,202 @@
+"""
+Keeps the reporting counters up to date from the wallet event stream.
+
+update() reads the next events as the "reporting" consumer and adds
+them to DailyVolume, DailyReceiver and Totals.balance_held, in one
+database transaction with the new stream offset, so each event is
+counted once. Credits add to the money held and debits take from it;
+transfers only move it between wallets. Everything is counted in
+DEFAULT_CURRENCY: a cross-currency transfer counts its DEFAULT_CURRENCY
+side, and changes the money held when only one side is in it.
+
+rebuild() starts over from the tables: it counts users and wallets,
+sums the DEFAULT_CURRENCY balances and recounts today's events. The first update() runs
+it, and "manage.py update_reports --rebuild" runs it to reconcile, e.g.
+after balances were edited in the Django admin.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models import F, Max, Sum, Value
+from django.utils import timezone
+
+from events import outbox
+from events.models import ConsumerOffset, WalletEvent
+from wallet.models import Wallet
+
+from .models import DailyReceiver, DailyVolume, Totals
+
+CONSUMER = "reporting"
+
+
+def update(batch_size=None):
+    """
+    Add the next batch of events to the counters.
+    Returns the number of events read.
+    """
+    with db_transaction.atomic():
+        # One aggregator at a time
+        offset, created = ConsumerOffset.objects.select_for_update().get_or_create(
+            consumer=CONSUMER
+        )
+        if created:
+            _rebuild(offset)
+            return 0
+
+        events = outbox.read(offset.position, batch_size)
+        if not events:
+            return 0
+
+        held = _add_events(events)
+        if held:
+            # Value() with the MoneyField converts held to the column's
+            # storage (minor units with MONEY_STORAGE = "minor")
+            field = Totals._meta.get_field("balance_held")
+            Totals.objects.filter(pk=1).update(
+                balance_held=F("balance_held") + Value(held, output_field=field)
+            )
+
+        offset.position = events[-1].id
+        offset.save(update_fields=["position", "updated_at"])
+    return len(events)
+
+
+def update_all():
+    """
+    Read events until the counters are up to date.
+    """
+    total = 0
+    while True:
+        count = update()
+        total += count
+        if count == 0:
+            return total
+
+
+def rebuild():
+    """
+    Recount the totals and today's counters from the tables.
+    """
+    with db_transaction.atomic():
+        offset, _created = ConsumerOffset.objects.select_for_update().get_or_create(
+            consumer=CONSUMER
+        )
+        _rebuild(offset)
+
+
+def _rebuild(offset):
+    last_id = WalletEvent.objects.aggregate(id=Max("id"))["id"] or 0
+
+    Totals.objects.update_or_create(
+        pk=1,
+        defaults={
+            "users": User.objects.count(),
+            "wallets": Wallet.objects.count(),
+            "balance_held": Wallet.objects.filter(
+                currency=settings.DEFAULT_CURRENCY
+            ).aggregate(total=Sum("balance"))["total"]
+            or Decimal("0.00"),
+        },
+    )
+
+    # The balances already include these events: only the day's
+    # counters are rebuilt from them
+    today = timezone.localdate()
+    DailyVolume.objects.filter(day=today).delete()
+    DailyReceiver.objects.filter(day=today).delete()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    events = WalletEvent.objects.filter(created_at__gte=start, id__lte=last_id)
+    _add_events(list(events.order_by("id")))
+
+    offset.position = last_id
+    offset.save(update_fields=["position", "updated_at"])
+
+
+def _add_events(events):
+    """
+    Add the events to the daily counters.
+    Returns the change of the money held.
+    """
+    volumes = defaultdict(lambda: [0, Decimal("0.00")])
+    receivers = defaultdict(lambda: [0, Decimal("0.00")])
+    held = Decimal("0.00")
+
+    for event in events:
+        sent, received = _default_amounts(event)
+        if sent is None and received is None:
+            continue
+        day = timezone.localdate(event.created_at)
+        volume = volumes[(day, event.event_type)]
+        volume[0] += 1
+        volume[1] += received if sent is None else sent
+        if event.event_type == "TRANSFER" and received is not None:
+            receiver = receivers[(day, event.receiver_id)]
+            receiver[0] += 1
+            receiver[1] += received
+        if event.event_type != "DEBIT":
+            held += received or 0
+        if event.event_type != "CREDIT":
+            held -= sent or 0
+
+    _add_rows(DailyVolume, "event_type", volumes)
+    _add_rows(DailyReceiver, "receiver_id", receivers)
+    return held
+
+
+def _default_amounts(event):
+    """
+    Return (amount sent, amount received) of the event in
+    DEFAULT_CURRENCY; None for a side in another currency.
+    """
+    default = settings.DEFAULT_CURRENCY
+    currency = event.currency or default
+    sent = event.amount if currency == default else None
+    if not event.received_currency:
+        return sent, sent
+    received = event.received_amount if event.received_currency == default else None
+    return sent, received
+
+
+def _add_rows(model, field, totals):
+    """
+    Add {(day, key): [count, amount]} to the model's rows, creating the
+    missing ones. Three queries however many rows change.
+    """
+    if not totals:
+        return
+    rows = model.objects.filter(
+        day__in={day for day, _key in totals},
+        **{f"{field}__in": {key for _day, key in totals}},
+    )
+    existing = {
+        (row.day, getattr(row, field)): row
+        for row in rows
+        if (row.day, getattr(row, field)) in totals
+    }
+
+    created = []
+    for (day, key), (count, amount) in totals.items():
+        row = existing.get((day, key))
+        if row is None:
+            created.append(model(day=day, count=count, amount=amount, **{field: key}))
+        else:
+            row.count += count
+            row.amount += amount
+    model.objects.bulk_update(list(existing.values()), ["count", "amount"])
+    model.objects.bulk_create(created)
+
+
+def prune(days=None):
+    """
+    Delete DailyReceiver rows older than days (default
+    REPORTING_RECEIVER_DAYS). Returns the number deleted.
+    """
+    days = settings.REPORTING_RECEIVER_DAYS if days is None else days
+    cutoff = timezone.localdate() - timedelta(days=days)
+    deleted, _by_model = DailyReceiver.objects.filter(day__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,52 @@
+"""
+Add new wallet events to the reporting counters and cache a fresh
+admin summary.
+
+Examples:
+    python manage.py update_reports                # catch up once
+    python manage.py update_reports --loop         # keep the summary fresh
+    python manage.py update_reports --rebuild      # recount from the tables
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reporting import aggregator, summary
+
+
+class Command(BaseCommand):
+    help = "Update the reporting counters and the cached admin summary."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recount users, wallets, balances and today's volume first.",
+        )
+        parser.add_argument("--loop", action="store_true", help="Run forever.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.REPORTING_SUMMARY_TTL,
+            help="Seconds between refreshes (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            aggregator.rebuild()
+            self.stdout.write("Rebuilt the reporting counters")
+
+        while True:
+            close_old_connections()
+            data = summary.refresh()
+            aggregator.prune()
+            self.stdout.write(
+                f"{data['generated_at']}: {data['wallets']} wallets, "
+                f"{data['balance_held']} held"
+            )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:11
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+import lokanetra.money
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyReceiver",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("receiver_id", models.BigIntegerField()),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "amount",
+                    lokanetra.money.MoneyField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=18
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyVolume",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("event_type", models.CharField(max_length=10)),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "amount",
+                    lokanetra.money.MoneyField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=18
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Totals",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("users", models.BigIntegerField(default=0)),
+                ("wallets", models.BigIntegerField(default=0)),
+                (
+                    "balance_held",
+                    lokanetra.money.MoneyField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=18
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyvolume",
+            constraint=models.UniqueConstraint(
+                fields=("day", "event_type"), name="daily_volume_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyreceiver",
+            index=models.Index(
+                fields=["day", "-amount"], name="daily_receiver_top_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailyreceiver",
+            constraint=models.UniqueConstraint(
+                fields=("day", "receiver_id"), name="daily_receiver_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,126 @@
+"""
+Counters behind the admin summary (see reporting/summary.py).
+
+- Totals: one row with the number of users and wallets and the money
+  held in all wallets
+- DailyVolume: count and amount of credits, debits and transfers per day
+- DailyReceiver: transfers received per user per day, for the top
+  receivers
+
+The money counters are updated from the wallet event stream by
+reporting/aggregator.py. User and wallet counts are updated by the
+signals below when rows are added or deleted.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from lokanetra.money import MoneyField
+from wallet.models import Wallet
+
+
+class Totals(models.Model):
+    """
+    The single row (pk=1) of running totals.
+    """
+
+    users = models.BigIntegerField(default=0)
+
+    wallets = models.BigIntegerField(default=0)
+
+    balance_held = MoneyField(max_digits=18, default=Decimal("0.00"))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "totals"
+
+    def __str__(self):
+        """Example: '120 users, 118 wallets, 52000.00 held'"""
+        return f"{self.users} users, {self.wallets} wallets, {self.balance_held} held"
+
+
+class DailyVolume(models.Model):
+    """
+    Money moved on one day by one kind of operation.
+    """
+
+    day = models.DateField()
+
+    event_type = models.CharField(max_length=10)
+
+    count = models.BigIntegerField(default=0)
+
+    amount = MoneyField(max_digits=18, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "event_type"], name="daily_volume_unique"
+            )
+        ]
+
+    def __str__(self):
+        """Example: '2024-01-01 TRANSFER 42 / 1200.00'"""
+        return f"{self.day} {self.event_type} {self.count} / {self.amount}"
+
+
+class DailyReceiver(models.Model):
+    """
+    Transfers one user received on one day.
+    """
+
+    day = models.DateField()
+
+    receiver_id = models.BigIntegerField()
+
+    count = models.BigIntegerField(default=0)
+
+    amount = MoneyField(max_digits=18, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "receiver_id"], name="daily_receiver_unique"
+            )
+        ]
+        indexes = [
+            # Top receivers of a day
+            models.Index(fields=["day", "-amount"], name="daily_receiver_top_idx"),
+        ]
+
+    def __str__(self):
+        """Example: '2024-01-01 user 7: 1200.00'"""
+        return f"{self.day} user {self.receiver_id}: {self.amount}"
+
+
+def _count(field, delta):
+    # No row yet: the first "update_reports" run counts everything
+    Totals.objects.filter(pk=1).update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=User)
+def count_new_user(sender, instance, created, **kwargs):
+    if created:
+        _count("users", 1)
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    _count("users", -1)
+
+
+@receiver(post_save, sender=Wallet)
+def count_new_wallet(sender, instance, created, **kwargs):
+    if created:
+        _count("wallets", 1)
+
+
+@receiver(post_delete, sender=Wallet)
+def count_deleted_wallet(sender, instance, **kwargs):
+    _count("wallets", -1)
@@ -0,0 +1,171 @@
+"""
+The admin summary served by GET /reporting/summary/.
+
+build() reads only the counters (see reporting/models.py): a handful of
+small queries, however many wallets and transactions there are. The
+result is kept in the Django cache. A request that finds it older than
+REPORTING_SUMMARY_TTL seconds still gets it at once, and wakes the
+refresher thread of its process, which adds the new events to the
+counters and caches a fresh summary. "manage.py update_reports --loop"
+does the same on a schedule.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils import timezone
+
+from events.models import ConsumerOffset, WalletEvent
+
+from . import aggregator
+from .models import DailyReceiver, DailyVolume, Totals
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "reporting:summary"
+
+EVENT_TYPES = ("CREDIT", "DEBIT", "TRANSFER")
+
+
+def build():
+    """
+    Return the summary dict from the counters.
+    """
+    totals = Totals.objects.filter(pk=1).first() or Totals()
+    today = timezone.localdate()
+
+    volume = {event_type: {"count": 0, "amount": "0.00"} for event_type in EVENT_TYPES}
+    for row in DailyVolume.objects.filter(day=today):
+        volume[row.event_type] = {"count": row.count, "amount": str(row.amount)}
+
+    top = list(
+        DailyReceiver.objects.filter(day=today).order_by("-amount")[
+            : settings.REPORTING_TOP_RECEIVERS
+        ]
+    )
+    users = User.objects.select_related("userprofile").in_bulk(
+        [row.receiver_id for row in top]
+    )
+
+    position = (
+        ConsumerOffset.objects.filter(consumer=aggregator.CONSUMER)
+        .values_list("position", flat=True)
+        .first()
+        or 0
+    )
+    last_id = WalletEvent.objects.aggregate(id=Max("id"))["id"] or 0
+
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "users": totals.users,
+        "wallets": totals.wallets,
+        "balance_held": str(totals.balance_held),
+        "today": {"date": today.isoformat(), "volume": volume},
+        "top_receivers": [
+            {
+                "user_id": row.receiver_id,
+                "username": _username(users.get(row.receiver_id)),
+                "phone_number": _phone(users.get(row.receiver_id)),
+                "count": row.count,
+                "amount": str(row.amount),
+            }
+            for row in top
+        ],
+        # Events not counted yet
+        "events_behind": max(last_id - position, 0),
+    }
+
+
+def _username(user):
+    return user.username if user else None
+
+
+def _phone(user):
+    profile = getattr(user, "userprofile", None) if user else None
+    return profile.phone_number if profile else None
+
+
+def refresh():
+    """
+    Count new events, then build and cache the summary.
+    """
+    aggregator.update_all()
+    summary = build()
+    _store(summary)
+    return summary
+
+
+def _store(summary):
+    # Kept well past the TTL, so a stale summary can still be served
+    # while the next one is built
+    cache.set(
+        CACHE_KEY,
+        {"built_at": time.time(), "summary": summary},
+        settings.REPORTING_SUMMARY_TTL * 10,
+    )
+
+
+def get_summary():
+    """
+    Return the cached summary, refreshing it in the background when it
+    is older than REPORTING_SUMMARY_TTL.
+    """
+    cached = cache.get(CACHE_KEY)
+    if cached is None:
+        # First request: answer from the counters as they are
+        summary = build()
+        _store(summary)
+        refresher.notify()
+        return summary
+
+    if time.time() - cached["built_at"] > settings.REPORTING_SUMMARY_TTL:
+        refresher.notify()
+    return cached["summary"]
+
+
+class SummaryRefresher:
+    """
+    Background thread that refreshes the summary when notified.
+    Several notifications while it works cause one more refresh.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def notify(self):
+        if not settings.REPORTING_REFRESH_THREAD:
+            return
+        self._ensure_started()
+        self._event.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="summary-refresher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._event.wait()
+            self._event.clear()
+            try:
+                close_old_connections()
+                refresh()
+            except Exception:
+                # The cached summary is served until the next try
+                logger.exception("Summary refresh failed")
+
+
+refresher = SummaryRefresher()
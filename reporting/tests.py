@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from events.models import ConsumerOffset, WalletEvent
+from lokanetra.money import STORAGES, using_storage
+
+from . import aggregator
+from .models import Totals
+
+
+class BalanceHeldTests(TestCase):
+    def test_update_adds_events_in_every_money_storage(self):
+        for storage in STORAGES:
+            with self.subTest(storage=storage), using_storage(storage):
+                Totals.objects.update_or_create(
+                    pk=1, defaults={"balance_held": Decimal("10.00")}
+                )
+                offset, _created = ConsumerOffset.objects.get_or_create(
+                    consumer=aggregator.CONSUMER
+                )
+                event = WalletEvent.objects.create(
+                    event_type="CREDIT", receiver_id=1, amount=Decimal("12.34")
+                )
+                offset.position = event.id - 1
+                offset.save()
+
+                aggregator.update()
+
+                self.assertEqual(
+                    Totals.objects.get(pk=1).balance_held, Decimal("22.34")
+                )
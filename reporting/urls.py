@@ -0,0 +1,12 @@
+"""
+URLs for the admin dashboard API.
+"""
+
+from django.urls import path
+
+from .views import AdminSummaryView
+
+urlpatterns = [
+    # Cached totals for the dashboard
+    path("summary/", AdminSummaryView.as_view(), name="reporting-summary"),
+]
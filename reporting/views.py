@@ -0,0 +1,26 @@
+"""
+Admin dashboard API.
+
+- GET /reporting/summary/ returns users, wallets, money held, today's
+  volume per operation and today's top receivers, from the cached
+  summary (see reporting/summary.py)
+"""
+
+from rest_framework import permissions, views
+from rest_framework.response import Response
+
+from lokanetra.renderers import FastJSONMixin
+
+from .summary import get_summary
+
+
+class AdminSummaryView(FastJSONMixin, views.APIView):
+    """
+    Return the dashboard totals. They can be up to
+    REPORTING_SUMMARY_TTL seconds old; see "generated_at".
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_summary())
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import OutboundSMS
+
+
+@admin.register(OutboundSMS)
+class OutboundSMSAdmin(admin.ModelAdmin):
+    list_display = (
+        "phone_number",
+        "provider",
+        "status",
+        "attempts",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = ("status", "provider")
+    search_fields = ("phone_number",)
+    # Bodies contain login codes
+    exclude = ("body",)
+    readonly_fields = ("provider_message_id", "last_error", "created_at", "sent_at")
@@ -0,0 +1,205 @@
+"""
+Queues and sends text messages.
+
+enqueue() adds an OutboundSMS row inside the caller's transaction and
+wakes the dispatcher after the commit. dispatch_batch() claims a batch of
+due messages, sends them grouped by provider (one open connection per
+provider) and records the results. Failed messages are retried after
+SMS_RETRY_DELAY * 2^attempts seconds, up to SMS_MAX_ATTEMPTS.
+
+Dispatchers:
+- SMSDispatcher: a background thread in each web process (SMS_DISPATCH_THREAD)
+- manage.py send_sms: a separate worker process
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from monitoring.metrics import SMS_SENT
+
+from .models import OutboundSMS
+from .providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(phone_number, body):
+    """
+    Queue a message. It is sent once the current transaction commits.
+    """
+    message = OutboundSMS.objects.create(
+        phone_number=phone_number, body=body, provider=settings.SMS_PROVIDER
+    )
+    db_transaction.on_commit(dispatcher.notify)
+    return message
+
+
+def _max_send_seconds():
+    """
+    Longest time one message can take: the gateway timeout for the send
+    and for the one retry after a reconnect.
+    """
+    return settings.SMS_GATEWAY_TIMEOUT * 2
+
+
+def _claim(batch_size):
+    """
+    Lease up to batch_size due messages to this dispatcher.
+
+    The batch is capped so that it is sent before SMS_LEASE_SECONDS run
+    out even if every message times out. Otherwise another dispatcher
+    would claim messages that are still being sent and send them twice.
+    """
+    batch_size = max(
+        1, min(batch_size, int(settings.SMS_LEASE_SECONDS // _max_send_seconds()))
+    )
+    lease = max(settings.SMS_LEASE_SECONDS, _max_send_seconds())
+    now = timezone.now()
+    with db_transaction.atomic():
+        due = OutboundSMS.objects.filter(
+            status="PENDING", next_attempt_at__lte=now
+        ).order_by("next_attempt_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            # Other dispatchers take the next batch instead of waiting
+            due = due.select_for_update(skip_locked=True)
+        messages = list(due[:batch_size])
+
+        # If this process dies while sending, the lease runs out and
+        # another dispatcher retries the messages
+        OutboundSMS.objects.filter(id__in=[m.id for m in messages]).update(
+            next_attempt_at=now + timedelta(seconds=lease)
+        )
+    return messages
+
+
+def _send_group(provider_name, messages):
+    try:
+        provider = get_provider(provider_name)
+        provider.open()
+    except Exception as exc:
+        logger.exception("Could not open SMS provider %s", provider_name)
+        return [exc] * len(messages)
+
+    try:
+        return provider.send_batch([(m.phone_number, m.body) for m in messages])
+    except Exception as exc:
+        # Counted as a failed attempt for every message of the group,
+        # so they are retried and eventually marked FAILED
+        logger.exception("SMS provider %s failed", provider_name)
+        return [exc] * len(messages)
+    finally:
+        provider.close()
+
+
+def _record(message, result, now):
+    message.attempts += 1
+    if isinstance(result, Exception):
+        message.last_error = str(result)[:1000]
+        if message.attempts >= settings.SMS_MAX_ATTEMPTS:
+            message.status = "FAILED"
+        else:
+            delay = settings.SMS_RETRY_DELAY * 2 ** (message.attempts - 1)
+            message.next_attempt_at = now + timedelta(seconds=delay)
+        SMS_SENT.inc(provider=message.provider, result="error")
+    else:
+        message.status = "SENT"
+        message.sent_at = now
+        message.provider_message_id = result or ""
+        message.last_error = ""
+        SMS_SENT.inc(provider=message.provider, result="sent")
+
+
+def dispatch_batch(batch_size=None):
+    """
+    Send up to batch_size due messages (fewer when the lease is too
+    short for them, see _claim()). Returns the number handled.
+    """
+    batch_size = batch_size or settings.SMS_BATCH_SIZE
+    messages = _claim(batch_size)
+    if not messages:
+        return 0
+
+    groups = defaultdict(list)
+    for message in messages:
+        groups[message.provider].append(message)
+
+    now = timezone.now()
+    for provider_name, group in groups.items():
+        results = _send_group(provider_name, group)
+        for message, result in zip(group, results):
+            _record(message, result, now)
+
+    OutboundSMS.objects.bulk_update(
+        messages,
+        [
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "provider_message_id",
+            "last_error",
+            "sent_at",
+        ],
+    )
+    return len(messages)
+
+
+def dispatch_due(batch_size=None):
+    """
+    Send batches until no message is due. Returns the count.
+    """
+    total = 0
+    while True:
+        count = dispatch_batch(batch_size)
+        total += count
+        if count == 0:
+            return total
+
+
+class SMSDispatcher:
+    """
+    Background thread that sends the outbox of this process.
+    It wakes up when notified after a commit, and every
+    SMS_DISPATCH_INTERVAL seconds for retries.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def notify(self):
+        if not settings.SMS_DISPATCH_THREAD:
+            return
+        self._ensure_started()
+        self._event.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="sms-dispatcher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._event.wait(settings.SMS_DISPATCH_INTERVAL)
+            self._event.clear()
+            try:
+                close_old_connections()
+                dispatch_due()
+            except Exception:
+                # Messages stay pending and are retried next round
+                logger.exception("SMS dispatcher failed")
+
+
+dispatcher = SMSDispatcher()
@@ -0,0 +1,39 @@
+"""
+Send queued text messages.
+
+Examples:
+    python manage.py send_sms            # send what is due and exit
+    python manage.py send_sms --loop     # keep running as a worker
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sms.dispatch import dispatch_due
+
+
+class Command(BaseCommand):
+    help = "Send pending OutboundSMS messages in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.SMS_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Run forever.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.SMS_DISPATCH_INTERVAL,
+            help="Seconds to sleep when nothing is due (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            count = dispatch_due(options["batch_size"])
+            if count:
+                self.stdout.write(f"Handled {count} messages")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,59 @@
+"""
+Outbox of text messages waiting to be sent.
+
+Requests only add an OutboundSMS row; the dispatcher (sms/dispatch.py)
+sends pending rows in batches through the configured provider and
+retries failures with a growing delay.
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundSMS(models.Model):
+    """
+    One text message to one phone number.
+    """
+
+    STATUSES = (
+        ("PENDING", "Pending"),  # Waiting for the dispatcher (or a retry)
+        ("SENT", "Sent"),  # Accepted by the provider
+        ("FAILED", "Failed"),  # Gave up after SMS_MAX_ATTEMPTS
+    )
+
+    phone_number = models.CharField(max_length=15)
+
+    body = models.TextField()
+
+    provider = models.CharField(
+        max_length=100, help_text="Provider name picked when the message was queued."
+    )
+
+    status = models.CharField(max_length=10, choices=STATUSES, default="PENDING")
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    # Also used as a lease while a dispatcher is sending the message
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    provider_message_id = models.CharField(max_length=100, blank=True)
+
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "outbound SMS"
+        verbose_name_plural = "outbound SMS"
+        indexes = [
+            # Dispatcher query: pending messages that are due
+            models.Index(
+                fields=["status", "next_attempt_at"], name="sms_pending_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        """Example: '9999999999 PENDING'"""
+        return f"{self.phone_number} {self.status}"
@@ -0,0 +1,173 @@
+"""
+SMS providers.
+
+A provider sends messages for the dispatcher. It is opened once per
+batch, so it can keep one connection to the gateway for all messages in
+the batch, and closed afterwards.
+
+SMS_PROVIDER picks the provider: "console", "fake", "http", or the
+dotted path of a BaseProvider subclass.
+"""
+
+import http.client
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class SMSError(Exception):
+    """
+    The provider did not accept a message.
+    """
+
+
+class BaseProvider:
+    """
+    Interface for SMS providers.
+    Subclasses implement send() and may override open() and close().
+    """
+
+    name = None
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, phone_number, body):
+        """
+        Send one message and return the provider's message id.
+        Raise SMSError (or any exception) on failure.
+        """
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """
+        Send (phone_number, body) pairs. Returns one entry per message:
+        the message id, or the exception that made it fail.
+        """
+        results = []
+        for phone_number, body in messages:
+            try:
+                results.append(self.send(phone_number, body))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+
+class ConsoleProvider(BaseProvider):
+    """
+    Writes messages to the log. For local development: it refuses to
+    send unless DEBUG is on, so OTP codes never end up in production
+    logs.
+    """
+
+    name = "console"
+
+    def open(self):
+        if not settings.DEBUG:
+            raise SMSError(
+                "The console SMS provider only works with DEBUG; set SMS_PROVIDER"
+            )
+
+    def send(self, phone_number, body):
+        logger.info("SMS to %s: %s", phone_number, body)
+        return ""
+
+
+class FakeProvider(BaseProvider):
+    """
+    Keeps messages in memory (FakeProvider.sent). For tests.
+    Phone numbers in FakeProvider.failing raise SMSError.
+    """
+
+    name = "fake"
+    sent = []
+    failing = set()
+
+    def send(self, phone_number, body):
+        if phone_number in self.failing:
+            raise SMSError(f"Fake failure for {phone_number}")
+        self.sent.append((phone_number, body))
+        return f"fake-{len(self.sent)}"
+
+
+class HTTPProvider(BaseProvider):
+    """
+    Posts each message as JSON to SMS_GATEWAY_URL:
+        {"to": "<phone>", "body": "<text>"}
+    with "Authorization: Bearer SMS_GATEWAY_TOKEN". The response may
+    contain {"id": "..."}. One keep-alive connection is used per batch.
+    """
+
+    name = "http"
+
+    def __init__(self):
+        self.url = urlsplit(settings.SMS_GATEWAY_URL)
+        self.connection = None
+
+    def open(self):
+        connection_class = (
+            http.client.HTTPSConnection
+            if self.url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(
+            self.url.netloc, timeout=settings.SMS_GATEWAY_TIMEOUT
+        )
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def send(self, phone_number, body):
+        payload = json.dumps({"to": phone_number, "body": body})
+        headers = {"Content-Type": "application/json"}
+        if settings.SMS_GATEWAY_TOKEN:
+            headers["Authorization"] = f"Bearer {settings.SMS_GATEWAY_TOKEN}"
+
+        try:
+            response = self._post(payload, headers)
+        except (http.client.HTTPException, OSError):
+            # The gateway closed the kept-alive connection; reconnect once
+            self.close()
+            self.open()
+            response = self._post(payload, headers)
+
+        data = response.read()
+        if response.status >= 300:
+            raise SMSError(f"Gateway answered {response.status}: {data[:200]!r}")
+        try:
+            return str(json.loads(data).get("id", ""))
+        except (ValueError, AttributeError):
+            return ""
+
+    def _post(self, payload, headers):
+        self.connection.request(
+            "POST", self.url.path or "/", body=payload, headers=headers
+        )
+        return self.connection.getresponse()
+
+
+PROVIDERS = {
+    "console": ConsoleProvider,
+    "fake": FakeProvider,
+    "http": HTTPProvider,
+}
+
+
+def get_provider(name=None):
+    """
+    Return a new provider instance for a name or dotted path
+    (default: SMS_PROVIDER).
+    """
+    name = name or settings.SMS_PROVIDER
+    provider_class = PROVIDERS.get(name) or import_string(name)
+    return provider_class()
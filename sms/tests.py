@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .dispatch import _claim, dispatch_batch
+from .models import OutboundSMS
+from .providers import FakeProvider
+
+
+@override_settings(SMS_LEASE_SECONDS=60, SMS_GATEWAY_TIMEOUT=5)
+class DispatchLeaseTests(TestCase):
+    def setUp(self):
+        FakeProvider.sent = []
+        for number in range(10):
+            OutboundSMS.objects.create(
+                phone_number=f"90000000{number:02d}", body="code", provider="fake"
+            )
+
+    def test_batch_fits_in_the_lease(self):
+        # Two timeouts of 5 s per message: 6 messages in 60 s
+        self.assertEqual(dispatch_batch(100), 6)
+        self.assertEqual(len(FakeProvider.sent), 6)
+        self.assertEqual(OutboundSMS.objects.filter(status="PENDING").count(), 4)
+
+    @override_settings(SMS_GATEWAY_TIMEOUT=45)
+    def test_lease_covers_one_slow_message(self):
+        now = timezone.now()
+
+        messages = _claim(100)
+
+        self.assertEqual(len(messages), 1)
+        leased = OutboundSMS.objects.get(pk=messages[0].pk)
+        self.assertGreaterEqual(leased.next_attempt_at, now + timedelta(seconds=90))
@@ -1,10 +1,14 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 
-from .models import Transaction
+from lokanetra.admin_tools import LargeTableAdmin
+
+from . import search
+from .models import Statement, Transaction, TransactionPartition
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(LargeTableAdmin):
     list_display = (
         "id",
         "transaction_type",
@@ -14,4 +18,72 @@ class TransactionAdmin(admin.ModelAdmin):
         "receiver",
     )
     list_filter = ("transaction_type",)
-    search_fields = ("sender__username", "receiver__username")
+    list_select_related = ("sender", "receiver")
+    raw_id_fields = ("sender", "receiver")
+    date_hierarchy = "timestamp"
+    ordering = ("-id",)
+    search_fields = ("sender__username", "receiver__username", "remarks")
+    search_help_text = (
+        "Transaction id, or words of 3+ characters from the remarks, "
+        "usernames or phone numbers."
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the search index (transactions/search.py),
+        keeping the newest ADMIN_SEARCH_LIMIT matches.
+        """
+        term = search_term.strip()
+        if term.isdigit() and len(term) < search.MIN_TERM_LENGTH:
+            return queryset.filter(id=int(term)), False
+        if not search.supported():
+            return super().get_search_results(request, queryset, search_term)
+
+        terms = term.split()
+        if not terms:
+            return queryset, False
+        if not search.usable(terms):
+            messages.warning(
+                request,
+                f"Search words need at least {search.MIN_TERM_LENGTH} characters.",
+            )
+            return queryset.none(), False
+
+        ids = search.matching_ids(terms, limit=settings.ADMIN_SEARCH_LIMIT)
+        if term.isdigit():
+            # A transaction id, or a phone number / id inside a username
+            return queryset.filter(id__in=ids) | queryset.filter(id=int(term)), False
+        return queryset.filter(id__in=ids), False
+
+
+@admin.register(TransactionPartition)
+class TransactionPartitionAdmin(admin.ModelAdmin):
+    list_display = ("month", "state", "row_count", "table_name", "archived_at")
+    list_filter = ("state",)
+    readonly_fields = (
+        "month",
+        "table_name",
+        "state",
+        "row_count",
+        "archive_path",
+        "created_at",
+        "archived_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Statement)
+class StatementAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "month",
+        "opening_balance",
+        "closing_balance",
+        "transaction_count",
+        "created_at",
+    )
+    list_filter = ("month",)
+    search_fields = ("user__username",)
+    raw_id_fields = ("user",)
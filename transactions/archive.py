@@ -0,0 +1,100 @@
+"""
+Compressed archive files for old transaction partitions.
+
+Each archived month is one gzip file with one JSON object per line
+(NDJSON), ordered by timestamp. Usernames are stored next to the user
+ids so exports stay readable without the database.
+"""
+
+import gzip
+import json
+import os
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+ARCHIVE_FIELDS = (
+    "id",
+    "sender_id",
+    "sender",
+    "receiver_id",
+    "receiver",
+    "amount",
+    "transaction_type",
+    "timestamp",
+    "remarks",
+    "currency",
+    "counter_amount",
+    "counter_currency",
+    "fx_rate",
+)
+
+
+def archive_path(month):
+    return os.path.join(
+        str(settings.TRANSACTION_ARCHIVE_DIR), f"transactions-{month:%Y-%m}.ndjson.gz"
+    )
+
+
+def write_archive(month, queryset, chunk_size=2000):
+    """
+    Write every row of the queryset to the month's archive file.
+    The file is written under a temporary name and renamed when complete.
+    Returns (path, row_count).
+    """
+    path = archive_path(month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+
+    count = 0
+    rows = queryset.select_related("sender", "receiver").order_by("timestamp", "id")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for tx in rows.iterator(chunk_size=chunk_size):
+            record = {
+                "id": tx.id,
+                "sender_id": tx.sender_id,
+                "sender": tx.sender.username if tx.sender else None,
+                "receiver_id": tx.receiver_id,
+                "receiver": tx.receiver.username if tx.receiver else None,
+                "amount": str(tx.amount),
+                "transaction_type": tx.transaction_type,
+                "timestamp": tx.timestamp.isoformat(),
+                "remarks": tx.remarks,
+            }
+            if tx.currency:
+                # Cross-currency transfer
+                record.update(
+                    currency=tx.currency,
+                    counter_amount=str(tx.counter_amount),
+                    counter_currency=tx.counter_currency,
+                    fx_rate=str(tx.fx_rate),
+                )
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            count += 1
+
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path, count
+
+
+def iter_archive(path):
+    """
+    Yield the rows of an archive file as dicts with Decimal amounts and
+    aware datetimes. Only cross-currency transfers have the currency
+    fields.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            row["amount"] = Decimal(row["amount"])
+            if "currency" in row:
+                row["counter_amount"] = Decimal(row["counter_amount"])
+                row["fx_rate"] = Decimal(row["fx_rate"])
+            timestamp = parse_datetime(row["timestamp"])
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp)
+            row["timestamp"] = timestamp
+            yield row
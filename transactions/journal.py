@@ -0,0 +1,146 @@
+"""
+Turns LedgerJournal entries into Transaction rows.
+
+Entries are handled in batches: one database transaction locks a batch
+of entries, bulk-creates their Transaction rows and deletes them, so
+every entry is written exactly once, even with several writers.
+
+Writers:
+- JournalWriter: a background thread in each web process, woken after
+  every journal commit (TRANSACTION_JOURNAL_THREAD)
+- manage.py drain_journal: a separate worker process
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from monitoring.metrics import TRANSACTION_JOURNAL_MATERIALIZED
+
+from .ledger import transfer_rows
+from .models import LedgerJournal, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _rows_for(entry):
+    if entry.entry_type == "TRANSFER":
+        return transfer_rows(
+            entry.sender_id,
+            entry.receiver_id,
+            entry.amount,
+            entry.remarks,
+            timestamp=entry.created_at,
+        )
+    return [
+        Transaction(
+            sender_id=entry.sender_id,
+            receiver_id=entry.receiver_id,
+            amount=entry.amount,
+            transaction_type=entry.entry_type,
+            remarks=entry.remarks,
+            timestamp=entry.created_at,
+        )
+    ]
+
+
+def materialize_batch(batch_size=None):
+    """
+    Materialize up to batch_size of the oldest journal entries.
+    Returns the number of entries handled.
+    """
+    batch_size = batch_size or settings.TRANSACTION_JOURNAL_BATCH_SIZE
+
+    with db_transaction.atomic():
+        entries = LedgerJournal.objects.order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            # Other writers take the next batch instead of waiting
+            entries = entries.select_for_update(skip_locked=True)
+        entries = list(entries[:batch_size])
+        if not entries:
+            return 0
+
+        rows = []
+        for entry in entries:
+            rows.extend(_rows_for(entry))
+        Transaction.objects.bulk_create(rows)
+        LedgerJournal.objects.filter(id__in=[e.id for e in entries]).delete()
+
+    TRANSACTION_JOURNAL_MATERIALIZED.inc(len(entries))
+    return len(entries)
+
+
+def drain(batch_size=None):
+    """
+    Materialize entries until the journal is empty. Returns the count.
+    """
+    total = 0
+    while True:
+        count = materialize_batch(batch_size)
+        total += count
+        if count == 0:
+            return total
+
+
+def journal_lag():
+    """
+    Return (pending entries, age of the oldest entry in seconds).
+    """
+    oldest = (
+        LedgerJournal.objects.order_by("id")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    if oldest is None:
+        return 0, 0.0
+    return (
+        LedgerJournal.objects.count(),
+        (timezone.now() - oldest).total_seconds(),
+    )
+
+
+class JournalWriter:
+    """
+    Background thread that drains the journal of this process.
+    It wakes up when notified after a commit, and every
+    TRANSACTION_JOURNAL_INTERVAL seconds to pick up anything left over.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def notify(self):
+        if not settings.TRANSACTION_JOURNAL_THREAD:
+            return
+        self._ensure_started()
+        self._event.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="journal-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._event.wait(settings.TRANSACTION_JOURNAL_INTERVAL)
+            self._event.clear()
+            try:
+                close_old_connections()
+                drain()
+            except Exception:
+                # Entries stay in the journal and are retried next round
+                logger.exception("Journal writer failed")
+
+
+writer = JournalWriter()
@@ -0,0 +1,172 @@
+"""
+Writes ledger entries for wallet operations.
+
+Money views call these functions inside their atomic block, right after
+changing balances. With TRANSACTION_LOG_MODE = "sync" (the default) they
+create Transaction rows directly. With "journal" they only add one
+compact LedgerJournal row, which keeps the wallet lock time short; the
+journal writer creates the Transaction rows after the commit.
+
+Each function returns the ids to include in the API response.
+
+Transfers in another currency than DEFAULT_CURRENCY, including
+cross-currency transfers (record_exchange), always create Transaction
+rows directly: the journal has no currency columns.
+"""
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+from .models import LedgerJournal, Transaction
+
+
+def journal_mode():
+    return settings.TRANSACTION_LOG_MODE == "journal"
+
+
+def _journal(entry_type, sender, receiver, amount, remarks):
+    from .journal import writer
+
+    entry = LedgerJournal.objects.create(
+        entry_type=entry_type,
+        sender_id=sender.id if sender else None,
+        receiver_id=receiver.id if receiver else None,
+        amount=amount,
+        remarks=remarks,
+    )
+    db_transaction.on_commit(writer.notify)
+    return {"journal_id": entry.id}
+
+
+def record_credit(user, amount, remarks=""):
+    if journal_mode():
+        return _journal("CREDIT", None, user, amount, remarks)
+
+    tx = Transaction.objects.create(
+        sender=None,
+        receiver=user,
+        amount=amount,
+        transaction_type="CREDIT",
+        remarks=remarks,
+    )
+    return {"transaction_id": tx.id}
+
+
+def record_debit(user, amount, remarks=""):
+    if journal_mode():
+        return _journal("DEBIT", user, None, amount, remarks)
+
+    tx = Transaction.objects.create(
+        sender=user,
+        receiver=None,
+        amount=amount,
+        transaction_type="DEBIT",
+        remarks=remarks,
+    )
+    return {"transaction_id": tx.id}
+
+
+def record_transfer(sender, receiver, amount, remarks=""):
+    """
+    A transfer is logged as a DEBIT and a CREDIT row, both with the
+    sender and receiver set.
+    """
+    return record_transfers([(sender, receiver, amount, remarks)])[0]
+
+
+def record_transfers(transfers, currency=None):
+    """
+    Log many transfers with one bulk insert.
+    transfers is a list of (sender, receiver, amount, remarks), all in
+    currency (default: DEFAULT_CURRENCY).
+    Returns one dict of ids per transfer, in the same order.
+    """
+    if currency == settings.DEFAULT_CURRENCY:
+        currency = None
+    if journal_mode() and currency is None:
+        from .journal import writer
+
+        entries = LedgerJournal.objects.bulk_create(
+            [
+                LedgerJournal(
+                    entry_type="TRANSFER",
+                    sender_id=sender.id,
+                    receiver_id=receiver.id,
+                    amount=amount,
+                    remarks=remarks,
+                )
+                for sender, receiver, amount, remarks in transfers
+            ]
+        )
+        db_transaction.on_commit(writer.notify)
+        return [{"journal_id": entry.id} for entry in entries]
+
+    rows = []
+    for sender, receiver, amount, remarks in transfers:
+        rows.extend(
+            transfer_rows(sender.id, receiver.id, amount, remarks, currency=currency)
+        )
+    rows = Transaction.objects.bulk_create(rows)
+    return [
+        {
+            "debit_transaction_id": debit_tx.id,
+            "credit_transaction_id": credit_tx.id,
+        }
+        for debit_tx, credit_tx in zip(rows[::2], rows[1::2])
+    ]
+
+
+def transfer_rows(
+    sender_id, receiver_id, amount, remarks, timestamp=None, currency=None
+):
+    """
+    Return the unsaved DEBIT and CREDIT rows of a transfer.
+    currency is left empty for DEFAULT_CURRENCY.
+    """
+    extra = {"timestamp": timestamp} if timestamp else {}
+    return [
+        Transaction(
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            amount=amount,
+            transaction_type=tx_type,
+            remarks=remarks,
+            currency=currency,
+            **extra,
+        )
+        for tx_type in ("DEBIT", "CREDIT")
+    ]
+
+
+def record_exchange(
+    sender, receiver, amount, currency, received, received_currency, rate, remarks=""
+):
+    """
+    Log a cross-currency transfer: a DEBIT row with the amount sent and
+    a CREDIT row with the amount received. Each row keeps the other
+    side's amount and the rate.
+    """
+    sides = [
+        ("DEBIT", amount, currency, received, received_currency),
+        ("CREDIT", received, received_currency, amount, currency),
+    ]
+    debit_tx, credit_tx = Transaction.objects.bulk_create(
+        [
+            Transaction(
+                sender=sender,
+                receiver=receiver,
+                amount=side_amount,
+                transaction_type=tx_type,
+                remarks=remarks,
+                currency=side_currency,
+                counter_amount=counter_amount,
+                counter_currency=counter_currency,
+                fx_rate=rate,
+            )
+            for tx_type, side_amount, side_currency, counter_amount, counter_currency in sides
+        ]
+    )
+    return {
+        "debit_transaction_id": debit_tx.id,
+        "credit_transaction_id": credit_tx.id,
+    }
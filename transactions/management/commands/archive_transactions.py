@@ -0,0 +1,62 @@
+"""
+Move old partition tables into compressed archive files.
+
+Example:
+    python manage.py archive_transactions --older-than-months 12
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transactions import search
+from transactions.archive import write_archive
+from transactions.models import TransactionPartition
+from transactions.partitions import (
+    default_cutoff,
+    drop_partition_table,
+    partition_model,
+)
+
+
+class Command(BaseCommand):
+    help = "Write partitions older than --older-than-months to gzip NDJSON files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-months",
+            type=int,
+            default=settings.TRANSACTION_ARCHIVE_AFTER_MONTHS,
+            help="Archive partitions for months before this many months ago.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = default_cutoff(options["older_than_months"])
+        partitions = TransactionPartition.objects.filter(
+            state="ACTIVE", month__lt=cutoff
+        )
+
+        for partition in partitions:
+            model = partition_model(partition.month)
+            path, count = write_archive(partition.month, model.objects.all())
+
+            expected = model.objects.count()
+            if count != expected:
+                self.stderr.write(
+                    f"{partition}: wrote {count} rows but table has {expected}, "
+                    "keeping the table"
+                )
+                continue
+
+            # Readers stop using the table once the partition is ARCHIVED,
+            # so it is marked first and dropped after
+            partition.state = "ARCHIVED"
+            partition.archive_path = path
+            partition.row_count = count
+            partition.archived_at = timezone.now()
+            partition.save()
+            # Archived rows are not listed by the admin, so not searched
+            search.remove_table(model._meta.db_table)
+            drop_partition_table(partition.month)
+
+            self.stdout.write(f"{partition.month:%Y-%m}: archived {count} rows")
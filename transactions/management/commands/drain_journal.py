@@ -0,0 +1,41 @@
+"""
+Materialize LedgerJournal entries into Transaction rows.
+
+Examples:
+    python manage.py drain_journal            # drain once and exit
+    python manage.py drain_journal --loop     # keep running as a worker
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from transactions.journal import drain
+
+
+class Command(BaseCommand):
+    help = "Turn journal entries into Transaction rows in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.TRANSACTION_JOURNAL_BATCH_SIZE
+        )
+        parser.add_argument("--loop", action="store_true", help="Run forever.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.TRANSACTION_JOURNAL_INTERVAL,
+            help="Seconds to sleep when the journal is empty (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            count = drain(options["batch_size"])
+            if count:
+                self.stdout.write(f"Materialized {count} journal entries")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,108 @@
+"""
+Write monthly statements for all users (or some) in parallel.
+
+Examples:
+    python manage.py generate_statements                   # last month, CSV
+    python manage.py generate_statements --month 2024-05 --format csv --format pdf
+    python manage.py generate_statements --workers 8 --users 12 15
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from transactions.partitions import month_start
+from transactions.statements import generate_statement
+
+
+def _init_worker():
+    """
+    Forked workers inherit the parent's Django setup; spawned ones
+    (macOS, Windows) start without it.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _generate_chunk(user_ids, month, formats):
+    done = 0
+    for user in User.objects.filter(id__in=user_ids).order_by("id"):
+        generate_statement(user, month, formats)
+        done += 1
+    connections.close_all()
+    return done
+
+
+class Command(BaseCommand):
+    help = "Generate monthly wallet statements (CSV and optionally PDF)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month", help="Month as YYYY-MM (default: the previous month)."
+        )
+        parser.add_argument(
+            "--format",
+            action="append",
+            choices=("csv", "pdf"),
+            help="Output format, can be repeated (default: csv).",
+        )
+        parser.add_argument("--users", nargs="+", type=int, help="Only these user ids.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (1 runs in this process).",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=200, help="Users per worker task."
+        )
+
+    def handle(self, *args, **options):
+        month = self._month(options["month"])
+        formats = tuple(options["format"] or ("csv",))
+
+        users = User.objects.filter(wallet__currency=settings.DEFAULT_CURRENCY)
+        if options["users"]:
+            users = users.filter(id__in=options["users"])
+        user_ids = list(users.order_by("id").values_list("id", flat=True))
+
+        size = options["chunk_size"]
+        chunks = [user_ids[i : i + size] for i in range(0, len(user_ids), size)]
+
+        if options["workers"] <= 1 or len(chunks) <= 1:
+            total = sum(_generate_chunk(chunk, month, formats) for chunk in chunks)
+        else:
+            # Children must not share the parent's database sockets
+            connections.close_all()
+            total = 0
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker
+            ) as pool:
+                futures = [
+                    pool.submit(_generate_chunk, chunk, month, formats)
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    total += future.result()
+                    self.stdout.write(f"{total}/{len(user_ids)} statements")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {total} statements for {month:%Y-%m}")
+        )
+
+    def _month(self, value):
+        if not value:
+            return month_start(month_start(timezone.localdate()) - timedelta(days=1))
+        try:
+            return datetime.strptime(value, "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--month must look like 2024-05")
@@ -0,0 +1,100 @@
+"""
+Move old months out of the Transaction table into monthly partition tables.
+
+Example:
+    python manage.py partition_transactions --keep-months 3
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.db.models import F
+
+from transactions.models import Transaction, TransactionPartition
+from transactions.partitions import (
+    create_partition,
+    default_cutoff,
+    month_bounds,
+    month_start,
+    partition_model,
+    start_of_day,
+)
+
+COLUMNS = (
+    "id",
+    "sender_id",
+    "receiver_id",
+    "amount",
+    "transaction_type",
+    "timestamp",
+    "remarks",
+    "currency",
+    "counter_amount",
+    "counter_currency",
+    "fx_rate",
+)
+
+
+class Command(BaseCommand):
+    help = "Move whole months older than --keep-months into monthly tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=settings.TRANSACTION_HOT_MONTHS,
+            help="Months to keep in the Transaction table, including this one.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = start_of_day(default_cutoff(options["keep_months"]))
+
+        while True:
+            oldest = (
+                Transaction.objects.filter(timestamp__lt=cutoff)
+                .order_by("timestamp")
+                .values_list("timestamp", flat=True)
+                .first()
+            )
+            if oldest is None:
+                break
+
+            month = month_start(oldest)
+            moved = self.move_month(month, options["batch_size"])
+            self.stdout.write(f"{month:%Y-%m}: moved {moved} transactions")
+
+    def move_month(self, month, batch_size):
+        """
+        Copy the month's rows into its table and delete them from the
+        Transaction table, one batch per database transaction.
+        """
+        partition = create_partition(month)
+        table = partition_model(month)._meta.db_table
+        start, end = month_bounds(month)
+        in_month = Transaction.objects.filter(timestamp__gte=start, timestamp__lt=end)
+
+        columns = ", ".join(COLUMNS)
+        moved = 0
+        while True:
+            with db_transaction.atomic():
+                ids = in_month.order_by("id").values_list("id", flat=True)
+                last = list(ids[batch_size - 1 : batch_size])
+                batch = in_month.filter(id__lte=last[0]) if last else in_month
+
+                select_sql, params = batch.values_list(*COLUMNS).query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"INSERT INTO {table} ({columns}) {select_sql}", params
+                    )
+                    count = cursor.rowcount
+
+                batch.delete()
+                TransactionPartition.objects.filter(pk=partition.pk).update(
+                    row_count=F("row_count") + count
+                )
+
+            moved += count
+            if not last:
+                return moved
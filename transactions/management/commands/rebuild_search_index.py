@@ -0,0 +1,37 @@
+"""
+Create the transaction search index and add missing rows to it.
+
+Run once after upgrading, or to repair the index (e.g. after restoring
+tables from a dump). Rows already indexed are left alone.
+
+Example:
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+
+from transactions import search
+from transactions.models import Transaction, TransactionPartition
+
+
+class Command(BaseCommand):
+    help = "Index transactions that are missing from the search index."
+
+    def handle(self, *args, **options):
+        if not search.supported():
+            self.stdout.write("The search index is not used on this database.")
+            return
+
+        search.create_index()
+        tables = list(
+            TransactionPartition.objects.filter(state="ACTIVE").values_list(
+                "table_name", flat=True
+            )
+        )
+        tables.append(Transaction._meta.db_table)
+
+        for table in tables:
+            with db_transaction.atomic():
+                count = search.index_table(table)
+            self.stdout.write(f"{table}: indexed {count} rows")
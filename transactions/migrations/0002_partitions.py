@@ -0,0 +1,121 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:36
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("transactions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionPartition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "month",
+                    models.DateField(
+                        help_text="First day of the month stored in this partition.",
+                        unique=True,
+                    ),
+                ),
+                ("table_name", models.CharField(max_length=63)),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[("ACTIVE", "Active"), ("ARCHIVED", "Archived")],
+                        default="ACTIVE",
+                        max_length=10,
+                    ),
+                ),
+                ("row_count", models.BigIntegerField(default=0)),
+                ("archive_path", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("archived_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ("month",),
+            },
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                help_text="Transaction amount.",
+                max_digits=12,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="receiver",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="User who received the money (can be null for debit).",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="received_transactions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="remarks",
+            field=models.TextField(
+                blank=True,
+                help_text="Optional notes or description about the transaction.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="sender",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="User who sent the money (can be null for credit).",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="sent_transactions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="timestamp",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                help_text="Date and time when the transaction occurred.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="transaction_type",
+            field=models.CharField(
+                choices=[
+                    ("CREDIT", "Credit"),
+                    ("DEBIT", "Debit"),
+                    ("TRANSFER", "Transfer"),
+                ],
+                help_text="Type of transaction: CREDIT, DEBIT, or TRANSFER.",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["timestamp"], name="transaction_timestamp_idx"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0002_partitions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerJournal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("entry_type", models.CharField(max_length=10)),
+                ("sender_id", models.BigIntegerField(null=True)),
+                ("receiver_id", models.BigIntegerField(null=True)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("remarks", models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                help_text="Date and time when the transaction occurred.",
+            ),
+        ),
+    ]
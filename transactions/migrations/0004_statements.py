@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("transactions", "0003_ledger_journal"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Statement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "month",
+                    models.DateField(help_text="First day of the statement month."),
+                ),
+                (
+                    "opening_balance",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                ("transaction_count", models.PositiveIntegerField(default=0)),
+                ("csv_path", models.CharField(blank=True, max_length=255)),
+                ("pdf_path", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["sender", "timestamp"], name="transaction_sender_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["receiver", "timestamp"], name="transaction_receiver_ts_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="statement",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="statements",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="statement",
+            constraint=models.UniqueConstraint(
+                fields=("user", "month"), name="statement_user_month_unique"
+            ),
+        ),
+    ]
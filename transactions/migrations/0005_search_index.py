@@ -0,0 +1,33 @@
+from django.db import migrations
+
+from transactions import search
+
+
+def create_index(apps, schema_editor):
+    """
+    Create the index and add the rows that already exist.
+    """
+    connection = schema_editor.connection
+    TransactionPartition = apps.get_model("transactions", "TransactionPartition")
+    search.create_index(connection)
+    tables = list(
+        TransactionPartition.objects.filter(state="ACTIVE").values_list(
+            "table_name", flat=True
+        )
+    )
+    for table in tables + ["transactions_transaction"]:
+        search.index_table(table, connection)
+
+
+def drop_index(apps, schema_editor):
+    search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0004_statements"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:59
+
+from decimal import Decimal
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import migrations, models
+
+import lokanetra.money
+from lokanetra.money import convert_table
+from transactions import search
+
+
+def partition_model(apps, month):
+    """
+    The monthly partition model as of this migration: the historical
+    Transaction fields and the partition indexes. transactions.partitions
+    builds it from the current fields, which later migrations add.
+    """
+    Transaction = apps.get_model("transactions", "Transaction")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    attrs = {
+        field.name: field.clone()
+        for field in Transaction._meta.local_fields
+        if not field.is_relation
+    }
+    for name in ("sender", "receiver"):
+        attrs[name] = models.ForeignKey(
+            User,
+            on_delete=models.DO_NOTHING,
+            null=True,
+            blank=True,
+            related_name="+",
+            db_constraint=False,
+        )
+    attrs["Meta"] = type(
+        "Meta",
+        (),
+        {
+            "apps": Apps(),
+            "app_label": "transactions",
+            "db_table": f"transactions_transaction_p{month:%Y%m}",
+            "managed": False,
+            "indexes": [
+                models.Index(fields=["timestamp"], name=f"txn_p{month:%Y%m}_ts_idx"),
+                models.Index(
+                    fields=["sender", "timestamp"], name=f"txn_p{month:%Y%m}_snd_idx"
+                ),
+                models.Index(
+                    fields=["receiver", "timestamp"], name=f"txn_p{month:%Y%m}_rcv_idx"
+                ),
+            ],
+        },
+    )
+    attrs["__module__"] = __name__
+    return type(f"TransactionP{month:%Y%m}", (models.Model,), attrs)
+
+
+def convert(apps, schema_editor, storage=None):
+    """
+    Convert the money columns of existing tables to MONEY_STORAGE.
+    """
+    TransactionPartition = apps.get_model("transactions", "TransactionPartition")
+    tables = [
+        apps.get_model("transactions", name)
+        for name in ("Transaction", "LedgerJournal", "Statement")
+    ]
+    tables += [
+        partition_model(apps, month)
+        for month in TransactionPartition.objects.filter(state="ACTIVE").values_list(
+            "month", flat=True
+        )
+    ]
+    for model in tables:
+        convert_table(schema_editor, model, storage)
+    # Rebuilding a SQLite table drops its triggers
+    search.create_index(schema_editor.connection)
+
+
+def convert_back(apps, schema_editor):
+    convert(apps, schema_editor, "decimal")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0005_search_index"),
+    ]
+
+    operations = [
+        # Only the field class changes; the columns are converted below
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="ledgerjournal",
+                    name="amount",
+                    field=lokanetra.money.MoneyField(decimal_places=2, max_digits=12),
+                ),
+                migrations.AlterField(
+                    model_name="statement",
+                    name="closing_balance",
+                    field=lokanetra.money.MoneyField(decimal_places=2, max_digits=12),
+                ),
+                migrations.AlterField(
+                    model_name="statement",
+                    name="opening_balance",
+                    field=lokanetra.money.MoneyField(decimal_places=2, max_digits=12),
+                ),
+                migrations.AlterField(
+                    model_name="transaction",
+                    name="amount",
+                    field=lokanetra.money.MoneyField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Transaction amount.",
+                        max_digits=12,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(convert, convert_back),
+    ]
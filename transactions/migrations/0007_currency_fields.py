@@ -0,0 +1,127 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:18
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import migrations, models
+
+import lokanetra.money
+
+FIELDS = ("currency", "counter_amount", "counter_currency", "fx_rate")
+
+
+def partition_model(apps, month):
+    """
+    The monthly partition model as of this migration: the historical
+    Transaction fields and the partition indexes. transactions.partitions
+    builds it from the current fields, which later migrations add.
+    """
+    Transaction = apps.get_model("transactions", "Transaction")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    attrs = {
+        field.name: field.clone()
+        for field in Transaction._meta.local_fields
+        if not field.is_relation
+    }
+    for name in ("sender", "receiver"):
+        attrs[name] = models.ForeignKey(
+            User,
+            on_delete=models.DO_NOTHING,
+            null=True,
+            blank=True,
+            related_name="+",
+            db_constraint=False,
+        )
+    attrs["Meta"] = type(
+        "Meta",
+        (),
+        {
+            "apps": Apps(),
+            "app_label": "transactions",
+            "db_table": f"transactions_transaction_p{month:%Y%m}",
+            "managed": False,
+            "indexes": [
+                models.Index(fields=["timestamp"], name=f"txn_p{month:%Y%m}_ts_idx"),
+                models.Index(
+                    fields=["sender", "timestamp"], name=f"txn_p{month:%Y%m}_snd_idx"
+                ),
+                models.Index(
+                    fields=["receiver", "timestamp"], name=f"txn_p{month:%Y%m}_rcv_idx"
+                ),
+            ],
+        },
+    )
+    attrs["__module__"] = __name__
+    return type(f"TransactionP{month:%Y%m}", (models.Model,), attrs)
+
+
+def _partitions(apps):
+    TransactionPartition = apps.get_model("transactions", "TransactionPartition")
+    return [
+        partition_model(apps, month)
+        for month in TransactionPartition.objects.filter(state="ACTIVE").values_list(
+            "month", flat=True
+        )
+    ]
+
+
+def add_to_partitions(apps, schema_editor):
+    """
+    Add the new columns to the monthly partition tables. They are
+    nullable, so no table is rewritten.
+    """
+    for model in _partitions(apps):
+        for name in FIELDS:
+            schema_editor.add_field(model, model._meta.get_field(name))
+
+
+def remove_from_partitions(apps, schema_editor):
+    for model in _partitions(apps):
+        for name in FIELDS:
+            schema_editor.remove_field(model, model._meta.get_field(name))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0006_money_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="counter_amount",
+            field=lokanetra.money.MoneyField(
+                blank=True,
+                decimal_places=2,
+                help_text="Cross-currency transfers: the amount on the other side.",
+                max_digits=12,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="counter_currency",
+            field=models.CharField(blank=True, max_length=3, null=True),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="currency",
+            field=models.CharField(
+                blank=True,
+                help_text="Currency of amount (empty: DEFAULT_CURRENCY).",
+                max_length=3,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="fx_rate",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=8,
+                help_text="Units of the received currency per unit of the sent one.",
+                max_digits=18,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(add_to_partitions, remove_from_partitions),
+    ]
@@ -0,0 +1,78 @@
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import migrations, models
+
+
+def partition_model(apps, month):
+    """
+    The monthly partition model as of this migration: the historical
+    Transaction fields and the partition indexes. transactions.partitions
+    builds it from the current fields, which later migrations add.
+    """
+    Transaction = apps.get_model("transactions", "Transaction")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    attrs = {
+        field.name: field.clone()
+        for field in Transaction._meta.local_fields
+        if not field.is_relation
+    }
+    for name in ("sender", "receiver"):
+        attrs[name] = models.ForeignKey(
+            User,
+            on_delete=models.DO_NOTHING,
+            null=True,
+            blank=True,
+            related_name="+",
+            db_constraint=False,
+        )
+    attrs["Meta"] = type(
+        "Meta",
+        (),
+        {
+            "apps": Apps(),
+            "app_label": "transactions",
+            "db_table": f"transactions_transaction_p{month:%Y%m}",
+            "managed": False,
+            "indexes": [
+                models.Index(fields=["timestamp"], name=f"txn_p{month:%Y%m}_ts_idx"),
+                models.Index(
+                    fields=["sender", "timestamp"], name=f"txn_p{month:%Y%m}_snd_idx"
+                ),
+                models.Index(
+                    fields=["receiver", "timestamp"], name=f"txn_p{month:%Y%m}_rcv_idx"
+                ),
+            ],
+        },
+    )
+    attrs["__module__"] = __name__
+    return type(f"TransactionP{month:%Y%m}", (models.Model,), attrs)
+
+
+def add_indexes(apps, schema_editor):
+    """
+    Add the (sender, timestamp) and (receiver, timestamp) indexes to
+    monthly tables created before partition_model() had them.
+    """
+    connection = schema_editor.connection
+    TransactionPartition = apps.get_model("transactions", "TransactionPartition")
+    for month in TransactionPartition.objects.filter(state="ACTIVE").values_list(
+        "month", flat=True
+    ):
+        model = partition_model(apps, month)
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            )
+        for index in model._meta.indexes:
+            if index.name not in existing:
+                schema_editor.add_index(model, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0007_currency_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, migrations.RunPython.noop),
+    ]
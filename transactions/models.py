@@ -4,18 +4,32 @@ Each entry represents one action such as:
 - credit (add money)
 - debit (remove money)
 - transfer (send money to another user)
+
+Recent transactions live in the Transaction table. Older months are
+moved into one table per month (see transactions/partitions.py), and
+very old months into compressed archive files. TransactionPartition
+keeps track of where each month is stored.
+
+In journal mode the money views write a LedgerJournal entry instead of
+Transaction rows, and transactions/journal.py turns entries into
+Transaction rows in the background.
+
+Statement records the monthly statements written by
+transactions/statements.py.
 """
 
 from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from lokanetra.money import MoneyField
 
 
-class Transaction(models.Model):
+class TransactionBase(models.Model):
     """
-    Represents a single transaction in the system.
-    This can be a CREDIT, DEBIT, or TRANSFER.
+    Fields shared by the Transaction table and the monthly partition tables.
     """
 
     TRANSACTION_TYPES = (
@@ -24,25 +38,7 @@ class Transaction(models.Model):
         ("TRANSFER", "Transfer"),  # Money moved between users
     )
 
-    sender = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
-        related_name="sent_transactions",
-        null=True,
-        blank=True,
-        help_text="User who sent the money (can be null for credit).",
-    )
-
-    receiver = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
-        related_name="received_transactions",
-        null=True,
-        blank=True,
-        help_text="User who received the money (can be null for debit).",
-    )
-
-    amount = models.DecimalField(
+    amount = MoneyField(
         max_digits=12,
         decimal_places=2,
         default=Decimal("0.00"),
@@ -55,8 +51,11 @@ class Transaction(models.Model):
         help_text="Type of transaction: CREDIT, DEBIT, or TRANSFER.",
     )
 
+    # Not auto_now_add: journal entries are materialized later and keep
+    # the time the money actually moved
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         help_text="Date and time when the transaction occurred.",
     )
 
@@ -65,9 +64,174 @@ class Transaction(models.Model):
         help_text="Optional notes or description about the transaction.",
     )
 
+    # Only set on cross-currency transfers; empty means DEFAULT_CURRENCY.
+    # Nullable so adding them does not rewrite the ledger tables.
+    currency = models.CharField(
+        max_length=3,
+        null=True,
+        blank=True,
+        help_text="Currency of amount (empty: DEFAULT_CURRENCY).",
+    )
+
+    counter_amount = MoneyField(
+        null=True,
+        blank=True,
+        help_text="Cross-currency transfers: the amount on the other side.",
+    )
+
+    counter_currency = models.CharField(max_length=3, null=True, blank=True)
+
+    fx_rate = models.DecimalField(
+        max_digits=18,
+        decimal_places=8,
+        null=True,
+        blank=True,
+        help_text="Units of the received currency per unit of the sent one.",
+    )
+
+    class Meta:
+        abstract = True
+
     def __str__(self):
         """
         Return a simple readable string for admin and logs.
         Example: 'CREDIT 100.00 2024-01-01 10:00:00'
         """
         return f"{self.transaction_type} {self.amount} {self.timestamp}"
+
+
+class Transaction(TransactionBase):
+    """
+    Represents a single transaction in the system.
+    This can be a CREDIT, DEBIT, or TRANSFER.
+    """
+
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="sent_transactions",
+        null=True,
+        blank=True,
+        help_text="User who sent the money (can be null for credit).",
+    )
+
+    receiver = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="received_transactions",
+        null=True,
+        blank=True,
+        help_text="User who received the money (can be null for debit).",
+    )
+
+    class Meta:
+        indexes = [
+            # Date range filters and month rotation
+            models.Index(fields=["timestamp"], name="transaction_timestamp_idx"),
+            # One user's transactions in time order (statements)
+            models.Index(
+                fields=["sender", "timestamp"], name="transaction_sender_ts_idx"
+            ),
+            models.Index(
+                fields=["receiver", "timestamp"], name="transaction_receiver_ts_idx"
+            ),
+        ]
+
+
+class TransactionPartition(models.Model):
+    """
+    One month of transactions that was moved out of the Transaction table.
+    ACTIVE partitions are a table in the database, ARCHIVED ones a
+    gzip NDJSON file in TRANSACTION_ARCHIVE_DIR.
+    """
+
+    STATES = (
+        ("ACTIVE", "Active"),
+        ("ARCHIVED", "Archived"),
+    )
+
+    month = models.DateField(
+        unique=True,
+        help_text="First day of the month stored in this partition.",
+    )
+
+    table_name = models.CharField(max_length=63)
+
+    state = models.CharField(max_length=10, choices=STATES, default="ACTIVE")
+
+    row_count = models.BigIntegerField(default=0)
+
+    archive_path = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    archived_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("month",)
+
+    def __str__(self):
+        """Example: '2024-01 ACTIVE'"""
+        return f"{self.month:%Y-%m} {self.state}"
+
+
+class LedgerJournal(models.Model):
+    """
+    Compact record of one money movement, written while the wallet locks
+    are held. The journal writer turns it into Transaction rows
+    (two for a transfer) and deletes it.
+    """
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    entry_type = models.CharField(max_length=10)
+
+    # Plain ids: no foreign key checks on the hot path
+    sender_id = models.BigIntegerField(null=True)
+    receiver_id = models.BigIntegerField(null=True)
+
+    amount = MoneyField(max_digits=12, decimal_places=2)
+
+    remarks = models.TextField(blank=True)
+
+    def __str__(self):
+        """Example: 'TRANSFER 25.00 (journal 7)'"""
+        return f"{self.entry_type} {self.amount} (journal {self.id})"
+
+
+class Statement(models.Model):
+    """
+    A user's statement for one month and the files it was written to.
+    The closing balance is the next month's opening balance.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="statements",
+    )
+
+    month = models.DateField(help_text="First day of the statement month.")
+
+    opening_balance = MoneyField(max_digits=12, decimal_places=2)
+
+    closing_balance = MoneyField(max_digits=12, decimal_places=2)
+
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    csv_path = models.CharField(max_length=255, blank=True)
+
+    pdf_path = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "month"], name="statement_user_month_unique"
+            ),
+        ]
+
+    def __str__(self):
+        """Example: 'user_9999999999 2024-01'"""
+        return f"{self.user} {self.month:%Y-%m}"
@@ -0,0 +1,207 @@
+"""
+Monthly partitions of the transaction ledger.
+
+The Transaction table holds recent months. partition_transactions moves
+older months into one table per month (transactions_transaction_pYYYYMM)
+and archive_transactions moves old partition tables into gzip NDJSON
+files. The same tables are used on SQLite and PostgreSQL.
+
+Readers ask transaction_querysets() for the tables that can hold rows in
+a date range, so a query for one month only touches that month.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models
+from django.utils import timezone
+
+from .models import Transaction, TransactionBase, TransactionPartition
+
+
+def month_start(value):
+    """
+    Return the first day of the month for a date or datetime.
+    """
+    if isinstance(value, datetime):
+        value = (
+            timezone.localtime(value).date()
+            if timezone.is_aware(value)
+            else value.date()
+        )
+    return value.replace(day=1)
+
+
+def next_month(month):
+    """
+    Return the first day of the month after the given one.
+    """
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_bounds(month):
+    """
+    Return aware datetimes [start, end) covering the month.
+    """
+    return start_of_day(month), start_of_day(next_month(month))
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def table_name(month):
+    return f"{TransactionBase._meta.app_label}_transaction_p{month:%Y%m}"
+
+
+def partition_model(month):
+    """
+    Return the model class for a monthly partition table.
+    Classes are created once per process and registered as unmanaged
+    models, so migrations ignore them.
+    """
+    name = f"TransactionP{month:%Y%m}"
+    try:
+        return apps.get_model("transactions", name)
+    except LookupError:
+        pass
+
+    user_fk = {
+        "to": settings.AUTH_USER_MODEL,
+        "on_delete": models.DO_NOTHING,
+        "null": True,
+        "blank": True,
+        "related_name": "+",
+        # Users are deleted through the Transaction table only
+        "db_constraint": False,
+    }
+    meta = type(
+        "Meta",
+        (),
+        {
+            "app_label": "transactions",
+            "db_table": table_name(month),
+            "managed": False,
+            "indexes": [
+                models.Index(fields=["timestamp"], name=f"txn_p{month:%Y%m}_ts_idx"),
+                models.Index(
+                    fields=["sender", "timestamp"], name=f"txn_p{month:%Y%m}_snd_idx"
+                ),
+                models.Index(
+                    fields=["receiver", "timestamp"], name=f"txn_p{month:%Y%m}_rcv_idx"
+                ),
+            ],
+        },
+    )
+    return type(
+        name,
+        (TransactionBase,),
+        {
+            "__module__": __name__,
+            "sender": models.ForeignKey(**user_fk),
+            "receiver": models.ForeignKey(**user_fk),
+            "Meta": meta,
+        },
+    )
+
+
+def transaction_querysets(start_date=None, end_date=None):
+    """
+    Return querysets for every table that can hold transactions between
+    start_date and end_date (inclusive dates, both optional).
+
+    Querysets are in month order, the Transaction table last. Partition
+    tables outside the range are skipped. The Transaction table is skipped
+    when every month in the range has been partitioned. Archived months
+    are not included (see transactions/archive.py).
+    """
+    partitions = TransactionPartition.objects.all()
+    if start_date:
+        partitions = partitions.filter(month__gte=month_start(start_date))
+    if end_date:
+        partitions = partitions.filter(month__lte=month_start(end_date))
+    partitions = list(partitions)
+
+    querysets = [
+        partition_model(p.month).objects.all()
+        for p in partitions
+        if p.state == "ACTIVE"
+    ]
+
+    if not (
+        start_date and end_date and _fully_partitioned(start_date, end_date, partitions)
+    ):
+        querysets.append(Transaction.objects.all())
+    return querysets
+
+
+def _fully_partitioned(start_date, end_date, partitions):
+    months = {p.month for p in partitions}
+    month = month_start(start_date)
+    while month <= end_date:
+        if month not in months:
+            return False
+        month = next_month(month)
+    return True
+
+
+def combine(querysets):
+    """
+    Combine per-table querysets into one (UNION ALL).
+    Filters must be applied before, ordering and slicing after.
+    """
+    if len(querysets) == 1:
+        return querysets[0]
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def create_partition(month):
+    """
+    Create the table for a month and record it. Returns the partition.
+    """
+    partition, _created = TransactionPartition.objects.get_or_create(
+        month=month, defaults={"table_name": table_name(month)}
+    )
+    if table_name(month) not in connection.introspection.table_names():
+        with connection.schema_editor() as editor:
+            editor.create_model(partition_model(month))
+    else:
+        with connection.schema_editor() as editor:
+            add_missing_indexes(editor, partition_model(month))
+    return partition
+
+
+def add_missing_indexes(schema_editor, model):
+    """
+    Create the model's indexes that its table does not have yet, e.g.
+    ones added to partition_model() after the table was created.
+    Returns the names of the created indexes.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        existing = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+    created = []
+    for index in model._meta.indexes:
+        if index.name not in existing:
+            schema_editor.add_index(model, index)
+            created.append(index.name)
+    return created
+
+
+def drop_partition_table(month):
+    with connection.schema_editor() as editor:
+        editor.delete_model(partition_model(month))
+
+
+def default_cutoff(keep_months):
+    """
+    Return the first month that stays in the Transaction table when the
+    current month and keep_months - 1 months before it are kept.
+    """
+    month = month_start(timezone.localdate())
+    for _ in range(max(keep_months, 1) - 1):
+        month = (month - timedelta(days=1)).replace(day=1)
+    return month
@@ -0,0 +1,205 @@
+"""
+Search index for the admin transaction search.
+
+transactions_search holds, per transaction id, the remarks, both
+usernames (which contain the phone numbers) and the transaction type.
+A database trigger fills it on every insert into the Transaction table,
+so sync mode, the journal writer and the transfer engine need no extra
+code. Rows keep their id when they move into a monthly partition, so
+their index entries stay valid; archive_transactions removes the
+entries of months it archives.
+
+SQLite uses an FTS5 table with the trigram tokenizer and PostgreSQL a
+table with a pg_trgm GIN index. Both match substrings of at least three
+characters, like the "icontains" search they replace, without scanning
+the ledger. Other databases keep the plain SearchFilter.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Transaction
+
+TABLE = "transactions_search"
+TRIGGER = "transactions_search_ai"
+
+# Shorter terms have no trigram and cannot use the index
+MIN_TERM_LENGTH = 3
+
+
+def supported(conn=None):
+    return (conn or connection).vendor in ("sqlite", "postgresql")
+
+
+def _tables():
+    return Transaction._meta.db_table, get_user_model()._meta.db_table
+
+
+def _sqlite_create():
+    transactions, users = _tables()
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "remarks, sender, receiver, transaction_type, tokenize = 'trigram')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {TRIGGER} AFTER INSERT ON {transactions}
+        BEGIN
+            INSERT INTO {TABLE} (rowid, remarks, sender, receiver, transaction_type)
+            VALUES (
+                new.id,
+                new.remarks,
+                (SELECT username FROM {users} WHERE id = new.sender_id),
+                (SELECT username FROM {users} WHERE id = new.receiver_id),
+                new.transaction_type
+            );
+        END
+        """,
+    ]
+
+
+def _postgresql_create():
+    transactions, users = _tables()
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            transaction_id bigint PRIMARY KEY,
+            document text NOT NULL
+        )
+        """,
+        f"CREATE INDEX IF NOT EXISTS {TABLE}_trgm_idx "
+        f"ON {TABLE} USING gin (document gin_trgm_ops)",
+        f"""
+        CREATE OR REPLACE FUNCTION {TRIGGER}() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {TABLE} (transaction_id, document)
+            VALUES (NEW.id, {_pg_document("NEW", users)})
+            ON CONFLICT (transaction_id) DO NOTHING;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {TRIGGER} ON {transactions}",
+        f"CREATE TRIGGER {TRIGGER} AFTER INSERT ON {transactions} "
+        f"FOR EACH ROW EXECUTE FUNCTION {TRIGGER}()",
+    ]
+
+
+def _pg_document(row, users):
+    # Fields are joined with a unit separator so a term cannot match
+    # across two of them
+    return (
+        "concat_ws(chr(31), "
+        f"{row}.remarks, "
+        f"(SELECT username FROM {users} WHERE id = {row}.sender_id), "
+        f"(SELECT username FROM {users} WHERE id = {row}.receiver_id), "
+        f"{row}.transaction_type)"
+    )
+
+
+def create_index(conn=None):
+    """
+    Create the search table and the insert trigger.
+    """
+    conn = conn or connection
+    if conn.vendor == "sqlite":
+        statements = _sqlite_create()
+    elif conn.vendor == "postgresql":
+        statements = _postgresql_create()
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def drop_index(conn=None):
+    conn = conn or connection
+    if not supported(conn):
+        return
+    transactions, _users = _tables()
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER} ON {transactions}")
+            cursor.execute(f"DROP FUNCTION IF EXISTS {TRIGGER}()")
+        else:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER}")
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def index_table(table, conn=None):
+    """
+    Add the rows of a ledger table (the Transaction table or a
+    partition) that are not in the index yet. Returns the count.
+    """
+    conn = conn or connection
+    _transactions, users = _tables()
+    if conn.vendor == "sqlite":
+        sql = f"""
+            INSERT INTO {TABLE} (rowid, remarks, sender, receiver, transaction_type)
+            SELECT t.id, t.remarks, s.username, r.username, t.transaction_type
+            FROM {table} t
+            LEFT JOIN {users} s ON s.id = t.sender_id
+            LEFT JOIN {users} r ON r.id = t.receiver_id
+            WHERE t.id NOT IN (SELECT rowid FROM {TABLE})
+        """
+    elif conn.vendor == "postgresql":
+        sql = f"""
+            INSERT INTO {TABLE} (transaction_id, document)
+            SELECT t.id, {_pg_document("t", users)}
+            FROM {table} t
+            ON CONFLICT (transaction_id) DO NOTHING
+        """
+    else:
+        return 0
+    with conn.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.rowcount
+
+
+def remove_table(table, conn=None):
+    """
+    Remove the index entries of a ledger table's rows (before it is
+    dropped). Returns the count.
+    """
+    conn = conn or connection
+    if not supported(conn):
+        return 0
+    key = "rowid" if conn.vendor == "sqlite" else "transaction_id"
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE {key} IN (SELECT id FROM {table})")
+        return cursor.rowcount
+
+
+def usable(terms):
+    """
+    True when every search term is long enough for the index.
+    """
+    return all(len(term) >= MIN_TERM_LENGTH for term in terms)
+
+
+def matching_ids(terms, conn=None, limit=None):
+    """
+    Return a subquery of transaction ids whose indexed fields contain
+    every term (case-insensitive), for use with id__in. With limit only
+    the newest limit ids are returned.
+    """
+    conn = conn or connection
+    if conn.vendor == "sqlite":
+        # Each term is a quoted phrase; phrases are ANDed
+        query = " ".join('"%s"' % term.replace('"', '""') for term in terms)
+        limit_sql = f" ORDER BY rowid DESC LIMIT {int(limit)}" if limit else ""
+        return RawSQL(
+            f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s{limit_sql}", (query,)
+        )
+
+    conditions = " AND ".join(["document ILIKE %s"] * len(terms))
+    params = [
+        "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        for term in terms
+    ]
+    limit_sql = f" ORDER BY transaction_id DESC LIMIT {int(limit)}" if limit else ""
+    return RawSQL(
+        f"SELECT transaction_id FROM {TABLE} WHERE {conditions}{limit_sql}",
+        tuple(params),
+    )
@@ -27,4 +27,8 @@ class TransactionSerializer(serializers.ModelSerializer):
             "transaction_type",
             "timestamp",
             "remarks",
+            "currency",
+            "counter_amount",
+            "counter_currency",
+            "fx_rate",
         )
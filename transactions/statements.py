@@ -0,0 +1,431 @@
+"""
+Monthly wallet statements.
+
+generate_statement() writes one user's statement for one month:
+opening balance, every transaction of the month in order with a running
+balance, and the closing balance, as CSV and optionally as PDF. The
+result is recorded as a Statement row.
+
+The opening balance is the closing balance of the previous month's
+statement when there is one. Otherwise it is worked out from the
+current wallet balance minus everything that moved since the start of
+the month (ledger tables, archive files and journal entries not yet
+materialized), read in one snapshot.
+
+Statements cover the DEFAULT_CURRENCY wallet: the sides of
+cross-currency transfers in other currencies are left out.
+
+Transactions are read per table (see transactions/partitions.py) with
+the (sender, timestamp) and (receiver, timestamp) indexes and streamed
+with iterator(), so memory use does not grow with the statement size.
+"""
+
+import csv
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from wallet.models import Wallet
+
+from .archive import iter_archive
+from .models import LedgerJournal, Statement, TransactionPartition
+from .partitions import month_bounds, next_month, transaction_querysets
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+CSV_HEADER = (
+    "date",
+    "type",
+    "counterparty",
+    "remarks",
+    "debit",
+    "credit",
+    "balance",
+)
+
+
+def _credit_q(user_id):
+    return Q(transaction_type="CREDIT", receiver_id=user_id) | Q(
+        transaction_type="TRANSFER", receiver_id=user_id
+    )
+
+
+def _debit_q(user_id):
+    return Q(transaction_type="DEBIT", sender_id=user_id) | Q(
+        transaction_type="TRANSFER", sender_id=user_id
+    )
+
+
+def _default_currency_q():
+    return Q(currency__isnull=True) | Q(currency=settings.DEFAULT_CURRENCY)
+
+
+def _in_default_currency(row):
+    return row.get("currency", settings.DEFAULT_CURRENCY) == settings.DEFAULT_CURRENCY
+
+
+def signed_amount(transaction_type, sender_id, receiver_id, amount, user_id):
+    """
+    Return how a ledger row changes the user's balance.
+    A transfer is logged as a DEBIT row for the sender and a CREDIT row
+    for the receiver, each with both users set.
+    """
+    if transaction_type in ("CREDIT", "TRANSFER") and receiver_id == user_id:
+        return amount
+    if transaction_type in ("DEBIT", "TRANSFER") and sender_id == user_id:
+        return -amount
+    return ZERO
+
+
+def _archived_months(start_month, end_month=None):
+    partitions = TransactionPartition.objects.filter(
+        state="ARCHIVED", month__gte=start_month
+    )
+    if end_month:
+        partitions = partitions.filter(month__lt=end_month)
+    return partitions.order_by("month")
+
+
+def net_movement_since(user_id, month):
+    """
+    Sum of every balance change of the user from the start of the month
+    until now.
+    """
+    start, _end = month_bounds(month)
+    total = ZERO
+
+    for qs in transaction_querysets(start_date=month):
+        sums = qs.filter(_default_currency_q(), timestamp__gte=start).aggregate(
+            credits=Sum("amount", filter=_credit_q(user_id)),
+            debits=Sum("amount", filter=_debit_q(user_id)),
+        )
+        total += (sums["credits"] or ZERO) - (sums["debits"] or ZERO)
+
+    for partition in _archived_months(month):
+        for row in iter_archive(partition.archive_path):
+            if not _in_default_currency(row):
+                continue
+            total += signed_amount(
+                row["transaction_type"],
+                row["sender_id"],
+                row["receiver_id"],
+                row["amount"],
+                user_id,
+            )
+
+    # Journal entries that are not Transaction rows yet (journal mode)
+    entries = LedgerJournal.objects.filter(
+        Q(sender_id=user_id) | Q(receiver_id=user_id), created_at__gte=start
+    ).values_list("entry_type", "sender_id", "receiver_id", "amount")
+    for entry_type, sender_id, receiver_id, amount in entries:
+        total += signed_amount(entry_type, sender_id, receiver_id, amount, user_id)
+
+    # SQLite sums come back with extra decimal places
+    return total.quantize(CENT)
+
+
+@contextmanager
+def _snapshot():
+    """
+    A transaction in which every query sees the same data.
+    """
+    outermost = not connection.in_atomic_block
+    with db_transaction.atomic():
+        if outermost and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
+
+
+def opening_balance(user, month):
+    """
+    Balance of the user's wallet at the start of the month.
+    """
+    previous = (
+        Statement.objects.filter(user=user, month__lt=month)
+        .order_by("-month")
+        .values_list("month", "closing_balance")
+        .first()
+    )
+    if previous and next_month(previous[0]) == month:
+        return previous[1]
+
+    with _snapshot():
+        balance = (
+            Wallet.objects.filter(user=user, currency=settings.DEFAULT_CURRENCY)
+            .values_list("balance", flat=True)
+            .first()
+        )
+        return (balance or ZERO) - net_movement_since(user.id, month)
+
+
+def statement_rows(user_id, month):
+    """
+    Yield (timestamp, type, counterparty, remarks, amount) for every
+    transaction of the user in the month, oldest first. amount is
+    positive for money in and negative for money out.
+    """
+    start, end = month_bounds(month)
+
+    for partition in _archived_months(month, next_month(month)):
+        for row in iter_archive(partition.archive_path):
+            if not _in_default_currency(row):
+                continue
+            amount = signed_amount(
+                row["transaction_type"],
+                row["sender_id"],
+                row["receiver_id"],
+                row["amount"],
+                user_id,
+            )
+            if amount:
+                counterparty = (row["sender"] if amount > 0 else row["receiver"]) or ""
+                yield (
+                    row["timestamp"],
+                    row["transaction_type"],
+                    counterparty,
+                    row["remarks"],
+                    amount,
+                )
+
+    for qs in transaction_querysets(month, next_month(month) - timedelta(days=1)):
+        rows = (
+            qs.filter(_credit_q(user_id) | _debit_q(user_id))
+            .filter(_default_currency_q(), timestamp__gte=start, timestamp__lt=end)
+            .order_by("timestamp", "id")
+            .values_list(
+                "timestamp",
+                "transaction_type",
+                "sender_id",
+                "receiver_id",
+                "sender__username",
+                "receiver__username",
+                "amount",
+                "remarks",
+            )
+        )
+        for (
+            timestamp,
+            tx_type,
+            sender_id,
+            receiver_id,
+            sender_name,
+            receiver_name,
+            amount,
+            remarks,
+        ) in rows.iterator(chunk_size=2000):
+            amount = signed_amount(tx_type, sender_id, receiver_id, amount, user_id)
+            counterparty = (sender_name if amount > 0 else receiver_name) or ""
+            yield timestamp, tx_type, counterparty, remarks, amount
+
+
+def statement_path(user, month, extension):
+    return os.path.join(
+        str(settings.STATEMENT_DIR),
+        f"{month:%Y-%m}",
+        f"statement-{user.id}-{month:%Y-%m}.{extension}",
+    )
+
+
+def generate_statement(user, month, formats=("csv",)):
+    """
+    Write the user's statement for the month in the given formats
+    ("csv", "pdf") and record it. Returns the Statement.
+    """
+    opening = opening_balance(user, month)
+
+    writers = []
+    paths = {}
+    for extension in formats:
+        path = statement_path(user, month, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        paths[extension] = path
+        if extension == "csv":
+            writers.append(_CSVStatement(path + ".tmp"))
+        else:
+            writers.append(_PDFStatement(path + ".tmp"))
+
+    title = f"Statement {month:%B %Y} - {user.username}"
+    for writer in writers:
+        writer.begin(title, opening)
+
+    balance = opening
+    count = 0
+    for timestamp, tx_type, counterparty, remarks, amount in statement_rows(
+        user.id, month
+    ):
+        balance += amount
+        count += 1
+        row = (
+            timezone.localtime(timestamp).strftime("%Y-%m-%d %H:%M"),
+            tx_type,
+            counterparty,
+            remarks,
+            str(-amount) if amount < 0 else "",
+            str(amount) if amount > 0 else "",
+            str(balance),
+        )
+        for writer in writers:
+            writer.row(row)
+
+    for writer in writers:
+        writer.end(balance, count)
+    for path in paths.values():
+        os.replace(path + ".tmp", path)
+
+    statement, _created = Statement.objects.update_or_create(
+        user=user,
+        month=month,
+        defaults={
+            "opening_balance": opening,
+            "closing_balance": balance,
+            "transaction_count": count,
+            "csv_path": paths.get("csv", ""),
+            "pdf_path": paths.get("pdf", ""),
+        },
+    )
+    return statement
+
+
+class _CSVStatement:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+
+    def begin(self, title, opening):
+        self.writer.writerow(CSV_HEADER)
+        self.writer.writerow(("", "OPENING", "", "", "", "", str(opening)))
+
+    def row(self, row):
+        self.writer.writerow(row)
+
+    def end(self, closing, count):
+        self.writer.writerow(("", "CLOSING", "", "", "", "", str(closing)))
+        self.file.close()
+
+
+class _PDFStatement:
+    """
+    Plain text statement as a PDF, written page by page.
+    """
+
+    LINES_PER_PAGE = 60
+    COLUMNS = ((16, "date"), (9, "type"), (16, "counterparty"), (20, "remarks"))
+
+    def __init__(self, path):
+        self.pdf = SimplePDF(path)
+        self.lines = []
+        self.page_header = []
+
+    def begin(self, title, opening):
+        self.page_header = [title, ""]
+        self.lines = self.page_header + [
+            f"Opening balance: {opening}",
+            "",
+            self._format(CSV_HEADER),
+            "-" * 110,
+        ]
+
+    def _format(self, row):
+        text = " ".join(
+            str(value)[:width].ljust(width)
+            for (width, _name), value in zip(self.COLUMNS, row)
+        )
+        amounts = " ".join(str(value).rjust(13) for value in row[4:])
+        return f"{text} {amounts}"
+
+    def row(self, row):
+        if len(self.lines) >= self.LINES_PER_PAGE:
+            self.pdf.add_page(self.lines)
+            self.lines = list(self.page_header)
+        self.lines.append(self._format(row))
+
+    def end(self, closing, count):
+        self.lines += ["", f"Closing balance: {closing}", f"Transactions: {count}"]
+        self.pdf.add_page(self.lines)
+        self.pdf.close()
+
+
+class SimplePDF:
+    """
+    Minimal PDF writer: pages of monospaced text lines.
+    Pages are written to the file as they are added; the page tree and
+    cross-reference table are written by close().
+    """
+
+    FONT_SIZE = 8
+    LEADING = 12
+    PAGE_WIDTH = 842  # A4 landscape
+    PAGE_HEIGHT = 595
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.offsets = {}
+        self.page_ids = []
+        # 1: catalog, 2: page tree, 3: font
+        self.next_id = 4
+        self.file.write(b"%PDF-1.4\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    @staticmethod
+    def _escape(line):
+        line = line.encode("latin-1", "replace")
+        return line.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def add_page(self, lines):
+        text = [
+            b"BT /F1 %d Tf %d TL 36 %d Td"
+            % (self.FONT_SIZE, self.LEADING, self.PAGE_HEIGHT - 40)
+        ]
+        text += [b"(%s) '" % self._escape(line) for line in lines]
+        text.append(b"ET")
+        stream = b"\n".join(text)
+
+        content_id = self._new_id()
+        self._object(
+            content_id,
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        )
+        page_id = self._new_id()
+        self._object(
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (self.PAGE_WIDTH, self.PAGE_HEIGHT, content_id),
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(
+            2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids))
+        )
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.file.tell()
+        self.file.write(b"xref\n0 %d\n" % self.next_id)
+        self.file.write(b"0000000000 65535 f \n")
+        for object_id in range(1, self.next_id):
+            self.file.write(b"%010d 00000 n \n" % self.offsets[object_id])
+        self.file.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n"
+            % (self.next_id, xref_offset)
+        )
+        self.file.close()
@@ -1,3 +1,54 @@
-from django.test import TestCase
+from datetime import date, datetime
+from decimal import Decimal
+from importlib import import_module
 
-# Create your tests here.
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from .partitions import partition_model
+
+
+class PartitionMigrationTests(TransactionTestCase):
+    """
+    Upgrade a database whose monthly partitions were created before the
+    money storage (0006) and currency (0007) migrations.
+    """
+
+    migrate_from = [("transactions", "0005_search_index")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+
+        # The partition table as partition_transactions made it then
+        old_model = import_module(
+            "transactions.migrations.0006_money_fields"
+        ).partition_model(apps, date(2026, 4, 1))
+        with connection.schema_editor() as editor:
+            editor.create_model(old_model)
+        old_model.objects.create(
+            amount=Decimal("12.34"),
+            transaction_type="CREDIT",
+            remarks="April",
+            timestamp=timezone.make_aware(datetime(2026, 4, 15)),
+        )
+        apps.get_model("transactions", "TransactionPartition").objects.create(
+            month=date(2026, 4, 1), table_name=old_model._meta.db_table, row_count=1
+        )
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migrate_adds_currency_columns_to_partitions(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+        row = partition_model(date(2026, 4, 1)).objects.get()
+        self.assertEqual(row.amount, Decimal("12.34"))
+        self.assertEqual(row.remarks, "April")
+        self.assertIsNone(row.currency)
+        self.assertIsNone(row.counter_amount)
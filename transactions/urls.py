@@ -2,13 +2,20 @@
 URL routes for transaction-related admin operations.
 Includes:
 - admin list of all transactions
+- admin CSV export
 """
 
 from django.urls import path
 
-from .views import TransactionListAdminView
+from .views import TransactionExportAdminView, TransactionListAdminView
 
 urlpatterns = [
     # Admin endpoint to view all transactions with filters
     path("admin-list/", TransactionListAdminView.as_view(), name="admin-transactions"),
+    # Admin CSV export, including archived months
+    path(
+        "admin-export/",
+        TransactionExportAdminView.as_view(),
+        name="admin-transactions-export",
+    ),
 ]
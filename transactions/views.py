@@ -1,5 +1,5 @@
 """
-This file contains the admin view for listing all transactions.
+This file contains the admin views for transactions.
 Admin can filter results using:
 - date range
 - transaction type
@@ -7,43 +7,35 @@ Admin can filter results using:
 - receiver phone
 - amount range
 - search and ordering
+
+Transactions are read from the Transaction table and from the monthly
+partitions that overlap the date range. Search terms are looked up in
+the search index (transactions/search.py) instead of scanning remarks
+and usernames. The export also reads archived
+months from their files.
 """
 
-from datetime import datetime
+import csv
+from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
 
-from rest_framework import filters, generics, permissions
+from django.http import StreamingHttpResponse
+from rest_framework import filters, generics, permissions, views
 
-from transactions.models import Transaction
+from lokanetra.routers import ReplicaReadMixin, read_from_replica
+from transactions import search as search_index
+from transactions.archive import iter_archive
+from transactions.models import Transaction, TransactionPartition
+from transactions.partitions import combine, start_of_day, transaction_querysets
 from transactions.serializers import TransactionSerializer
+from users.models import UserProfile
 
 
-class TransactionListAdminView(generics.ListAPIView):
+class TransactionFilterMixin:
     """
-    Admin-only API to view all transactions.
-    Supports filters such as:
-    - start_date, end_date
-    - transaction type
-    - sender/receiver phone number
-    - min_amount, max_amount
-    Also supports search and ordering.
+    Parses the filter query parameters shared by the list and export views.
     """
 
-    permission_classes = [permissions.IsAdminUser]
-    serializer_class = TransactionSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-
-    # Search by username, transaction type, remarks
-    search_fields = [
-        "sender__username",
-        "receiver__username",
-        "transaction_type",
-        "remarks",
-    ]
-
-    # Allow ordering by timestamp or amount
-    ordering_fields = ["timestamp", "amount"]
-
     def _parse_date(self, value):
         """
         Convert a string (YYYY-MM-DD) into a date object.
@@ -68,56 +60,257 @@ class TransactionListAdminView(generics.ListAPIView):
         except (InvalidOperation, ValueError, TypeError):
             return None
 
+    def get_filters(self):
+        """
+        Return all filter values from the query string as a dict.
+        """
+        params = self.request.query_params
+        tx_type = params.get("type")
+        sender_phone = params.get("sender_phone")
+        receiver_phone = params.get("receiver_phone")
+        return {
+            "start_date": self._parse_date(params.get("start_date")),
+            "end_date": self._parse_date(params.get("end_date")),
+            "type": tx_type.strip().upper() if tx_type else None,
+            "sender_phone": sender_phone.strip() if sender_phone else None,
+            "receiver_phone": receiver_phone.strip() if receiver_phone else None,
+            "min_amount": self._parse_decimal(params.get("min_amount")),
+            "max_amount": self._parse_decimal(params.get("max_amount")),
+        }
+
+    def apply_filters(self, qs, f):
+        """
+        Apply the filters to one table's queryset.
+        """
+        # --- DATE RANGE FILTER ---
+        # Compare timestamps directly so the timestamp index is used
+        if f["start_date"]:
+            qs = qs.filter(timestamp__gte=start_of_day(f["start_date"]))
+        if f["end_date"]:
+            qs = qs.filter(
+                timestamp__lt=start_of_day(f["end_date"] + timedelta(days=1))
+            )
+
+        # --- TRANSACTION TYPE FILTER ---
+        if f["type"]:
+            qs = qs.filter(transaction_type=f["type"])
+
+        # --- SENDER PHONE FILTER ---
+        if f["sender_phone"]:
+            qs = qs.filter(sender__userprofile__phone_number=f["sender_phone"])
+
+        # --- RECEIVER PHONE FILTER ---
+        if f["receiver_phone"]:
+            qs = qs.filter(receiver__userprofile__phone_number=f["receiver_phone"])
+
+        # --- AMOUNT RANGE FILTER ---
+        if f["min_amount"] is not None:
+            qs = qs.filter(amount__gte=f["min_amount"])
+        if f["max_amount"] is not None:
+            qs = qs.filter(amount__lte=f["max_amount"])
+
+        return qs
+
+
+class TransactionListAdminView(
+    ReplicaReadMixin, TransactionFilterMixin, generics.ListAPIView
+):
+    """
+    Admin-only API to view all transactions.
+    Reads from the replica when one is configured.
+    Supports filters such as:
+    - start_date, end_date
+    - transaction type
+    - sender/receiver phone number
+    - min_amount, max_amount
+    Also supports search (through the search index) and ordering.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = TransactionSerializer
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+
+    # Search by username, transaction type, remarks
+    search_fields = [
+        "sender__username",
+        "receiver__username",
+        "transaction_type",
+        "remarks",
+    ]
+
+    # Allow ordering by timestamp or amount
+    ordering_fields = ["timestamp", "amount"]
+
     def get_queryset(self):
         """
         Apply all filters and return the transaction list.
+        Filters and search run on every table that overlaps the date
+        range; the results are combined with UNION ALL.
         If any unexpected error happens, return an empty list.
         """
         try:
-            qs = Transaction.objects.all()
-
-            # --- DATE RANGE FILTER ---
-            start_date = self._parse_date(self.request.query_params.get("start_date"))
-            end_date = self._parse_date(self.request.query_params.get("end_date"))
-
-            if start_date:
-                qs = qs.filter(timestamp__date__gte=start_date)
-            if end_date:
-                qs = qs.filter(timestamp__date__lte=end_date)
-
-            # --- TRANSACTION TYPE FILTER ---
-            tx_type = self.request.query_params.get("type")
-            if tx_type:
-                qs = qs.filter(transaction_type=tx_type.strip().upper())
-
-            # --- SENDER PHONE FILTER ---
-            sender_phone = self.request.query_params.get("sender_phone")
-            if sender_phone:
-                qs = qs.filter(sender__userprofile__phone_number=sender_phone.strip())
-
-            # --- RECEIVER PHONE FILTER ---
-            receiver_phone = self.request.query_params.get("receiver_phone")
-            if receiver_phone:
-                qs = qs.filter(
-                    receiver__userprofile__phone_number=receiver_phone.strip()
-                )
-
-            # --- AMOUNT RANGE FILTER ---
-            min_amount = self._parse_decimal(
-                self.request.query_params.get("min_amount")
-            )
-            max_amount = self._parse_decimal(
-                self.request.query_params.get("max_amount")
-            )
-
-            if min_amount is not None:
-                qs = qs.filter(amount__gte=min_amount)
-            if max_amount is not None:
-                qs = qs.filter(amount__lte=max_amount)
+            f = self.get_filters()
+            querysets = [
+                self.search(self.apply_filters(qs, f))
+                for qs in transaction_querysets(f["start_date"], f["end_date"])
+            ]
 
             # Return newest transactions first
-            return qs.order_by("-timestamp")
+            return combine(querysets).order_by("-timestamp")
 
         except Exception:
             # Do not break the API — return empty results if something goes wrong
             return Transaction.objects.none()
+
+    def search(self, qs):
+        """
+        Apply the search to one table's queryset, through the search
+        index when it can answer it (see transactions/search.py).
+        """
+        backend = filters.SearchFilter()
+        terms = backend.get_search_terms(self.request)
+        if not terms:
+            return qs
+        if search_index.supported() and search_index.usable(terms):
+            return qs.filter(id__in=search_index.matching_ids(terms))
+        return backend.filter_queryset(self.request, qs, self)
+
+    def filter_queryset(self, queryset):
+        """
+        Only ordering is left to do here; search already ran on each table.
+        """
+        return filters.OrderingFilter().filter_queryset(self.request, queryset, self)
+
+
+class TransactionExportAdminView(TransactionFilterMixin, views.APIView):
+    """
+    Admin-only CSV export of transactions, oldest first.
+    Takes the same filters as the admin list (without search) and also
+    includes months that were moved to archive files.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    header = (
+        "id",
+        "timestamp",
+        "transaction_type",
+        "amount",
+        "sender",
+        "receiver",
+        "remarks",
+    )
+
+    def get(self, request):
+        f = self.get_filters()
+        response = StreamingHttpResponse(
+            self._stream(f), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = 'attachment; filename="transactions.csv"'
+        return response
+
+    def _stream(self, f):
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        writer.writerow(self.header)
+        yield buffer.pop()
+
+        # Runs after the view returned, so pick the database here
+        with read_from_replica():
+            for row in self._archived_rows(f):
+                writer.writerow(row)
+                yield buffer.pop()
+
+            for qs in transaction_querysets(f["start_date"], f["end_date"]):
+                qs = self.apply_filters(qs, f).select_related("sender", "receiver")
+                for tx in qs.order_by("timestamp", "id").iterator(chunk_size=2000):
+                    writer.writerow(
+                        (
+                            tx.id,
+                            tx.timestamp.isoformat(),
+                            tx.transaction_type,
+                            tx.amount,
+                            tx.sender.username if tx.sender else "",
+                            tx.receiver.username if tx.receiver else "",
+                            tx.remarks,
+                        )
+                    )
+                    yield buffer.pop()
+
+    def _archived_rows(self, f):
+        """
+        Yield CSV rows from archive files of months in the date range.
+        """
+        partitions = TransactionPartition.objects.filter(state="ARCHIVED")
+        if f["start_date"]:
+            partitions = partitions.filter(month__gte=f["start_date"].replace(day=1))
+        if f["end_date"]:
+            partitions = partitions.filter(month__lte=f["end_date"])
+
+        sender_id = self._user_id_for_phone(f["sender_phone"])
+        receiver_id = self._user_id_for_phone(f["receiver_phone"])
+        if sender_id is False or receiver_id is False:
+            return
+
+        for partition in partitions.order_by("month"):
+            for row in iter_archive(partition.archive_path):
+                if not _archived_row_matches(row, f, sender_id, receiver_id):
+                    continue
+                yield (
+                    row["id"],
+                    row["timestamp"].isoformat(),
+                    row["transaction_type"],
+                    row["amount"],
+                    row["sender"] or "",
+                    row["receiver"] or "",
+                    row["remarks"],
+                )
+
+    def _user_id_for_phone(self, phone):
+        """
+        Return the user id for a phone filter, None without a filter,
+        or False when no user has that phone.
+        """
+        if not phone:
+            return None
+        user_id = (
+            UserProfile.objects.filter(phone_number=phone)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        return user_id if user_id is not None else False
+
+
+def _archived_row_matches(row, f, sender_id, receiver_id):
+    day = row["timestamp"].date()
+    if f["start_date"] and day < f["start_date"]:
+        return False
+    if f["end_date"] and day > f["end_date"]:
+        return False
+    if f["type"] and row["transaction_type"] != f["type"]:
+        return False
+    if sender_id is not None and row["sender_id"] != sender_id:
+        return False
+    if receiver_id is not None and row["receiver_id"] != receiver_id:
+        return False
+    if f["min_amount"] is not None and row["amount"] < f["min_amount"]:
+        return False
+    if f["max_amount"] is not None and row["amount"] > f["max_amount"]:
+        return False
+    return True
+
+
+class _LineBuffer:
+    """
+    File-like object that keeps what csv.writer wrote until it is popped.
+    """
+
+    def __init__(self):
+        self.value = ""
+
+    def write(self, value):
+        self.value += value
+
+    def pop(self):
+        value, self.value = self.value, ""
+        return value
@@ -0,0 +1,112 @@
+"""
+Rate limits for the OTP endpoints.
+
+Each limit is a pair of counters in the Django cache (this window and the
+previous one), updated with the atomic cache.incr(). That works the same
+on one process (LocMem) and across workers (Redis), and a rejected
+request costs two cache calls and no database query.
+
+Rates are set in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], e.g. "3/min".
+"""
+
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from monitoring.metrics import OTP_THROTTLED
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """
+    Allows num_requests per duration with a sliding window.
+
+    The previous window's count is weighted by how much of it still
+    overlaps the sliding window, so a client cannot send a full burst at
+    the end of one window and another at the start of the next.
+    Rejected requests are counted too: a client that keeps retrying
+    stays blocked.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f"{self.key}:{window}"
+
+        # add() sets the expiry; incr() keeps it and is atomic
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(current_key, 1, self.duration * 2)
+            self.current = 1
+        self.previous = self.cache.get(f"{self.key}:{window - 1}", 0)
+
+        self.elapsed = (self.now % self.duration) / self.duration
+        if self.previous * (1 - self.elapsed) + self.current <= self.num_requests:
+            return True
+        return self.throttle_failure()
+
+    def throttle_failure(self):
+        OTP_THROTTLED.inc(scope=self.scope)
+        return False
+
+    def wait(self):
+        """
+        Seconds until the sliding window has room again.
+        """
+        if self.current >= self.num_requests or not self.previous:
+            return self.duration * (1 - self.elapsed)
+        needed = 1 - (self.num_requests - self.current) / self.previous
+        return max(needed - self.elapsed, 0) * self.duration
+
+
+class PhoneNumberThrottle(CounterRateThrottle):
+    """
+    Limits requests per phone number in the request body.
+    """
+
+    def get_cache_key(self, request, view):
+        phone = (
+            request.data.get("phone_number") if hasattr(request.data, "get") else None
+        )
+        if not phone:
+            # The serializer rejects the request anyway
+            return None
+        ident = hashlib.sha256(str(phone).strip().encode()).hexdigest()[:32]
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class ClientIPThrottle(CounterRateThrottle):
+    """
+    Limits requests per client IP (see NUM_PROXIES).
+    """
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class SendOTPPhoneThrottle(PhoneNumberThrottle):
+    scope = "otp_send_phone"
+
+
+class SendOTPIPThrottle(ClientIPThrottle):
+    scope = "otp_send_ip"
+
+
+class VerifyOTPPhoneThrottle(PhoneNumberThrottle):
+    scope = "otp_verify_phone"
+
+
+class VerifyOTPIPThrottle(ClientIPThrottle):
+    scope = "otp_verify_ip"
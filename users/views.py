@@ -9,18 +9,28 @@ It includes:
 
 import random
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction
-from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from lokanetra.docs import swagger_auto_schema
+from lokanetra.routers import ReplicaReadMixin, pin_to_primary
+from monitoring.metrics import OTP_SENT, OTP_VERIFICATIONS
+from sms.dispatch import enqueue
 from wallet.models import Wallet
 
 from .models import OTP, UserProfile
 from .serializers import SendOTPSerializer, UserSerializer, VerifyOTPSerializer
+from .throttling import (
+    SendOTPIPThrottle,
+    SendOTPPhoneThrottle,
+    VerifyOTPIPThrottle,
+    VerifyOTPPhoneThrottle,
+)
 
 
 def _generate_otp(length=6):
@@ -33,10 +43,14 @@ def _generate_otp(length=6):
 class SendOTPView(APIView):
     """
     Send OTP to a phone number.
-    For this test, OTP is returned in the response.
+    The SMS is queued and sent in the background (see sms/dispatch.py).
+    With OTP_RETURN_IN_RESPONSE (machine test), OTP is also returned
+    in the response.
+    Rate limited per phone number and per client IP.
     """
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [SendOTPIPThrottle, SendOTPPhoneThrottle]
 
     @swagger_auto_schema(
         request_body=SendOTPSerializer, responses={201: SendOTPSerializer()}
@@ -51,11 +65,17 @@ class SendOTPView(APIView):
         phone = serializer.validated_data["phone_number"]
         code = _generate_otp(4)
 
-        OTP.objects.create(phone_number=phone, code=code)
+        with transaction.atomic():
+            OTP.objects.create(phone_number=phone, code=code)
+            enqueue(
+                phone, f"Your Lokanetra login code is {code}. It expires in 5 minutes."
+            )
+        OTP_SENT.inc()
 
-        return Response(
-            {"phone_number": phone, "otp": code}, status=status.HTTP_201_CREATED
-        )
+        data = {"phone_number": phone}
+        if settings.OTP_RETURN_IN_RESPONSE:
+            data["otp"] = code
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
 class VerifyOTPView(APIView):
@@ -63,9 +83,12 @@ class VerifyOTPView(APIView):
     Verify the OTP entered by the user.
     If OTP is correct, return JWT tokens.
     If user is new, create user and wallet.
+    Rate limited per phone number and per client IP, so codes cannot be
+    guessed by brute force.
     """
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [VerifyOTPIPThrottle, VerifyOTPPhoneThrottle]
 
     @swagger_auto_schema(request_body=VerifyOTPSerializer, responses={200: "token"})
     def post(self, request):
@@ -84,12 +107,14 @@ class VerifyOTPView(APIView):
                 phone_number=phone, code=code, is_used=False
             ).latest("created_at")
         except OTP.DoesNotExist:
+            OTP_VERIFICATIONS.inc(result="invalid")
             return Response(
                 {"detail": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST
             )
 
         # Check expiry
         if otp_obj.is_expired():
+            OTP_VERIFICATIONS.inc(result="expired")
             return Response(
                 {"detail": "OTP expired"}, status=status.HTTP_400_BAD_REQUEST
             )
@@ -103,7 +128,8 @@ class VerifyOTPView(APIView):
                 "user"
             )
 
-            if profile_qs.exists():
+            created = not profile_qs.exists()
+            if not created:
                 user = profile_qs.first().user
             else:
                 username = f"user_{phone}"
@@ -111,6 +137,12 @@ class VerifyOTPView(APIView):
                 UserProfile.objects.filter(user=user).update(phone_number=phone)
                 Wallet.objects.create(user=user)
 
+        # A new wallet may not be on the replica yet
+        if created:
+            pin_to_primary(user.id)
+
+        OTP_VERIFICATIONS.inc(result="success")
+
         # Create JWT tokens
         refresh = RefreshToken.for_user(user)
 
@@ -127,9 +159,10 @@ class VerifyOTPView(APIView):
         )
 
 
-class UserListAdminView(generics.ListAPIView):
+class UserListAdminView(ReplicaReadMixin, generics.ListAPIView):
     """
     Admin endpoint to list all users.
+    Reads from the replica when one is configured.
     """
 
     permission_classes = [permissions.IsAdminUser]
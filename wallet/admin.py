@@ -1,9 +1,77 @@
 from django.contrib import admin
+from django.contrib.auth.models import User
 
-from .models import Wallet
+from lokanetra.admin_tools import LargeTableAdmin
+from users.models import UserProfile
+
+from . import fx
+from .models import FxRate, ScheduledTransfer, Wallet
 
 
 @admin.register(Wallet)
-class WalletAdmin(admin.ModelAdmin):
-    list_display = ("user", "balance")
+class WalletAdmin(LargeTableAdmin):
+    list_display = ("user", "currency", "balance", "daily_limit", "monthly_limit")
+    list_select_related = ("user",)
+    readonly_fields = ("spent_today", "spent_day", "spent_this_month", "spent_month")
+    raw_id_fields = ("user",)
     search_fields = ("user__username",)
+    search_help_text = "Exact username or phone number."
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Look the user up by the unique username or phone number instead
+        of a LIKE over every wallet's user.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        user_ids = list(User.objects.filter(username=term).values_list("id", flat=True))
+        user_ids += UserProfile.objects.filter(phone_number=term).values_list(
+            "user_id", flat=True
+        )
+        return queryset.filter(user_id__in=user_ids), False
+
+
+@admin.register(ScheduledTransfer)
+class ScheduledTransferAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "sender",
+        "receiver",
+        "amount",
+        "interval",
+        "next_run_at",
+        "runs",
+        "status",
+    )
+    list_filter = ("status", "interval")
+    search_fields = ("sender__username", "receiver__username")
+    raw_id_fields = ("sender", "receiver")
+
+
+@admin.register(FxRate)
+class FxRateAdmin(admin.ModelAdmin):
+    list_display = ("base", "quote", "rate", "version", "updated_at")
+    readonly_fields = ("version", "updated_at")
+
+    def get_readonly_fields(self, request, obj=None):
+        # A different pair is a new rate
+        if obj is not None:
+            return ("base", "quote") + self.readonly_fields
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        """
+        Save through set_rate(), so the version goes up and the rate
+        caches reload.
+        """
+        fx.set_rate(obj.base, obj.quote, obj.rate)
+        saved = FxRate.objects.get(base=obj.base, quote=obj.quote)
+        obj.pk, obj.version = saved.pk, saved.version
+
+    def delete_model(self, request, obj):
+        fx.delete_rate(obj.base, obj.quote)
+
+    def delete_queryset(self, request, queryset):
+        for base, quote in queryset.values_list("base", "quote"):
+            fx.delete_rate(base, quote)
@@ -0,0 +1,158 @@
+"""
+Exchange rates for cross-currency transfers.
+
+Rates live in the FxRate table and are read through `rates`, an
+in-process cache: transfers look rates up in memory. At most every
+FX_RATE_CHECK_INTERVAL seconds the cache reads the highest FxRate
+version (one small query) and reloads the table only when it changed.
+set_rate() and delete_rate() raise the version, so every process picks
+the change up within the interval.
+
+A pair without a rate of its own is derived from its inverse or through
+DEFAULT_CURRENCY, e.g. EUR/USD from EUR/INR and USD/INR.
+"""
+
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Max
+
+from lokanetra.money import CENT
+
+from .models import FxRate
+
+RATE_PLACES = Decimal("0.00000001")
+
+
+class UnknownRate(LookupError):
+    pass
+
+
+class RateCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates = {}
+        self._version = None
+        self._checked_at = None
+
+    def invalidate(self):
+        """
+        Check the version on the next lookup.
+        """
+        self._checked_at = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < settings.FX_RATE_CHECK_INTERVAL
+        ):
+            return
+        with self._lock:
+            if (
+                self._checked_at is not None
+                and now - self._checked_at < settings.FX_RATE_CHECK_INTERVAL
+            ):
+                return
+            version = FxRate.objects.aggregate(version=Max("version"))["version"]
+            if version != self._version:
+                self._rates = {
+                    (base, quote): rate
+                    for base, quote, rate in FxRate.objects.values_list(
+                        "base", "quote", "rate"
+                    )
+                }
+                self._version = version
+            self._checked_at = now
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._version
+
+    def all(self):
+        """
+        Return {(base, quote): rate} as stored.
+        """
+        self._refresh()
+        return dict(self._rates)
+
+    def rate(self, base, quote):
+        """
+        Return how many units of quote one unit of base buys.
+        Raises UnknownRate when the pair cannot be priced.
+        """
+        if base == quote:
+            return Decimal(1)
+        self._refresh()
+        rate = self._direct(base, quote)
+        if rate is None:
+            pivot = settings.DEFAULT_CURRENCY
+            to_pivot = self._direct(base, pivot)
+            from_pivot = self._direct(pivot, quote)
+            if to_pivot is None or from_pivot is None:
+                raise UnknownRate(f"No exchange rate for {base}/{quote}")
+            rate = to_pivot * from_pivot
+        return rate.quantize(RATE_PLACES, ROUND_HALF_UP)
+
+    def _direct(self, base, quote):
+        if base == quote:
+            return Decimal(1)
+        rate = self._rates.get((base, quote))
+        if rate is not None:
+            return rate
+        inverse = self._rates.get((quote, base))
+        if inverse:
+            return 1 / inverse
+        return None
+
+
+rates = RateCache()
+
+
+def convert(amount, rate):
+    """
+    Amount times rate, rounded to cents.
+    """
+    return (amount * rate).quantize(CENT, ROUND_HALF_UP)
+
+
+def _current_version():
+    # Lock the rows so two changes do not get the same version
+    return (
+        FxRate.objects.select_for_update()
+        .order_by("-version")
+        .values_list("version", flat=True)
+        .first()
+        or 0
+    )
+
+
+def set_rate(base, quote, rate):
+    """
+    Store a rate and raise the version so caches reload.
+    """
+    with db_transaction.atomic():
+        FxRate.objects.update_or_create(
+            base=base,
+            quote=quote,
+            defaults={"rate": rate, "version": _current_version() + 1},
+        )
+    rates.invalidate()
+
+
+def delete_rate(base, quote):
+    """
+    Delete a rate and raise the version of the newest remaining one, so
+    caches notice the deletion.
+    """
+    with db_transaction.atomic():
+        version = _current_version()
+        FxRate.objects.filter(base=base, quote=quote).delete()
+        newest = FxRate.objects.order_by("-version").first()
+        if newest is not None:
+            FxRate.objects.filter(pk=newest.pk).update(version=version + 1)
+    rates.invalidate()
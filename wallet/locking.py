@@ -0,0 +1,155 @@
+"""
+Wallet row locking shared by all money operations.
+
+- lock_wallets() locks any number of wallets in user id order, so two
+  operations touching the same wallets always queue up instead of
+  deadlocking. lock_currency_wallets() does the same for wallets picked
+  by (user id, currency), in (user id, currency) order.
+- retry_lock_conflicts() reruns a transaction that lost a lock race
+  (deadlock, serialization failure, NOWAIT refusal, SQLite "database is
+  locked") a few times with a random backoff before giving up.
+
+Lock waits go to wallet_lock_wait_seconds and retries to
+wallet_lock_retries_total on /metrics/.
+"""
+
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Q
+
+from monitoring.metrics import WALLET_LOCK_RETRIES, WALLET_LOCK_WAIT
+
+from .models import Wallet
+
+# PostgreSQL SQLSTATE codes: serialization_failure, deadlock_detected,
+# lock_not_available (NOWAIT)
+POSTGRES_CONFLICT_CODES = {"40001", "40P01", "55P03"}
+
+# MySQL error numbers: lock wait timeout, deadlock, NOWAIT
+MYSQL_CONFLICT_CODES = {1205, 1213, 3572}
+
+SQLITE_CONFLICT_MESSAGES = ("database is locked", "database table is locked")
+
+
+class LockConflict(Exception):
+    """
+    The wallets stayed locked by other transactions after all retries.
+    """
+
+
+def is_lock_conflict(exc):
+    """
+    Return True if a database error means "try again later" rather than
+    a real failure.
+    """
+    cause = exc.__cause__ or exc
+    code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+    if code in POSTGRES_CONFLICT_CODES:
+        return True
+    if cause.args and cause.args[0] in MYSQL_CONFLICT_CODES:
+        return True
+    message = str(cause).lower()
+    return any(text in message for text in SQLITE_CONFLICT_MESSAGES)
+
+
+def lock_wallets(user_ids, operation, nowait=None, skip_locked=False, currency=None):
+    """
+    Lock the wallets of the given users and return them as
+    {user_id: wallet}. Must run inside a transaction.
+
+    nowait fails at once with a lock conflict instead of waiting
+    (default: WALLET_LOCK_NOWAIT). skip_locked returns only the wallets
+    nobody else holds, so a missing entry can also mean "busy".
+    currency defaults to DEFAULT_CURRENCY.
+    """
+    wallets = Wallet.objects.filter(
+        user_id__in=set(user_ids), currency=currency or settings.DEFAULT_CURRENCY
+    )
+    return {
+        wallet.user_id: wallet
+        for wallet in _lock(wallets, operation, nowait, skip_locked)
+    }
+
+
+def lock_currency_wallets(keys, operation, nowait=None):
+    """
+    Lock the wallets for the given (user_id, currency) pairs and return
+    them as {(user_id, currency): wallet}.
+    """
+    condition = Q()
+    for user_id, currency in set(keys):
+        condition |= Q(user_id=user_id, currency=currency)
+    wallets = Wallet.objects.filter(condition)
+    return {
+        (wallet.user_id, wallet.currency): wallet
+        for wallet in _lock(wallets, operation, nowait)
+    }
+
+
+def _lock(wallets, operation, nowait=None, skip_locked=False):
+    if nowait is None:
+        nowait = settings.WALLET_LOCK_NOWAIT
+
+    features = connection.features
+    options = {}
+    if nowait and features.has_select_for_update_nowait:
+        options["nowait"] = True
+    elif skip_locked and features.has_select_for_update_skip_locked:
+        options["skip_locked"] = True
+
+    # order_by makes the database take the row locks in (user id,
+    # currency) order
+    wallets = wallets.select_for_update(**options).order_by("user_id", "currency")
+    with WALLET_LOCK_WAIT.time(operation=operation):
+        return list(wallets)
+
+
+def _backoff(attempt):
+    """
+    Full jitter: a random delay up to base * 2^attempt, capped.
+    """
+    ceiling = min(
+        settings.WALLET_LOCK_RETRY_MAX_DELAY,
+        settings.WALLET_LOCK_RETRY_BASE_DELAY * 2**attempt,
+    )
+    return random.uniform(0, ceiling)
+
+
+def retry_lock_conflicts(operation):
+    """
+    Decorator for a function that opens its own atomic block and locks
+    wallets. Lock conflicts roll the transaction back and the function
+    runs again, up to WALLET_LOCK_RETRIES extra times. Raises
+    LockConflict when all attempts fail.
+
+    Inside an outer transaction there is nothing safe to retry, so the
+    function runs once and the error goes to the caller.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if connection.in_atomic_block:
+                return func(*args, **kwargs)
+
+            attempt = 0
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except DatabaseError as exc:
+                    if not is_lock_conflict(exc):
+                        raise
+                    if attempt >= settings.WALLET_LOCK_RETRIES:
+                        raise LockConflict(str(exc)) from exc
+
+                WALLET_LOCK_RETRIES.inc(operation=operation)
+                time.sleep(_backoff(attempt))
+                attempt += 1
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,69 @@
+"""
+Convert the amount and balance columns to MONEY_STORAGE.
+
+Set MONEY_STORAGE, stop the web and worker processes, then run this.
+Every table with money columns is rewritten, including the monthly
+partition tables; tables already in that storage are skipped.
+
+Examples:
+    MONEY_STORAGE=minor python manage.py convert_money_storage
+    python manage.py convert_money_storage --to decimal   # undo, then unset MONEY_STORAGE
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from lokanetra.money import STORAGES, convert_table, money_fields
+from transactions import search
+from transactions.models import TransactionPartition
+from transactions.partitions import partition_model
+
+
+class Command(BaseCommand):
+    help = "Rewrite money columns as DECIMAL or as BIGINT minor units."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--to",
+            choices=STORAGES,
+            default=settings.MONEY_STORAGE,
+            help="Target storage (default: MONEY_STORAGE).",
+        )
+
+    def handle(self, *args, **options):
+        storage = options["to"]
+        if storage != settings.MONEY_STORAGE:
+            self.stderr.write(
+                f"MONEY_STORAGE is {settings.MONEY_STORAGE!r}: set it to "
+                f"{storage!r} before starting the app again."
+            )
+
+        models = [
+            model
+            for model in apps.get_models()
+            if model._meta.managed and money_fields(model)
+        ]
+        models += [
+            partition_model(month)
+            for month in TransactionPartition.objects.filter(
+                state="ACTIVE"
+            ).values_list("month", flat=True)
+        ]
+
+        try:
+            with connection.schema_editor() as editor:
+                for model in models:
+                    converted = convert_table(editor, model, storage)
+                    table = model._meta.db_table
+                    if converted:
+                        self.stdout.write(f"{table}: {', '.join(converted)}")
+                    else:
+                        self.stdout.write(f"{table}: already {storage}")
+                # Rebuilding a SQLite table drops its triggers
+                search.create_index(connection)
+        except NotImplementedError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f"Money columns are stored as {storage}"))
@@ -0,0 +1,44 @@
+"""
+Pay scheduled transfers that are due.
+
+Several executors can run at once; each batch locks its schedules with
+skip_locked so no schedule is paid twice.
+
+Examples:
+    python manage.py run_scheduled_transfers            # pay what is due and exit
+    python manage.py run_scheduled_transfers --loop     # keep running as a worker
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from wallet.scheduler import run_due
+
+
+class Command(BaseCommand):
+    help = "Execute due scheduled transfers in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.SCHEDULED_TRANSFER_BATCH_SIZE
+        )
+        parser.add_argument("--loop", action="store_true", help="Run forever.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.SCHEDULED_TRANSFER_INTERVAL,
+            help="Seconds to sleep when nothing is due (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            count = run_due(options["batch_size"])
+            if count:
+                self.stdout.write(f"Handled {count} scheduled transfers")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
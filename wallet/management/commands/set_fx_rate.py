@@ -0,0 +1,56 @@
+"""
+Set exchange rates for cross-currency transfers.
+
+Each rate is BASE/QUOTE=RATE: how many units of QUOTE one BASE buys.
+Running processes pick the new rates up within FX_RATE_CHECK_INTERVAL
+seconds.
+
+Examples:
+    python manage.py set_fx_rate USD/INR=83.12 EUR/INR=90.40
+    python manage.py set_fx_rate --list
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet import fx
+
+
+def parse_rate(text):
+    """
+    "USD/INR=83.12" -> ("USD", "INR", Decimal("83.12"))
+    """
+    try:
+        pair, rate = text.split("=")
+        base, quote = (code.strip().upper() for code in pair.split("/"))
+        rate = Decimal(rate)
+    except (ValueError, InvalidOperation):
+        raise CommandError(f"Invalid rate {text!r}, expected e.g. USD/INR=83.12")
+    for code in (base, quote):
+        if code not in settings.CURRENCIES:
+            raise CommandError(f"{code} is not in CURRENCIES")
+    if base == quote or rate <= 0:
+        raise CommandError(f"Invalid rate {text!r}")
+    return base, quote, rate
+
+
+class Command(BaseCommand):
+    help = "Set exchange rates, e.g. USD/INR=83.12."
+
+    def add_arguments(self, parser):
+        parser.add_argument("rates", nargs="*", help="BASE/QUOTE=RATE")
+        parser.add_argument(
+            "--list", action="store_true", help="Print the stored rates."
+        )
+
+    def handle(self, *args, **options):
+        for base, quote, rate in [parse_rate(text) for text in options["rates"]]:
+            fx.set_rate(base, quote, rate)
+            self.stdout.write(f"{base}/{quote} = {rate}")
+
+        if options["list"] or not options["rates"]:
+            for (base, quote), rate in sorted(fx.rates.all().items()):
+                self.stdout.write(f"{base}/{quote} {rate}")
+            self.stdout.write(f"version {fx.rates.version}")
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:59
+
+from decimal import Decimal
+
+from django.db import migrations
+
+import lokanetra.money
+from lokanetra.money import convert_table
+
+
+def convert(apps, schema_editor, storage=None):
+    """
+    Convert the money columns of existing tables to MONEY_STORAGE.
+    """
+    for name in ("Wallet", "ScheduledTransfer"):
+        convert_table(schema_editor, apps.get_model("wallet", name), storage)
+
+
+def convert_back(apps, schema_editor):
+    convert(apps, schema_editor, "decimal")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wallet", "0002_scheduled_transfers"),
+    ]
+
+    operations = [
+        # Only the field class changes; the columns are converted below
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="scheduledtransfer",
+                    name="amount",
+                    field=lokanetra.money.MoneyField(decimal_places=2, max_digits=12),
+                ),
+                migrations.AlterField(
+                    model_name="wallet",
+                    name="balance",
+                    field=lokanetra.money.MoneyField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(convert, convert_back),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:08
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+import lokanetra.money
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wallet", "0003_money_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallet",
+            name="daily_limit",
+            field=lokanetra.money.MoneyField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="monthly_limit",
+            field=lokanetra.money.MoneyField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="spent_day",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="spent_month",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="spent_this_month",
+            field=lokanetra.money.MoneyField(
+                decimal_places=2, default=Decimal("0.00"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="spent_today",
+            field=lokanetra.money.MoneyField(
+                decimal_places=2, default=Decimal("0.00"), editable=False, max_digits=12
+            ),
+        ),
+    ]
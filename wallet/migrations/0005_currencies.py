@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import lokanetra.money
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("wallet", "0004_spending_limits"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FxRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("base", models.CharField(max_length=3)),
+                ("quote", models.CharField(max_length=3)),
+                ("rate", models.DecimalField(decimal_places=8, max_digits=18)),
+                ("version", models.BigIntegerField(default=0, editable=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="currency",
+            field=models.CharField(
+                default=lokanetra.money.default_currency, max_length=3
+            ),
+        ),
+        migrations.AlterField(
+            model_name="wallet",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="wallet",
+            constraint=models.UniqueConstraint(
+                fields=("user", "currency"), name="wallet_user_currency_unique"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="fxrate",
+            constraint=models.UniqueConstraint(
+                fields=("base", "quote"), name="fx_rate_pair_unique"
+            ),
+        ),
+    ]
@@ -1,27 +1,160 @@
 """
-Wallet model stores the balance for each user.
-Every user has one wallet created during OTP verification.
+Wallet model stores the balance for each user and currency.
+Every user has a DEFAULT_CURRENCY wallet created during OTP
+verification and can open one wallet per other currency.
+The wallet row also counts the money spent today and this month, for the
+daily and monthly limits (see wallet/services.py).
+
+ScheduledTransfer is a standing order: the same transfer repeated every
+day, week or month (see wallet/scheduler.py).
+
+FxRate holds the exchange rates used by cross-currency transfers; they
+are read through the in-process cache in wallet/fx.py.
 """
 
 from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from lokanetra.money import MoneyField, default_currency
 
 
 class Wallet(models.Model):
     """
-    Represents a user's wallet.
+    Represents a user's wallet in one currency.
     Stores the total balance available for that user.
     """
 
-    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    balance = models.DecimalField(
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    currency = models.CharField(max_length=3, default=default_currency)
+    balance = MoneyField(
         max_digits=12,
         decimal_places=2,
         default=Decimal("0.00"),
     )
 
+    # Empty: use WALLET_DAILY_LIMIT / WALLET_MONTHLY_LIMIT
+    daily_limit = MoneyField(null=True, blank=True)
+    monthly_limit = MoneyField(null=True, blank=True)
+
+    # Debits and outgoing transfers on spent_day / in spent_month.
+    # They are reset by the first operation of a new day or month.
+    spent_today = MoneyField(default=Decimal("0.00"), editable=False)
+    spent_day = models.DateField(null=True, editable=False)
+    spent_this_month = MoneyField(default=Decimal("0.00"), editable=False)
+    spent_month = models.DateField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "currency"], name="wallet_user_currency_unique"
+            )
+        ]
+
     def __str__(self):
         """Return a readable wallet display with username and balance."""
-        return f"{self.user.username} wallet - {self.balance}"
+        return f"{self.user.username} wallet - {self.balance} {self.currency}"
+
+
+class ScheduledTransfer(models.Model):
+    """
+    A transfer from sender to receiver that repeats on a schedule.
+    Runs are counted from start_at, so monthly orders keep their day of
+    the month (clamped to the month's last day).
+    """
+
+    INTERVALS = (
+        ("DAILY", "Daily"),
+        ("WEEKLY", "Weekly"),
+        ("MONTHLY", "Monthly"),
+    )
+
+    STATUSES = (
+        ("ACTIVE", "Active"),
+        ("COMPLETED", "Completed"),  # max_runs reached
+        ("CANCELLED", "Cancelled"),
+    )
+
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="scheduled_transfers",
+    )
+
+    receiver = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    amount = MoneyField(max_digits=12, decimal_places=2)
+
+    remarks = models.TextField(blank=True)
+
+    interval = models.CharField(max_length=10, choices=INTERVALS)
+
+    start_at = models.DateTimeField(default=timezone.now)
+
+    next_run_at = models.DateTimeField()
+
+    max_runs = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Stop after this many runs (empty: no end)."
+    )
+
+    runs = models.PositiveIntegerField(
+        default=0, help_text="Scheduled dates passed, paid or skipped."
+    )
+
+    failures = models.PositiveIntegerField(
+        default=0, help_text="Failed attempts for the current run."
+    )
+
+    status = models.CharField(max_length=10, choices=STATUSES, default="ACTIVE")
+
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Executor query: active schedules that are due
+            models.Index(
+                fields=["status", "next_run_at"], name="scheduled_transfer_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        """Example: 'MONTHLY 500.00 user_1 -> user_2'"""
+        return f"{self.interval} {self.amount} {self.sender} -> {self.receiver}"
+
+
+class FxRate(models.Model):
+    """
+    How many units of quote one unit of base buys, e.g. USD/INR 83.12.
+    version grows with every change, so caches know when to reload.
+    """
+
+    base = models.CharField(max_length=3)
+
+    quote = models.CharField(max_length=3)
+
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    version = models.BigIntegerField(default=0, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["base", "quote"], name="fx_rate_pair_unique"
+            )
+        ]
+
+    def __str__(self):
+        """Example: 'USD/INR 83.12000000'"""
+        return f"{self.base}/{self.quote} {self.rate}"
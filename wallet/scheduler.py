@@ -0,0 +1,156 @@
+"""
+Executes scheduled (recurring) transfers.
+
+run_batch() takes a batch of due schedules, locks them with
+skip_locked so concurrent executors each get different schedules, and
+pays them all with services.apply_transfers: the same balance checks and
+ledger rows as WalletTransferView, with one lock round trip for all
+wallets in the batch. Schedules are then moved to their next date in
+the same database transaction, so a schedule is never paid twice for
+one date.
+
+A run that fails (e.g. insufficient funds) is retried after
+SCHEDULED_TRANSFER_RETRY_DELAY seconds, up to
+SCHEDULED_TRANSFER_MAX_FAILURES times, then skipped. Dates missed while
+no executor was running are skipped too: one payment, then the next
+future date.
+"""
+
+import calendar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from monitoring.metrics import SCHEDULED_TRANSFERS
+
+from . import services
+from .locking import retry_lock_conflicts
+from .models import ScheduledTransfer
+
+UPDATE_FIELDS = (
+    "next_run_at",
+    "runs",
+    "failures",
+    "status",
+    "last_run_at",
+    "last_error",
+)
+
+
+def add_months(value, months):
+    """
+    Move a datetime by whole months, keeping the day of the month where
+    possible (Jan 31 + 1 month = Feb 28/29).
+    """
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def run_date(schedule, run):
+    """
+    Return the date of the schedule's run number `run` (0 = start_at).
+    """
+    if schedule.interval == "DAILY":
+        return schedule.start_at + timedelta(days=run)
+    if schedule.interval == "WEEKLY":
+        return schedule.start_at + timedelta(weeks=run)
+    return add_months(schedule.start_at, run)
+
+
+def _advance(schedule, now):
+    """
+    Move to the first run date after now, or finish the schedule.
+    """
+    schedule.failures = 0
+    while True:
+        schedule.runs += 1
+        if schedule.max_runs is not None and schedule.runs >= schedule.max_runs:
+            schedule.status = "COMPLETED"
+            return
+        schedule.next_run_at = run_date(schedule, schedule.runs)
+        if schedule.next_run_at > now:
+            return
+
+
+def _paid(schedule, now):
+    schedule.last_run_at = now
+    schedule.last_error = ""
+    _advance(schedule, now)
+    SCHEDULED_TRANSFERS.inc(result="paid")
+
+
+def _failed(schedule, error, now):
+    schedule.failures += 1
+    schedule.last_error = str(error.detail)[:255]
+    if schedule.failures >= settings.SCHEDULED_TRANSFER_MAX_FAILURES:
+        _advance(schedule, now)
+        SCHEDULED_TRANSFERS.inc(result="skipped")
+    else:
+        schedule.next_run_at = now + timedelta(
+            seconds=settings.SCHEDULED_TRANSFER_RETRY_DELAY
+        )
+        SCHEDULED_TRANSFERS.inc(result="failed")
+
+
+@retry_lock_conflicts("scheduled_transfer")
+def run_batch(batch_size=None):
+    """
+    Pay up to batch_size due schedules. Returns the number handled.
+    """
+    batch_size = batch_size or settings.SCHEDULED_TRANSFER_BATCH_SIZE
+    now = timezone.now()
+
+    with db_transaction.atomic():
+        due = (
+            ScheduledTransfer.objects.filter(status="ACTIVE", next_run_at__lte=now)
+            .select_related("sender", "receiver")
+            .order_by("next_run_at", "id")
+        )
+        features = connection.features
+        if features.has_select_for_update_skip_locked:
+            # Other executors take the next schedules instead of waiting;
+            # only the schedule rows are locked, not the joined users
+            of = ("self",) if features.has_select_for_update_of else ()
+            due = due.select_for_update(skip_locked=True, of=of)
+        schedules = list(due[:batch_size])
+        if not schedules:
+            return 0
+
+        results = services.apply_transfers(
+            [
+                (
+                    schedule.sender,
+                    schedule.receiver,
+                    schedule.amount,
+                    schedule.remarks or f"Scheduled transfer #{schedule.id}",
+                )
+                for schedule in schedules
+            ]
+        )
+        for schedule, result in zip(schedules, results):
+            if isinstance(result, Exception):
+                _failed(schedule, result, now)
+            else:
+                _paid(schedule, now)
+
+        ScheduledTransfer.objects.bulk_update(schedules, UPDATE_FIELDS)
+
+    return len(schedules)
+
+
+def run_due(batch_size=None):
+    """
+    Run batches until nothing is due. Returns the count.
+    """
+    total = 0
+    while True:
+        count = run_batch(batch_size)
+        total += count
+        if count == 0:
+            return total
@@ -4,11 +4,19 @@ This file contains serializers for wallet operations:
 - crediting money
 - debiting money
 - transferring money to another user
+- split transfers (one sender, many receivers)
+- scheduled (recurring) transfers
+- wallets in other currencies
 """
 
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Wallet
+from .models import ScheduledTransfer, Wallet
 
 
 class WalletSerializer(serializers.ModelSerializer):
@@ -20,7 +28,7 @@ class WalletSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Wallet
-        fields = ("user", "balance")
+        fields = ("user", "currency", "balance")
 
 
 class CreditSerializer(serializers.Serializer):
@@ -42,12 +50,111 @@ class DebitSerializer(serializers.Serializer):
     amount = serializers.DecimalField(max_digits=12, decimal_places=2)
 
 
+def currency_field(**kwargs):
+    return serializers.ChoiceField(choices=settings.CURRENCIES, **kwargs)
+
+
 class TransferSerializer(serializers.Serializer):
     """
     Serializer for transferring money to another user.
     Requires receiver phone number, amount, and optional remarks.
+    currency is the sender's wallet and to_currency the receiver's
+    (both default to DEFAULT_CURRENCY).
+    """
+
+    to_phone_number = serializers.CharField(max_length=15)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    currency = currency_field(required=False)
+    to_currency = currency_field(required=False)
+
+
+class OpenWalletSerializer(serializers.Serializer):
+    """
+    Serializer for opening a wallet in another currency.
+    """
+
+    currency = currency_field()
+
+
+class SplitPaymentSerializer(serializers.Serializer):
+    """
+    One receiver of a split transfer.
     """
 
     to_phone_number = serializers.CharField(max_length=15)
     amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class SplitTransferSerializer(serializers.Serializer):
+    """
+    Serializer for paying many users at once (split bill).
+    Each phone number may appear only once.
+    """
+
+    MAX_PAYMENTS = 50
+
+    payments = SplitPaymentSerializer(
+        many=True, allow_empty=False, max_length=MAX_PAYMENTS
+    )
     remarks = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_payments(self, value):
+        phones = [payment["to_phone_number"] for payment in value]
+        if len(set(phones)) != len(phones):
+            raise serializers.ValidationError("Each phone number may appear once")
+        return value
+
+
+class ScheduledTransferSerializer(serializers.ModelSerializer):
+    """
+    Serializer for creating and showing scheduled transfers.
+    The receiver is given by phone number, like a normal transfer.
+    """
+
+    to_phone_number = serializers.CharField(max_length=15, write_only=True)
+    receiver = serializers.StringRelatedField(read_only=True)
+    amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+    class Meta:
+        model = ScheduledTransfer
+        fields = (
+            "id",
+            "to_phone_number",
+            "receiver",
+            "amount",
+            "remarks",
+            "interval",
+            "start_at",
+            "max_runs",
+            "next_run_at",
+            "runs",
+            "status",
+            "last_run_at",
+            "last_error",
+        )
+        read_only_fields = (
+            "next_run_at",
+            "runs",
+            "status",
+            "last_run_at",
+            "last_error",
+        )
+
+    def validate_to_phone_number(self, value):
+        """
+        Return the receiver user for the phone number.
+        """
+        try:
+            return User.objects.get(userprofile__phone_number=value)
+        except User.DoesNotExist:
+            raise serializers.ValidationError("Receiver not found")
+
+    def create(self, validated_data):
+        validated_data["receiver"] = validated_data.pop("to_phone_number")
+        start_at = validated_data.get("start_at") or timezone.now()
+        validated_data["start_at"] = start_at
+        validated_data["next_run_at"] = start_at
+        return super().create(validated_data)
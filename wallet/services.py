@@ -0,0 +1,609 @@
+"""
+Money operations shared by the wallet views and background workers.
+It includes:
+- credit, debit
+- transfer, and apply_transfers for many transfers under one lock
+- split_transfer: one sender paying many receivers, all or nothing
+- exchange_transfer: a transfer between wallets in different currencies
+- daily and monthly spending limits
+
+Every function runs in its own database transaction, updates balances,
+writes the ledger (see transactions/ledger.py), adds wallet events (see
+events/outbox.py) and records metrics.
+Money leaving a wallet is counted on the user's DEFAULT_CURRENCY wallet
+row (spent_today, spent_this_month) and saved with the new balance, so
+the limits need no query of their own. Limits are per user and in
+DEFAULT_CURRENCY: money leaving another currency wallet counts at its
+DEFAULT_CURRENCY value, and that operation also locks the user's
+DEFAULT_CURRENCY wallet.
+Wallets are locked through wallet/locking.py, so transactions that lose
+a lock race are retried. Failures are raised as WalletError, which DRF
+turns into a {"detail": ...} response.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from events.outbox import publish, publish_exchange, publish_transfers
+from monitoring.metrics import WALLET_OPERATION_AMOUNT, WALLET_OPERATION_FAILURES
+from transactions.ledger import (
+    record_credit,
+    record_debit,
+    record_exchange,
+    record_transfers,
+)
+from users.models import UserProfile
+
+from . import fx
+from .locking import (
+    LockConflict,
+    lock_currency_wallets,
+    lock_wallets,
+    retry_lock_conflicts,
+)
+from .models import Wallet
+
+
+class WalletError(APIException):
+    """
+    A wallet operation was rejected.
+    reason is the metrics label, e.g. "insufficient_funds".
+    """
+
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, detail, reason, status_code=None):
+        super().__init__(detail)
+        self.reason = reason
+        if status_code is not None:
+            self.status_code = status_code
+
+
+def _fail(operation, detail, reason, status_code=None):
+    WALLET_OPERATION_FAILURES.inc(operation=operation, reason=reason)
+    return WalletError(detail, reason, status_code)
+
+
+def check_amount(operation, amount):
+    if amount <= 0:
+        raise _fail(operation, "Amount must be positive", "invalid_amount")
+
+
+def find_receiver(phone_number):
+    """
+    Return the user registered with the phone number.
+    """
+    try:
+        return User.objects.get(userprofile__phone_number=phone_number)
+    except User.DoesNotExist:
+        raise _fail(
+            "transfer",
+            "Receiver not found",
+            "receiver_not_found",
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+def find_receivers(phone_numbers):
+    """
+    Return {phone_number: user} for all phone numbers, in one query.
+    """
+    profiles = UserProfile.objects.filter(
+        phone_number__in=phone_numbers
+    ).select_related("user")
+    receivers = {profile.phone_number: profile.user for profile in profiles}
+    missing = [phone for phone in phone_numbers if phone not in receivers]
+    if missing:
+        raise _fail(
+            "split_transfer",
+            f"Receiver not found: {', '.join(missing)}",
+            "receiver_not_found",
+            status.HTTP_404_NOT_FOUND,
+        )
+    return receivers
+
+
+# Saved with the balance by operations that take money out
+SPENDING_FIELDS = [
+    "balance",
+    "spent_today",
+    "spent_day",
+    "spent_this_month",
+    "spent_month",
+]
+
+
+def limits(wallet):
+    """
+    Return the wallet's (daily, monthly) limits; None means no limit.
+    """
+    daily = wallet.daily_limit
+    if daily is None:
+        daily = settings.WALLET_DAILY_LIMIT
+    monthly = wallet.monthly_limit
+    if monthly is None:
+        monthly = settings.WALLET_MONTHLY_LIMIT
+    return daily, monthly
+
+
+def current_spending(wallet, today=None):
+    """
+    Start new counters if the wallet last spent on an earlier day or
+    month. Returns (spent today, spent this month).
+    """
+    today = today or timezone.localdate()
+    if wallet.spent_day != today:
+        wallet.spent_day = today
+        wallet.spent_today = Decimal("0.00")
+    month = today.replace(day=1)
+    if wallet.spent_month != month:
+        wallet.spent_month = month
+        wallet.spent_this_month = Decimal("0.00")
+    return wallet.spent_today, wallet.spent_this_month
+
+
+def _limit_error(operation, wallet, amount, today):
+    """
+    Return the WalletError if spending amount passes a limit, else None.
+    """
+    spent_today, spent_this_month = current_spending(wallet, today)
+    daily, monthly = limits(wallet)
+    if daily is not None and spent_today + amount > daily:
+        return _fail(
+            operation,
+            f"Daily limit of {daily} reached ({spent_today} spent today)",
+            "daily_limit",
+        )
+    if monthly is not None and spent_this_month + amount > monthly:
+        return _fail(
+            operation,
+            f"Monthly limit of {monthly} reached "
+            f"({spent_this_month} spent this month)",
+            "monthly_limit",
+        )
+    return None
+
+
+def _spend(wallet, amount, counters=None, counted=None):
+    """
+    Take amount from the wallet's balance and count it as spent on
+    counters, the user's DEFAULT_CURRENCY wallet (default: wallet).
+    counted is the DEFAULT_CURRENCY value of amount (default: amount).
+    """
+    counters = wallet if counters is None else counters
+    counted = amount if counted is None else counted
+    wallet.balance -= amount
+    counters.spent_today += counted
+    counters.spent_this_month += counted
+
+
+def _lock_for_spending(operation, currency, user_ids, sender_ids):
+    """
+    Lock the users' wallets in currency and the senders' DEFAULT_CURRENCY
+    wallets, which hold the spending counters, with one ordered query.
+    Returns (wallets, counters), both {user_id: wallet}.
+    """
+    default = settings.DEFAULT_CURRENCY
+    if currency == default:
+        wallets = lock_wallets(user_ids, operation)
+        return wallets, wallets
+    locked = lock_currency_wallets(
+        {(user_id, currency) for user_id in user_ids}
+        | {(user_id, default) for user_id in sender_ids},
+        operation,
+    )
+    wallets = {user_id: w for (user_id, code), w in locked.items() if code == currency}
+    counters = {user_id: w for (user_id, code), w in locked.items() if code == default}
+    return wallets, counters
+
+
+def _busy(operation):
+    return _fail(
+        operation,
+        "Wallet is busy, please try again",
+        "lock_conflict",
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+def _lock_wallet(operation, user):
+    wallet = lock_wallets([user.id], operation).get(user.id)
+    if wallet is None:
+        raise _fail(
+            operation,
+            "Wallet not found",
+            "wallet_not_found",
+            status.HTTP_404_NOT_FOUND,
+        )
+    return wallet
+
+
+def credit(user, amount, remarks=""):
+    """
+    Add money to the user's wallet.
+    Returns the new balance and the ledger ids.
+    """
+    check_amount("credit", amount)
+    try:
+        return _credit(user, amount, remarks)
+    except LockConflict:
+        raise _busy("credit")
+
+
+@retry_lock_conflicts("credit")
+def _credit(user, amount, remarks):
+    with db_transaction.atomic():
+        wallet = _lock_wallet("credit", user)
+        wallet.balance += amount
+        wallet.save()
+
+        ledger_ids = record_credit(user, amount, remarks)
+        publish("CREDIT", None, user, amount, remarks)
+
+    WALLET_OPERATION_AMOUNT.observe(amount, operation="credit")
+    return {"balance": str(wallet.balance), **ledger_ids}
+
+
+def debit(user, amount, remarks=""):
+    """
+    Take money from the user's wallet if the balance allows it.
+    Returns the new balance and the ledger ids.
+    """
+    check_amount("debit", amount)
+    try:
+        return _debit(user, amount, remarks)
+    except LockConflict:
+        raise _busy("debit")
+
+
+@retry_lock_conflicts("debit")
+def _debit(user, amount, remarks):
+    with db_transaction.atomic():
+        wallet = _lock_wallet("debit", user)
+
+        if wallet.balance < amount:
+            raise _fail("debit", "Insufficient funds", "insufficient_funds")
+        error = _limit_error("debit", wallet, amount, timezone.localdate())
+        if error:
+            raise error
+
+        _spend(wallet, amount)
+        wallet.save(update_fields=SPENDING_FIELDS)
+
+        ledger_ids = record_debit(user, amount, remarks)
+        publish("DEBIT", user, None, amount, remarks)
+
+    WALLET_OPERATION_AMOUNT.observe(amount, operation="debit")
+    return {"balance": str(wallet.balance), **ledger_ids}
+
+
+def transfer(sender, receiver, amount, remarks="", currency=None):
+    """
+    Move money from sender to receiver, between their wallets in
+    currency (default: DEFAULT_CURRENCY).
+    Returns the transfer response fields.
+    """
+    check_amount("transfer", amount)
+
+    result = apply_transfers([(sender, receiver, amount, remarks)], currency)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def apply_transfers(transfers, currency=None):
+    """
+    Apply many transfers in one database transaction.
+
+    transfers is a list of (sender, receiver, amount, remarks) between
+    wallets in currency (default: DEFAULT_CURRENCY). All
+    wallets involved are locked once, in user id order, and the transfers
+    are applied one after another, so a sender can spend money received
+    earlier in the same batch. Returns one entry per transfer: the
+    response fields, or the WalletError that rejected it.
+    """
+    currency = currency or settings.DEFAULT_CURRENCY
+    try:
+        check_currency("transfer", currency)
+        # Spending is counted at the DEFAULT_CURRENCY value
+        rate = exchange_rate("transfer", currency, settings.DEFAULT_CURRENCY)
+    except WalletError as error:
+        return [error] * len(transfers)
+    try:
+        return _apply_transfers(transfers, currency, rate)
+    except LockConflict:
+        busy = _busy("transfer")
+        return [busy] * len(transfers)
+
+
+@retry_lock_conflicts("transfer")
+def _apply_transfers(transfers, currency, rate):
+    results = [None] * len(transfers)
+
+    with db_transaction.atomic():
+        wallets, counters = _lock_for_spending(
+            "transfer",
+            currency,
+            {
+                user.id
+                for sender, receiver, _a, _r in transfers
+                for user in (sender, receiver)
+            },
+            {sender.id for sender, _receiver, _a, _r in transfers},
+        )
+
+        today = timezone.localdate()
+        accepted = []
+        for index, (sender, receiver, amount, remarks) in enumerate(transfers):
+            sender_wallet = wallets.get(sender.id)
+            receiver_wallet = wallets.get(receiver.id)
+            sender_counters = counters.get(sender.id)
+
+            if (
+                sender_wallet is None
+                or receiver_wallet is None
+                or sender_counters is None
+            ):
+                results[index] = _fail(
+                    "transfer",
+                    "Wallet not found",
+                    "wallet_not_found",
+                    status.HTTP_404_NOT_FOUND,
+                )
+                continue
+
+            if sender_wallet.balance < amount:
+                results[index] = _fail(
+                    "transfer", "Insufficient funds", "insufficient_funds"
+                )
+                continue
+
+            counted = fx.convert(amount, rate)
+            error = _limit_error("transfer", sender_counters, counted, today)
+            if error:
+                results[index] = error
+                continue
+
+            # Update balances
+            _spend(sender_wallet, amount, sender_counters, counted)
+            receiver_wallet.balance += amount
+            accepted.append(index)
+            results[index] = {
+                "message": "Transfer successful",
+                "sender_balance": str(sender_wallet.balance),
+                "receiver_balance": str(receiver_wallet.balance),
+            }
+
+        if accepted:
+            locked = {wallet.pk: wallet for wallet in wallets.values()}
+            locked.update((wallet.pk, wallet) for wallet in counters.values())
+            Wallet.objects.bulk_update(list(locked.values()), SPENDING_FIELDS)
+
+            # Log transaction entries
+            ledger_ids = record_transfers([transfers[i] for i in accepted], currency)
+            publish_transfers([transfers[i] for i in accepted], currency)
+            for index, ids in zip(accepted, ledger_ids):
+                results[index] = {
+                    "message": results[index]["message"],
+                    **ids,
+                    "sender_balance": results[index]["sender_balance"],
+                    "receiver_balance": results[index]["receiver_balance"],
+                }
+
+    for index in accepted:
+        WALLET_OPERATION_AMOUNT.observe(
+            fx.convert(transfers[index][2], rate), operation="transfer"
+        )
+    return results
+
+
+def split_transfer(sender, payments, remarks=""):
+    """
+    Pay many receivers from one sender in one database transaction.
+    payments is a list of (receiver, amount). Either every payment is
+    made or none is. Returns the sender balance and one result per
+    payment, in the same order.
+    """
+    for receiver, amount in payments:
+        check_amount("split_transfer", amount)
+        if receiver.id == sender.id:
+            raise _fail("split_transfer", "Cannot pay yourself", "self_transfer")
+    try:
+        return _split_transfer(sender, payments, remarks)
+    except LockConflict:
+        raise _busy("split_transfer")
+
+
+@retry_lock_conflicts("split_transfer")
+def _split_transfer(sender, payments, remarks):
+    total = sum(amount for _receiver, amount in payments)
+
+    with db_transaction.atomic():
+        wallets = lock_wallets(
+            {sender.id} | {receiver.id for receiver, _amount in payments},
+            "split_transfer",
+        )
+        if any(
+            user.id not in wallets
+            for user in [sender] + [receiver for receiver, _a in payments]
+        ):
+            raise _fail(
+                "split_transfer",
+                "Wallet not found",
+                "wallet_not_found",
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        sender_wallet = wallets[sender.id]
+        if sender_wallet.balance < total:
+            raise _fail("split_transfer", "Insufficient funds", "insufficient_funds")
+        error = _limit_error(
+            "split_transfer", sender_wallet, total, timezone.localdate()
+        )
+        if error:
+            raise error
+
+        _spend(sender_wallet, total)
+        for receiver, amount in payments:
+            wallets[receiver.id].balance += amount
+        Wallet.objects.bulk_update(list(wallets.values()), SPENDING_FIELDS)
+
+        # One bulk insert for the ledger rows of every payment
+        rows = [(sender, receiver, amount, remarks) for receiver, amount in payments]
+        ledger_ids = record_transfers(rows)
+        publish_transfers(rows)
+
+    WALLET_OPERATION_AMOUNT.observe(total, operation="split_transfer")
+    return {
+        "message": "Split transfer successful",
+        "total": str(total),
+        "sender_balance": str(sender_wallet.balance),
+        "payments": [
+            {
+                "receiver": receiver.username,
+                "amount": str(amount),
+                **ids,
+                "receiver_balance": str(wallets[receiver.id].balance),
+            }
+            for (receiver, amount), ids in zip(payments, ledger_ids)
+        ],
+    }
+
+
+def check_currency(operation, currency):
+    if currency != settings.DEFAULT_CURRENCY and currency not in settings.CURRENCIES:
+        raise _fail(operation, f"Unsupported currency: {currency}", "invalid_currency")
+
+
+def exchange_rate(operation, base, quote):
+    """
+    Return the cached rate from base to quote.
+    """
+    try:
+        return fx.rates.rate(base, quote)
+    except fx.UnknownRate as exc:
+        raise _fail(operation, str(exc), "unknown_rate")
+
+
+def default_value(operation, amount, currency):
+    """
+    Return amount converted to DEFAULT_CURRENCY.
+    """
+    if currency == settings.DEFAULT_CURRENCY:
+        return amount
+    return fx.convert(
+        amount, exchange_rate(operation, currency, settings.DEFAULT_CURRENCY)
+    )
+
+
+def open_wallet(user, currency):
+    """
+    Create the user's wallet in another currency.
+    """
+    check_currency("open_wallet", currency)
+    try:
+        with db_transaction.atomic():
+            return Wallet.objects.create(user=user, currency=currency)
+    except IntegrityError:
+        raise _fail(
+            "open_wallet", f"You already have a {currency} wallet", "wallet_exists"
+        )
+
+
+def exchange_transfer(sender, receiver, amount, currency, to_currency, remarks=""):
+    """
+    Move money from the sender's wallet in currency to the receiver's
+    wallet in to_currency, at the cached exchange rate. The sender may
+    also be the receiver, to change money between their own wallets.
+    Returns the transfer response fields.
+    """
+    check_amount("transfer", amount)
+    for code in (currency, to_currency):
+        check_currency("transfer", code)
+    if currency == to_currency:
+        raise _fail(
+            "transfer", "Use a normal transfer for one currency", "invalid_currency"
+        )
+
+    rate = exchange_rate("transfer", currency, to_currency)
+    received = fx.convert(amount, rate)
+    if received <= 0:
+        raise _fail("transfer", "Amount is too small to exchange", "invalid_amount")
+    counted = default_value("transfer", amount, currency)
+    try:
+        return _exchange_transfer(
+            sender,
+            receiver,
+            amount,
+            currency,
+            to_currency,
+            rate,
+            received,
+            counted,
+            remarks,
+        )
+    except LockConflict:
+        raise _busy("transfer")
+
+
+@retry_lock_conflicts("transfer")
+def _exchange_transfer(
+    sender, receiver, amount, currency, to_currency, rate, received, counted, remarks
+):
+    default = settings.DEFAULT_CURRENCY
+    with db_transaction.atomic():
+        # The sender's DEFAULT_CURRENCY wallet holds the spending counters
+        wallets = lock_currency_wallets(
+            [(sender.id, currency), (receiver.id, to_currency), (sender.id, default)],
+            "transfer",
+        )
+        sender_wallet = wallets.get((sender.id, currency))
+        receiver_wallet = wallets.get((receiver.id, to_currency))
+        sender_counters = wallets.get((sender.id, default))
+        if sender_wallet is None or receiver_wallet is None or sender_counters is None:
+            if sender_wallet is None:
+                missing = currency
+            elif receiver_wallet is None:
+                missing = to_currency
+            else:
+                missing = default
+            raise _fail(
+                "transfer",
+                f"{missing} wallet not found",
+                "wallet_not_found",
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        if sender_wallet.balance < amount:
+            raise _fail("transfer", "Insufficient funds", "insufficient_funds")
+        error = _limit_error("transfer", sender_counters, counted, timezone.localdate())
+        if error:
+            raise error
+
+        _spend(sender_wallet, amount, sender_counters, counted)
+        receiver_wallet.balance += received
+        Wallet.objects.bulk_update(list(wallets.values()), SPENDING_FIELDS)
+
+        exchange = (sender, receiver, amount, currency, received, to_currency, rate)
+        ledger_ids = record_exchange(*exchange, remarks)
+        publish_exchange(*exchange, remarks)
+
+    WALLET_OPERATION_AMOUNT.observe(counted, operation="transfer")
+    return {
+        "message": "Transfer successful",
+        **ledger_ids,
+        "amount": str(amount),
+        "currency": currency,
+        "received_amount": str(received),
+        "received_currency": to_currency,
+        "fx_rate": str(rate),
+        "sender_balance": str(sender_wallet.balance),
+        "receiver_balance": str(receiver_wallet.balance),
+    }
@@ -1,3 +1,170 @@
-from django.test import TestCase
+import queue
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from transactions.models import Transaction
+
+from . import fx, services
+from .models import Wallet
+from .transfer_queue import TransferQueue
+
+
+def make_user(name, balance="0.00", currency="INR"):
+    user = User.objects.create(username=name)
+    Wallet.objects.create(user=user, currency=currency, balance=Decimal(balance))
+    return user
+
+
+def balance(user, currency="INR"):
+    return Wallet.objects.get(user=user, currency=currency).balance
+
+
+@override_settings(TRANSFER_QUEUE_SHARDS=1, TRANSFER_QUEUE_MAX_WAIT_MS=0)
+class QueuedTransferTests(TransactionTestCase):
+    """
+    The worker threads apply transfers on their own database connection,
+    so these tests commit.
+    """
+
+    def setUp(self):
+        self.sender = make_user("sender", "100.00")
+        self.receiver = make_user("receiver")
+        self.engine = TransferQueue()
+
+    def start_worker(self):
+        thread = threading.Thread(
+            target=self.engine._run, args=(self.engine._queues[0],), daemon=True
+        )
+        thread.start()
+
+    def test_transfer_is_applied(self):
+        result = self.engine.transfer(self.sender, self.receiver, Decimal("25.00"))
+
+        self.assertEqual(result["sender_balance"], "75.00")
+        self.assertEqual(balance(self.sender), Decimal("75.00"))
+        self.assertEqual(balance(self.receiver), Decimal("25.00"))
+
+    def test_errors_are_raised_in_the_request(self):
+        with self.assertRaises(services.WalletError) as raised:
+            self.engine.transfer(self.sender, self.receiver, Decimal("500.00"))
+        self.assertEqual(raised.exception.reason, "insufficient_funds")
+
+    @override_settings(TRANSFER_QUEUE_TIMEOUT=0.05)
+    def test_timed_out_transfer_is_never_applied(self):
+        # No worker is running yet, so the transfer waits in the queue
+        self.engine._queues = [queue.Queue()]
+
+        with self.assertRaises(services.WalletError) as raised:
+            self.engine.transfer(self.sender, self.receiver, Decimal("25.00"))
+        self.assertEqual(raised.exception.reason, "queue_timeout")
+        self.assertEqual(raised.exception.status_code, 503)
+
+        # The worker finds the cancelled transfer and drops it
+        self.start_worker()
+        with override_settings(TRANSFER_QUEUE_TIMEOUT=10):
+            self.engine.transfer(self.sender, self.receiver, Decimal("10.00"))
+        self.assertEqual(balance(self.sender), Decimal("90.00"))
+        self.assertEqual(balance(self.receiver), Decimal("10.00"))
+
+
+class SplitTransferTests(TestCase):
+    def setUp(self):
+        self.sender = make_user("sender", "100.00")
+        self.first = make_user("first")
+        self.second = make_user("second")
+
+    def test_pays_every_receiver(self):
+        result = services.split_transfer(
+            self.sender,
+            [(self.first, Decimal("30.00")), (self.second, Decimal("20.00"))],
+        )
+
+        self.assertEqual(result["total"], "50.00")
+        self.assertEqual(balance(self.sender), Decimal("50.00"))
+        self.assertEqual(balance(self.first), Decimal("30.00"))
+        self.assertEqual(balance(self.second), Decimal("20.00"))
+        # A DEBIT and a CREDIT row per payment
+        self.assertEqual(Transaction.objects.count(), 4)
+
+    def test_insufficient_funds_pays_nobody(self):
+        with self.assertRaises(services.WalletError):
+            services.split_transfer(
+                self.sender,
+                [(self.first, Decimal("80.00")), (self.second, Decimal("30.00"))],
+            )
+
+        self.assertEqual(balance(self.sender), Decimal("100.00"))
+        self.assertEqual(balance(self.first), Decimal("0.00"))
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_failed_ledger_write_rolls_back_balances(self):
+        with mock.patch.object(
+            services, "record_transfers", side_effect=RuntimeError("disk full")
+        ), self.assertRaises(RuntimeError):
+            services.split_transfer(
+                self.sender,
+                [(self.first, Decimal("30.00")), (self.second, Decimal("20.00"))],
+            )
+
+        self.assertEqual(balance(self.sender), Decimal("100.00"))
+        self.assertEqual(balance(self.first), Decimal("0.00"))
+        self.assertEqual(balance(self.second), Decimal("0.00"))
+
+
+class ExchangeTransferTests(TestCase):
+    def setUp(self):
+        fx.set_rate("USD", "INR", Decimal("83.12"))
+        self.sender = make_user("sender", "1000.00")
+        Wallet.objects.create(user=self.sender, currency="USD", balance=Decimal("10"))
+        self.receiver = make_user("receiver")
+        Wallet.objects.create(user=self.receiver, currency="USD")
+
+    def tearDown(self):
+        fx.rates.invalidate()
+
+    def test_converts_at_the_stored_rate(self):
+        result = services.exchange_transfer(
+            self.sender, self.receiver, Decimal("1.50"), "USD", "INR"
+        )
+
+        self.assertEqual(result["received_amount"], "124.68")
+        self.assertEqual(result["fx_rate"], "83.12000000")
+        self.assertEqual(balance(self.sender, "USD"), Decimal("8.50"))
+        self.assertEqual(balance(self.receiver), Decimal("124.68"))
+
+        debit, credit = Transaction.objects.order_by("id")
+        self.assertEqual(
+            (debit.amount, debit.currency, debit.counter_amount, debit.fx_rate),
+            (Decimal("1.50"), "USD", Decimal("124.68"), Decimal("83.12")),
+        )
+        self.assertEqual((credit.amount, credit.currency), (Decimal("124.68"), "INR"))
+
+    def test_inverse_rate(self):
+        result = services.exchange_transfer(
+            self.sender, self.receiver, Decimal("100.00"), "INR", "USD"
+        )
+
+        # 100 / 83.12 = 1.2030...
+        self.assertEqual(result["received_amount"], "1.20")
+        self.assertEqual(balance(self.sender), Decimal("900.00"))
+        self.assertEqual(balance(self.receiver, "USD"), Decimal("1.20"))
+
+    def test_spending_counts_the_default_currency_value(self):
+        services.exchange_transfer(
+            self.sender, self.receiver, Decimal("2.00"), "USD", "INR"
+        )
+
+        counters = Wallet.objects.get(user=self.sender, currency="INR")
+        self.assertEqual(counters.spent_today, Decimal("166.24"))
+
+    def test_unknown_rate(self):
+        with self.assertRaises(services.WalletError) as raised:
+            services.exchange_transfer(
+                self.sender, self.receiver, Decimal("1.00"), "EUR", "INR"
+            )
+        self.assertEqual(raised.exception.reason, "unknown_rate")
+        self.assertEqual(balance(self.receiver), Decimal("0.00"))
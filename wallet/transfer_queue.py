@@ -0,0 +1,128 @@
+"""
+Queued transfer engine (TRANSFER_ENGINE = "queued").
+
+Transfer requests are put on one of TRANSFER_QUEUE_SHARDS queues, picked
+by sender id. One worker thread per shard collects up to
+TRANSFER_QUEUE_BATCH_SIZE requests, waiting at most
+TRANSFER_QUEUE_MAX_WAIT_MS for more to arrive, and applies them with
+services.apply_transfers: one database transaction and one lock
+acquisition for the whole batch. The request thread waits for its own
+result. When it waits longer than TRANSFER_QUEUE_TIMEOUT, a transfer
+that has not started is cancelled (503, no money moved); one that is
+already in a running batch is waited for, so the answer is always final.
+
+Queues live in the web process, so batching needs a threaded server
+(e.g. gunicorn --threads) where many requests share one process.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework import status
+
+from monitoring.metrics import WALLET_TRANSFER_BATCH_SIZE
+
+from .services import WalletError, apply_transfers
+
+logger = logging.getLogger(__name__)
+
+
+class TransferQueue:
+    def __init__(self):
+        self._queues = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        shards = settings.TRANSFER_QUEUE_SHARDS
+        queues = [queue.Queue() for _ in range(shards)]
+        for index, shard_queue in enumerate(queues):
+            threading.Thread(
+                target=self._run,
+                args=(shard_queue,),
+                name=f"transfer-queue-{index}",
+                daemon=True,
+            ).start()
+        self._queues = queues
+
+    def submit(self, sender, receiver, amount, remarks=""):
+        """
+        Queue a transfer and return a Future for its result.
+        """
+        if self._queues is None:
+            with self._lock:
+                if self._queues is None:
+                    self._start()
+
+        future = Future()
+        shard = self._queues[sender.id % len(self._queues)]
+        shard.put(((sender, receiver, amount, remarks), future))
+        return future
+
+    def transfer(self, sender, receiver, amount, remarks=""):
+        """
+        Queue a transfer and wait for it. Same result as services.transfer.
+        """
+        future = self.submit(sender, receiver, amount, remarks)
+        try:
+            result = future.result(timeout=settings.TRANSFER_QUEUE_TIMEOUT)
+        except TimeoutError:
+            # cancel() only succeeds while the worker has not taken the
+            # transfer; then it is never applied and a retry is safe
+            if future.cancel():
+                raise WalletError(
+                    "Transfer queue is busy, please try again",
+                    "queue_timeout",
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+            # Already in a running batch: wait for its outcome
+            result = future.result()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _collect(self, shard_queue):
+        """
+        Block for the first request, then gather more for a short time.
+        """
+        batch = [shard_queue.get()]
+        deadline = time.monotonic() + settings.TRANSFER_QUEUE_MAX_WAIT_MS / 1000
+        while len(batch) < settings.TRANSFER_QUEUE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(shard_queue.get(timeout=remaining))
+                else:
+                    batch.append(shard_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, shard_queue):
+        while True:
+            # Drop transfers whose request gave up; the others can no
+            # longer be cancelled
+            batch = [
+                (item, future)
+                for item, future in self._collect(shard_queue)
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            WALLET_TRANSFER_BATCH_SIZE.observe(len(batch))
+            try:
+                close_old_connections()
+                results = apply_transfers([item for item, _future in batch])
+            except Exception as exc:
+                logger.exception("Transfer batch failed")
+                results = [exc] * len(batch)
+
+            for (_item, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+transfer_queue = TransferQueue()
@@ -5,16 +5,26 @@ Includes:
 - crediting money
 - debiting money
 - transferring money
+- split transfers
+- spending limits
+- wallets in other currencies and FX rates
+- scheduled transfers
 - admin wallet list
 """
 
 from django.urls import path
 
 from .views import (
+    FxRateView,
+    ScheduledTransferDetailView,
+    ScheduledTransferListCreateView,
+    SplitTransferView,
     WalletBalanceView,
     WalletCreditView,
     WalletDebitView,
+    WalletLimitsView,
     WalletListAdminView,
+    WalletListCreateView,
     WalletTransferView,
 )
 
@@ -27,6 +37,26 @@ urlpatterns = [
     path("debit/", WalletDebitView.as_view(), name="wallet-debit"),
     # Transfer money to another user
     path("transfer/", WalletTransferView.as_view(), name="wallet-transfer"),
+    # Pay several users at once
+    path("split-transfer/", SplitTransferView.as_view(), name="wallet-split-transfer"),
+    # Daily and monthly spending limits
+    path("limits/", WalletLimitsView.as_view(), name="wallet-limits"),
+    # List the user's wallets or open one in another currency
+    path("wallets/", WalletListCreateView.as_view(), name="wallet-list"),
+    # Exchange rates for cross-currency transfers
+    path("fx-rates/", FxRateView.as_view(), name="wallet-fx-rates"),
+    # Create and list scheduled (recurring) transfers
+    path(
+        "scheduled-transfers/",
+        ScheduledTransferListCreateView.as_view(),
+        name="scheduled-transfers",
+    ),
+    # Show or cancel one scheduled transfer
+    path(
+        "scheduled-transfers/<int:pk>/",
+        ScheduledTransferDetailView.as_view(),
+        name="scheduled-transfer-detail",
+    ),
     # Admin view to list all wallets
     path("admin/wallets/", WalletListAdminView.as_view(), name="admin-wallets"),
 ]
@@ -0,0 +1,203 @@
+"""
+Velocity limits on money leaving a wallet.
+
+Rules come from VELOCITY_RULES, one string per rule:
+
+    "<dimension>:<measure>:<limit>/<period>"
+
+- dimension: "sender", "receiver" or "device" (the X-Device-ID header)
+- measure: "count" (operations) or "amount" (money, e.g. 50000.00)
+- period: "sec", "min", "hour" or "day"
+
+Each rule is a sliding-window counter in the Django cache, the same way
+the OTP throttles work (users/throttling.py): this window's counter plus
+the overlapping part of the previous one. Counters are raised with the
+atomic cache.incr() before the check, so concurrent requests cannot both
+pass the last free slot, and lowered again when the operation is
+rejected or fails.
+
+The views call reserve() before services lock any wallet: a blocked
+request costs a few cache calls and no database query.
+"""
+
+import hashlib
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import status
+
+from lokanetra.money import to_minor
+from monitoring.metrics import WALLET_VELOCITY_BLOCKED
+
+from .services import _fail
+
+DIMENSIONS = ("sender", "receiver", "device")
+MEASURES = ("count", "amount")
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+DEVICE_HEADER = "HTTP_X_DEVICE_ID"
+
+Rule = namedtuple("Rule", "name dimension measure limit duration")
+
+_parsed = {}
+
+
+def parse_rule(text):
+    """
+    "sender:amount:50000/min" -> Rule(..., limit=5000000, duration=60)
+    Amount limits are kept in minor units, like the counters.
+    """
+    try:
+        dimension, measure, rate = (part.strip() for part in text.split(":"))
+        limit, period = rate.split("/")
+        duration = PERIODS[period.strip()[0]]
+        if measure == "amount":
+            limit = to_minor(Decimal(limit))
+        else:
+            limit = int(limit)
+    except (ValueError, KeyError, IndexError, InvalidOperation):
+        raise ImproperlyConfigured(f"Invalid velocity rule: {text!r}")
+    if dimension not in DIMENSIONS or measure not in MEASURES or limit < 0:
+        raise ImproperlyConfigured(f"Invalid velocity rule: {text!r}")
+    return Rule(text.strip(), dimension, measure, limit, duration)
+
+
+def rules():
+    """
+    Parsed VELOCITY_RULES, cached until the setting changes.
+    """
+    key = tuple(settings.VELOCITY_RULES)
+    if key not in _parsed:
+        parsed = [parse_rule(text) for text in key]
+        kinds = [(rule.dimension, rule.measure, rule.duration) for rule in parsed]
+        if len(set(kinds)) != len(kinds):
+            # They would share one counter
+            raise ImproperlyConfigured(
+                "Two velocity rules have the same dimension, measure and period"
+            )
+        _parsed.clear()
+        _parsed[key] = parsed
+    return _parsed[key]
+
+
+def device_id(request):
+    """
+    Hashed X-Device-ID header of the request, or None.
+    """
+    device = request.META.get(DEVICE_HEADER, "").strip()
+    if not device:
+        return None
+    return hashlib.sha256(device.encode()).hexdigest()[:32]
+
+
+def _usage(dimension, sender, payments, device):
+    """
+    Return {ident: (count, amount in minor units)} for one dimension.
+    A split transfer is one operation for its sender and device, and one
+    for each receiver.
+    """
+    total = sum(to_minor(amount) for _receiver, amount in payments)
+    if dimension == "sender":
+        return {sender.id: (1, total)}
+    if dimension == "device":
+        return {device: (1, total)} if device else {}
+
+    usage = {}
+    for receiver, amount in payments:
+        if receiver is None:
+            # Debit: there is no receiver
+            continue
+        count, received = usage.get(receiver.id, (0, 0))
+        usage[receiver.id] = (count + 1, received + to_minor(amount))
+    return usage
+
+
+def _incr(key, delta, timeout):
+    # add() sets the expiry; incr() keeps it and is atomic
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, delta, timeout)
+        return delta
+
+
+def _release(taken):
+    for key, delta in taken:
+        try:
+            cache.decr(key, delta)
+        except ValueError:
+            # Already expired
+            pass
+
+
+def _describe(rule):
+    unit = {1: "second", 60: "minute", 3600: "hour", 86400: "day"}[rule.duration]
+    if rule.measure == "amount":
+        return f"{rule.limit / 100:.2f} per {unit}"
+    return f"{rule.limit} operations per {unit}"
+
+
+def _take(operation, sender, payments, device):
+    now = time.time()
+    checks = []
+    for rule in rules():
+        window = int(now // rule.duration)
+        usage = _usage(rule.dimension, sender, payments, device)
+        for ident, (count, amount) in usage.items():
+            key = f"velocity:{rule.dimension}:{rule.measure}:{rule.duration}:{ident}"
+            delta = count if rule.measure == "count" else amount
+            checks.append((rule, key, window, delta, now % rule.duration))
+    if not checks:
+        return []
+
+    previous = cache.get_many(
+        [f"{key}:{window - 1}" for _rule, key, window, _delta, _offset in checks]
+    )
+    taken = []
+    for rule, key, window, delta, offset in checks:
+        current_key = f"{key}:{window}"
+        current = _incr(current_key, delta, rule.duration * 2)
+        taken.append((current_key, delta))
+
+        # Weight the previous window by how much of it is still inside
+        # the sliding window
+        overlap = 1 - offset / rule.duration
+        used = previous.get(f"{key}:{window - 1}", 0) * overlap + current
+        if used > rule.limit:
+            _release(taken)
+            WALLET_VELOCITY_BLOCKED.inc(dimension=rule.dimension, measure=rule.measure)
+            raise _fail(
+                operation,
+                f"Velocity limit reached: at most {_describe(rule)} "
+                f"per {rule.dimension}",
+                "velocity_limit",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+    return taken
+
+
+@contextmanager
+def reserve(operation, sender, payments, device=None):
+    """
+    Count an operation against the velocity rules, or raise WalletError
+    (429) when a limit would be passed. payments is a list of
+    (receiver, amount); receiver is None for a debit. If the block
+    raises, the operation is taken off the counters again.
+    """
+    if not settings.VELOCITY_CHECKS:
+        yield
+        return
+
+    taken = _take(operation, sender, payments, device)
+    try:
+        yield
+    except BaseException:
+        _release(taken)
+        raise
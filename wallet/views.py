@@ -5,28 +5,40 @@ It includes:
 - Add money (credit)
 - Reduce money (debit)
 - Transfer money to another user
+- Split transfer: pay many users at once
+- Spending limits: today's and this month's spending
+- Wallets in other currencies, cross-currency transfers and FX rates
+- Scheduled (recurring) transfers: create, list, cancel
 - Admin: list all wallets
+
+The user-facing views build their response dicts directly and always
+answer JSON through FastJSONRenderer (see lokanetra/renderers.py).
 """
 
-from django.contrib.auth.models import User
-from django.db import transaction as db_transaction
-from django.shortcuts import get_object_or_404
-from drf_yasg.utils import swagger_auto_schema
+from django.conf import settings
+from django.http import Http404
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
 
-from transactions.models import Transaction
+from lokanetra.docs import swagger_auto_schema
+from lokanetra.renderers import FastJSONMixin
+from lokanetra.routers import ReplicaReadMixin, pin_to_primary, read_from_replica
 
-from .models import Wallet
+from . import fx, services, velocity
+from .models import ScheduledTransfer, Wallet
 from .serializers import (
     CreditSerializer,
     DebitSerializer,
+    OpenWalletSerializer,
+    ScheduledTransferSerializer,
+    SplitTransferSerializer,
     TransferSerializer,
     WalletSerializer,
 )
+from .transfer_queue import transfer_queue
 
 
-class WalletBalanceView(views.APIView):
+class WalletBalanceView(FastJSONMixin, views.APIView):
     """
     Get the logged-in user's wallet balance.
     """
@@ -35,18 +47,33 @@ class WalletBalanceView(views.APIView):
 
     def get(self, request):
         """
-        Return the current balance of the user's wallet.
+        Return the current balance of the user's wallet in ?currency=
+        (default: DEFAULT_CURRENCY).
+        Reads from the replica unless the user just moved money.
         """
-        wallet = get_object_or_404(Wallet, user=request.user)
-        serializer = WalletSerializer(wallet)
-
-        data = serializer.data
-        data["balance"] = str(wallet.balance)  # Convert Decimal to string
+        currency = request.query_params.get(
+            "currency", settings.DEFAULT_CURRENCY
+        ).upper()
+        with read_from_replica(request.user.id):
+            balance = (
+                Wallet.objects.filter(user=request.user, currency=currency)
+                .values_list("balance", flat=True)
+                .first()
+            )
+        if balance is None:
+            raise Http404
 
-        return Response(data)
+        # Same shape as WalletSerializer, without building one
+        return Response(
+            {
+                "user": str(request.user),
+                "currency": currency,
+                "balance": str(balance),
+            }
+        )
 
 
-class WalletCreditView(views.APIView):
+class WalletCreditView(FastJSONMixin, views.APIView):
     """
     Add money to the user's wallet (credit).
     """
@@ -66,30 +93,14 @@ class WalletCreditView(views.APIView):
         amount = serializer.validated_data["amount"]
         remarks = serializer.validated_data.get("remarks", "")
 
-        if amount <= 0:
-            return Response(
-                {"detail": "Amount must be positive"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
         # Perform safe update
-        with db_transaction.atomic():
-            wallet = Wallet.objects.select_for_update().get(user=request.user)
-            wallet.balance += amount
-            wallet.save()
-
-            tx = Transaction.objects.create(
-                sender=None,
-                receiver=request.user,
-                amount=amount,
-                transaction_type="CREDIT",
-                remarks=remarks,
-            )
+        result = services.credit(request.user, amount, remarks)
 
-        return Response({"balance": str(wallet.balance), "transaction_id": tx.id})
+        pin_to_primary(request.user.id)
+        return Response(result)
 
 
-class WalletDebitView(views.APIView):
+class WalletDebitView(FastJSONMixin, views.APIView):
     """
     Reduce money from the user's wallet (debit).
     """
@@ -109,37 +120,22 @@ class WalletDebitView(views.APIView):
         amount = serializer.validated_data["amount"]
         remarks = serializer.validated_data.get("remarks", "")
 
-        if amount <= 0:
-            return Response(
-                {"detail": "Amount must be positive"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        with velocity.reserve(
+            "debit", request.user, [(None, amount)], velocity.device_id(request)
+        ):
+            result = services.debit(request.user, amount, remarks)
 
-        with db_transaction.atomic():
-            wallet = Wallet.objects.select_for_update().get(user=request.user)
+        pin_to_primary(request.user.id)
+        return Response(result)
 
-            if wallet.balance < amount:
-                return Response(
-                    {"detail": "Insufficient funds"}, status=status.HTTP_400_BAD_REQUEST
-                )
 
-            wallet.balance -= amount
-            wallet.save()
-
-            tx = Transaction.objects.create(
-                sender=request.user,
-                receiver=None,
-                amount=amount,
-                transaction_type="DEBIT",
-                remarks=remarks,
-            )
-
-        return Response({"balance": str(wallet.balance), "transaction_id": tx.id})
-
-
-class WalletTransferView(views.APIView):
+class WalletTransferView(FastJSONMixin, views.APIView):
     """
     Transfer money from the logged-in user to another user.
+    With TRANSFER_ENGINE = "queued" the transfer is applied in a batch
+    by the transfer queue (see wallet/transfer_queue.py).
+    A transfer between wallets in different currencies is converted at
+    the cached FX rate (see wallet/fx.py).
     """
 
     permission_classes = [permissions.IsAuthenticated]
@@ -155,71 +151,225 @@ class WalletTransferView(views.APIView):
         to_phone = serializer.validated_data["to_phone_number"]
         amount = serializer.validated_data["amount"]
         remarks = serializer.validated_data.get("remarks", "")
+        currency = serializer.validated_data.get("currency", settings.DEFAULT_CURRENCY)
+        to_currency = serializer.validated_data.get("to_currency", currency)
 
-        if amount <= 0:
-            return Response(
-                {"detail": "Amount must be positive"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        services.check_amount("transfer", amount)
 
         # Find receiver
-        try:
-            receiver_user = User.objects.get(userprofile__phone_number=to_phone)
-        except User.DoesNotExist:
-            return Response(
-                {"detail": "Receiver not found"}, status=status.HTTP_404_NOT_FOUND
-            )
+        receiver_user = services.find_receiver(to_phone)
+
+        # Velocity limits count the DEFAULT_CURRENCY value
+        counted = services.default_value("transfer", amount, currency)
+        with velocity.reserve(
+            "transfer",
+            request.user,
+            [(receiver_user, counted)],
+            velocity.device_id(request),
+        ):
+            if currency != to_currency:
+                result = services.exchange_transfer(
+                    request.user, receiver_user, amount, currency, to_currency, remarks
+                )
+            elif currency != settings.DEFAULT_CURRENCY:
+                result = services.transfer(
+                    request.user, receiver_user, amount, remarks, currency
+                )
+            elif settings.TRANSFER_ENGINE == "queued":
+                result = transfer_queue.transfer(
+                    request.user, receiver_user, amount, remarks
+                )
+            else:
+                result = services.transfer(request.user, receiver_user, amount, remarks)
+
+        pin_to_primary(request.user.id, receiver_user.id)
+        return Response(result)
+
 
-        with db_transaction.atomic():
-            # Lock wallets safely
-            ids = sorted([request.user.id, receiver_user.id])
-            wallets = Wallet.objects.select_for_update().filter(user_id__in=ids)
+class SplitTransferView(FastJSONMixin, views.APIView):
+    """
+    Pay several users from the logged-in user's wallet at once.
+    All payments succeed together or none is made.
+    """
 
-            wallet_map = {wallet.user_id: wallet for wallet in wallets}
-            sender_wallet = wallet_map.get(request.user.id)
-            receiver_wallet = wallet_map.get(receiver_user.id)
+    permission_classes = [permissions.IsAuthenticated]
 
-            if sender_wallet.balance < amount:
-                return Response(
-                    {"detail": "Insufficient funds"}, status=status.HTTP_400_BAD_REQUEST
+    @swagger_auto_schema(request_body=SplitTransferSerializer)
+    def post(self, request):
+        """
+        Debit the sender once and credit every receiver.
+        """
+        serializer = SplitTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        payments = serializer.validated_data["payments"]
+        remarks = serializer.validated_data.get("remarks", "")
+
+        for payment in payments:
+            services.check_amount("split_transfer", payment["amount"])
+
+        # Find all receivers with one query
+        receivers = services.find_receivers(
+            [payment["to_phone_number"] for payment in payments]
+        )
+        pairs = [
+            (receivers[payment["to_phone_number"]], payment["amount"])
+            for payment in payments
+        ]
+        with velocity.reserve(
+            "split_transfer", request.user, pairs, velocity.device_id(request)
+        ):
+            result = services.split_transfer(request.user, pairs, remarks)
+        result["payments"] = [
+            {"to_phone_number": payment["to_phone_number"], **entry}
+            for payment, entry in zip(payments, result["payments"])
+        ]
+
+        pin_to_primary(request.user.id, *(user.id for user in receivers.values()))
+        return Response(result)
+
+
+class WalletLimitsView(FastJSONMixin, views.APIView):
+    """
+    Show the logged-in user's daily and monthly spending limits.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Return the limits, the amounts spent and what is left.
+        """
+        wallet = Wallet.objects.filter(
+            user=request.user, currency=settings.DEFAULT_CURRENCY
+        ).first()
+        if wallet is None:
+            raise Http404
+
+        spent_today, spent_this_month = services.current_spending(wallet)
+        data = {}
+        for period, limit, spent in zip(
+            ("daily", "monthly"),
+            services.limits(wallet),
+            (spent_today, spent_this_month),
+        ):
+            data[period] = {
+                "limit": None if limit is None else str(limit),
+                "spent": str(spent),
+                "remaining": None if limit is None else str(max(limit - spent, 0)),
+            }
+        return Response(data)
+
+
+class WalletListCreateView(FastJSONMixin, views.APIView):
+    """
+    List the logged-in user's wallets or open one in another currency.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Return every wallet of the user, DEFAULT_CURRENCY first.
+        """
+        wallets = Wallet.objects.filter(user=request.user).values_list(
+            "currency", "balance"
+        )
+        default = settings.DEFAULT_CURRENCY
+        return Response(
+            [
+                {"currency": currency, "balance": str(balance)}
+                for currency, balance in sorted(
+                    wallets, key=lambda row: (row[0] != default, row[0])
                 )
+            ]
+        )
 
-            # Update balances
-            sender_wallet.balance -= amount
-            receiver_wallet.balance += amount
-            sender_wallet.save()
-            receiver_wallet.save()
-
-            # Log transaction entries
-            debit_tx = Transaction.objects.create(
-                sender=request.user,
-                receiver=receiver_user,
-                amount=amount,
-                transaction_type="DEBIT",
-                remarks=remarks,
-            )
-            credit_tx = Transaction.objects.create(
-                sender=request.user,
-                receiver=receiver_user,
-                amount=amount,
-                transaction_type="CREDIT",
-                remarks=remarks,
-            )
+    @swagger_auto_schema(
+        request_body=OpenWalletSerializer, responses={201: WalletSerializer}
+    )
+    def post(self, request):
+        """
+        Open an empty wallet in the given currency.
+        """
+        serializer = OpenWalletSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        wallet = services.open_wallet(
+            request.user, serializer.validated_data["currency"]
+        )
+        return Response(
+            {"currency": wallet.currency, "balance": str(wallet.balance)},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class FxRateView(FastJSONMixin, views.APIView):
+    """
+    Show the exchange rates used for cross-currency transfers.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Return the cached rates and their version.
+        """
         return Response(
             {
-                "message": "Transfer successful",
-                "debit_transaction_id": debit_tx.id,
-                "credit_transaction_id": credit_tx.id,
-                "sender_balance": str(sender_wallet.balance),
-                "receiver_balance": str(receiver_wallet.balance),
+                "version": fx.rates.version,
+                "rates": [
+                    {"base": base, "quote": quote, "rate": str(rate)}
+                    for (base, quote), rate in sorted(fx.rates.all().items())
+                ],
             }
         )
 
 
-class WalletListAdminView(generics.ListAPIView):
+class ScheduledTransferListCreateView(generics.ListCreateAPIView):
+    """
+    List the logged-in user's scheduled transfers or create a new one.
+    Runs are paid by "manage.py run_scheduled_transfers".
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ScheduledTransferSerializer
+
+    def get_queryset(self):
+        return (
+            ScheduledTransfer.objects.filter(sender=self.request.user)
+            .select_related("receiver")
+            .order_by("-id")
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(sender=self.request.user)
+
+
+class ScheduledTransferDetailView(generics.RetrieveDestroyAPIView):
+    """
+    Show or cancel one of the logged-in user's scheduled transfers.
+    DELETE cancels the schedule; its history is kept.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ScheduledTransferSerializer
+
+    def get_queryset(self):
+        return ScheduledTransfer.objects.filter(
+            sender=self.request.user
+        ).select_related("receiver")
+
+    def perform_destroy(self, instance):
+        ScheduledTransfer.objects.filter(pk=instance.pk, status="ACTIVE").update(
+            status="CANCELLED"
+        )
+
+
+class WalletListAdminView(ReplicaReadMixin, generics.ListAPIView):
     """
     Admin-only view that returns all wallets with user info.
+    Reads from the replica when one is configured.
     """
 
     permission_classes = [permissions.IsAdminUser]
@@ -0,0 +1,29 @@
+from django.contrib import admin
+
+from .models import WebhookDelivery, WebhookSubscription
+
+
+@admin.register(WebhookSubscription)
+class WebhookSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ("user", "url", "is_active", "created_at")
+    list_filter = ("is_active",)
+    search_fields = ("user__username", "url")
+    raw_id_fields = ("user",)
+    # The secret signs payloads
+    exclude = ("secret",)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = (
+        "event_id",
+        "subscription",
+        "status",
+        "attempts",
+        "response_status",
+        "next_attempt_at",
+    )
+    list_filter = ("status",)
+    list_select_related = ("subscription__user",)
+    raw_id_fields = ("subscription",)
+    readonly_fields = ("payload", "last_error", "created_at", "sent_at")
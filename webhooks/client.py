@@ -0,0 +1,250 @@
+"""
+Small asyncio HTTP/1.1 client for webhook delivery.
+
+AsyncHTTPClient keeps idle keep-alive connections per host and limits
+the open connections per host, so many requests to the same merchant
+reuse a few connections while requests to different merchants run
+concurrently. It only does what delivery needs: POST a body and read
+the status and the start of the response body. Only max_body bytes of
+a response are read; the connection of a longer one is closed instead
+of reused, so a merchant's server cannot make the worker read or hold
+large responses.
+
+Host names are resolved once per request. Unless WEBHOOK_ALLOW_PRIVATE
+is set, loopback, private and link-local addresses are refused, so a
+subscription cannot make the worker call internal services.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import ssl
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# Headers a response may have before it is refused
+MAX_HEADERS = 100
+
+
+class WebhookHTTPError(Exception):
+    """
+    The request could not be sent or the response was not valid HTTP.
+    """
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHTTPClient:
+    def __init__(
+        self,
+        timeout=10,
+        max_connections_per_host=4,
+        allow_private=False,
+        max_body=1024,
+    ):
+        self.timeout = timeout
+        self.max_body = max_body
+        self.allow_private = allow_private
+        self.max_connections_per_host = max_connections_per_host
+        self._idle = defaultdict(list)
+        self._limits = {}
+        self._ssl = ssl.create_default_context()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+    async def post(self, url, body, headers=None):
+        """
+        POST body (bytes) to url. Returns (status, response body), the
+        body cut to max_body bytes.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise WebhookHTTPError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        request = self._request(parts, path, body, headers or {})
+        limit = self._limits.setdefault(
+            key, asyncio.Semaphore(self.max_connections_per_host)
+        )
+        async with limit:
+            try:
+                return await asyncio.wait_for(
+                    self._exchange(key, request), self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise WebhookHTTPError(f"Timed out after {self.timeout}s")
+
+    def _request(self, parts, path, body, headers):
+        host = parts.hostname if not parts.port else f"{parts.hostname}:{parts.port}"
+        lines = [
+            f"POST {path} HTTP/1.1",
+            f"Host: {host}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive",
+            "User-Agent: lokanetra-webhooks",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _exchange(self, key, request):
+        idle = self._idle[key]
+        while idle:
+            # The server may have closed an idle connection: retry once
+            # on a fresh one
+            connection = idle.pop()
+            try:
+                return await self._send(key, connection, request)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                connection.close()
+        connection = await self._connect(key)
+        return await self._send(key, connection, request)
+
+    async def _send(self, key, connection, request):
+        try:
+            connection.writer.write(request)
+            await connection.writer.drain()
+            status, keep_alive, body = await self._read_response(connection.reader)
+        except BaseException:
+            connection.close()
+            raise
+        if keep_alive:
+            self._idle[key].append(connection)
+        else:
+            connection.close()
+        return status, body
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        address = await self._resolve(host, port)
+        try:
+            reader, writer = await asyncio.open_connection(
+                address,
+                port,
+                ssl=self._ssl if scheme == "https" else None,
+                server_hostname=host if scheme == "https" else None,
+            )
+        except OSError as exc:
+            raise WebhookHTTPError(f"Could not connect to {host}:{port}: {exc}")
+        return _Connection(reader, writer)
+
+    async def _resolve(self, host, port):
+        """
+        Return an address to connect to, refusing internal ones.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as exc:
+            raise WebhookHTTPError(f"Could not resolve {host}: {exc}")
+        for _family, _type, _proto, _name, sockaddr in infos:
+            address = ipaddress.ip_address(sockaddr[0])
+            if self.allow_private or address.is_global:
+                return sockaddr[0]
+        raise WebhookHTTPError(f"{host} resolves to a non-public address")
+
+    async def _read_response(self, reader):
+        try:
+            status_line = await reader.readline()
+        except ValueError:
+            raise WebhookHTTPError("Status line too long")
+        if not status_line:
+            raise ConnectionError("Connection closed by the server")
+        try:
+            version, status = status_line.decode("latin-1").split()[:2]
+            status = int(status)
+        except ValueError:
+            raise WebhookHTTPError(f"Invalid status line: {status_line[:100]!r}")
+
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise WebhookHTTPError("Response header too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise WebhookHTTPError(f"More than {MAX_HEADERS} response headers")
+            name, _sep, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and (
+            headers.get("connection", "").lower() != "close"
+        )
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body, complete = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            length = headers["content-length"]
+            if not (length.isascii() and length.isdigit()):
+                raise WebhookHTTPError(f"Invalid Content-Length: {length[:20]!r}")
+            length = int(length)
+            body = await reader.readexactly(min(length, self.max_body))
+            complete = length <= self.max_body
+        elif status in (204, 304) or 100 <= status < 200:
+            body, complete = b"", True
+        else:
+            body = await self._read_at_most(reader, self.max_body)
+            complete = False
+        # The rest of a long body is never read: the connection cannot
+        # be reused
+        return status, keep_alive and complete, body
+
+    async def _read_at_most(self, reader, limit):
+        """
+        Read until EOF or limit bytes.
+        """
+        chunks = []
+        while limit > 0:
+            data = await reader.read(limit)
+            if not data:
+                break
+            chunks.append(data)
+            limit -= len(data)
+        return b"".join(chunks)
+
+    async def _read_chunked(self, reader):
+        """
+        Read a chunked body up to max_body bytes. Returns (body, whether
+        the whole body was read).
+        """
+        chunks = []
+        remaining = self.max_body
+        while True:
+            line = await reader.readline()
+            try:
+                size = int(line.split(b";")[0], 16)
+            except ValueError:
+                raise WebhookHTTPError(f"Invalid chunk size: {line[:20]!r}")
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks), True
+            if size > remaining:
+                chunks.append(await reader.readexactly(remaining))
+                return b"".join(chunks), False
+            chunks.append(await reader.readexactly(size))
+            remaining -= size
+            await reader.readline()
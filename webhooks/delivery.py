@@ -0,0 +1,223 @@
+"""
+Webhook delivery worker.
+
+fan_out() reads the wallet event stream as the "webhooks" consumer and
+queues a WebhookDelivery for every transfer received by a user with an
+active subscription. The deliveries and the new stream offset are saved
+in one database transaction, so each event is queued once.
+
+dispatch_batch() claims due deliveries, groups them by subscription and
+sends each group as one signed POST with up to
+WEBHOOK_MAX_EVENTS_PER_REQUEST events:
+
+    {"events": [{"event": "transfer.received", "id": 42, ...}, ...]}
+
+Requests to different endpoints run concurrently on one asyncio event
+loop, with keep-alive connections (webhooks/client.py). A group that
+does not get a 2xx answer is retried after WEBHOOK_RETRY_DELAY * 2^n
+seconds, up to WEBHOOK_MAX_ATTEMPTS. Event ids let receivers drop
+duplicates.
+
+All of this runs in "manage.py deliver_webhooks", never in a request.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from events import outbox
+from events.models import ConsumerOffset
+from monitoring.metrics import WEBHOOK_DELIVERIES
+
+from .client import AsyncHTTPClient
+from .models import WebhookDelivery, WebhookSubscription
+from .signing import HEADER, sign
+
+CONSUMER = "webhooks"
+
+UPDATE_FIELDS = (
+    "status",
+    "attempts",
+    "next_attempt_at",
+    "response_status",
+    "last_error",
+    "sent_at",
+)
+
+
+def fan_out(batch_size=None):
+    """
+    Queue deliveries for the next batch of wallet events.
+    Returns the number of events read.
+    """
+    with db_transaction.atomic():
+        # One worker at a time reads the stream
+        offset, _created = ConsumerOffset.objects.select_for_update().get_or_create(
+            consumer=CONSUMER
+        )
+        events = outbox.read(offset.position, batch_size)
+        if not events:
+            return 0
+
+        received = [event for event in events if event.event_type == "TRANSFER"]
+        subscriptions = defaultdict(list)
+        for subscription in WebhookSubscription.objects.filter(
+            user_id__in={event.receiver_id for event in received}, is_active=True
+        ):
+            subscriptions[subscription.user_id].append(subscription)
+
+        deliveries = [
+            WebhookDelivery(
+                subscription=subscription,
+                event_id=event.id,
+                payload=json.dumps({"event": "transfer.received", **event.as_dict()}),
+            )
+            for event in received
+            for subscription in subscriptions[event.receiver_id]
+            # No history for new subscriptions
+            if event.created_at >= subscription.created_at
+        ]
+        WebhookDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+
+        offset.position = events[-1].id
+        offset.save(update_fields=["position", "updated_at"])
+    return len(events)
+
+
+def _claim(batch_size):
+    """
+    Lease up to batch_size due deliveries to this worker.
+    """
+    now = timezone.now()
+    with db_transaction.atomic():
+        due = (
+            WebhookDelivery.objects.filter(
+                status="PENDING",
+                next_attempt_at__lte=now,
+                subscription__is_active=True,
+            )
+            .select_related("subscription")
+            .order_by("next_attempt_at", "id")
+        )
+        features = connection.features
+        if features.has_select_for_update_skip_locked:
+            # Other workers take the next batch instead of waiting
+            of = ("self",) if features.has_select_for_update_of else ()
+            due = due.select_for_update(skip_locked=True, of=of)
+        deliveries = list(due[:batch_size])
+
+        # If this worker dies while sending, the lease runs out and
+        # another worker retries the deliveries
+        WebhookDelivery.objects.filter(id__in=[d.id for d in deliveries]).update(
+            next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+        )
+    return deliveries
+
+
+def _requests(deliveries):
+    """
+    Group deliveries into (subscription, deliveries) requests, in event
+    order, at most WEBHOOK_MAX_EVENTS_PER_REQUEST per request.
+    """
+    groups = defaultdict(list)
+    for delivery in sorted(deliveries, key=lambda d: d.event_id):
+        groups[delivery.subscription_id].append(delivery)
+
+    size = settings.WEBHOOK_MAX_EVENTS_PER_REQUEST
+    return [
+        (group[0].subscription, group[i : i + size])
+        for group in groups.values()
+        for i in range(0, len(group), size)
+    ]
+
+
+async def _post(client, limit, subscription, deliveries):
+    body = b'{"events": [%s]}' % b", ".join(d.payload.encode() for d in deliveries)
+    headers = {HEADER: sign(subscription.secret, body)}
+    async with limit:
+        try:
+            return await client.post(subscription.url, body, headers)
+        except Exception as exc:
+            return exc
+
+
+async def _send_all(requests):
+    limit = asyncio.Semaphore(settings.WEBHOOK_CONCURRENCY)
+    async with AsyncHTTPClient(
+        timeout=settings.WEBHOOK_TIMEOUT,
+        max_connections_per_host=settings.WEBHOOK_CONNECTIONS_PER_HOST,
+        allow_private=settings.WEBHOOK_ALLOW_PRIVATE,
+    ) as client:
+        return await asyncio.gather(
+            *(
+                _post(client, limit, subscription, deliveries)
+                for subscription, deliveries in requests
+            )
+        )
+
+
+def _record(delivery, result, now):
+    delivery.attempts += 1
+    if isinstance(result, Exception):
+        delivery.response_status = None
+        error = str(result) or type(result).__name__
+    else:
+        status, body = result
+        delivery.response_status = status
+        if 200 <= status < 300:
+            delivery.status = "SENT"
+            delivery.sent_at = now
+            delivery.last_error = ""
+            WEBHOOK_DELIVERIES.inc(result="sent")
+            return
+        error = f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}"
+
+    delivery.last_error = error[:1000]
+    if delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+        delivery.status = "FAILED"
+        WEBHOOK_DELIVERIES.inc(result="failed")
+    else:
+        delay = settings.WEBHOOK_RETRY_DELAY * 2 ** (delivery.attempts - 1)
+        delivery.next_attempt_at = now + timedelta(seconds=delay)
+        WEBHOOK_DELIVERIES.inc(result="retry")
+
+
+def dispatch_batch(batch_size=None):
+    """
+    Send up to batch_size due deliveries. Returns the number handled.
+    """
+    deliveries = _claim(batch_size or settings.WEBHOOK_BATCH_SIZE)
+    if not deliveries:
+        return 0
+
+    requests = _requests(deliveries)
+    results = asyncio.run(_send_all(requests))
+
+    now = timezone.now()
+    for (_subscription, group), result in zip(requests, results):
+        for delivery in group:
+            _record(delivery, result, now)
+
+    WebhookDelivery.objects.bulk_update(deliveries, UPDATE_FIELDS)
+    return len(deliveries)
+
+
+def deliver_due(batch_size=None):
+    """
+    Queue deliveries for new events and send everything that is due.
+    Returns the number of deliveries handled.
+    """
+    while fan_out():
+        pass
+    total = 0
+    while True:
+        count = dispatch_batch(batch_size)
+        total += count
+        if count == 0:
+            return total
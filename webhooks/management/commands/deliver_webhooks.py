@@ -0,0 +1,41 @@
+"""
+Send webhooks for new wallet events.
+
+Examples:
+    python manage.py deliver_webhooks            # send what is due and exit
+    python manage.py deliver_webhooks --loop     # keep running as a worker
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from webhooks.delivery import deliver_due
+
+
+class Command(BaseCommand):
+    help = "Queue webhook deliveries for new events and send them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.WEBHOOK_BATCH_SIZE
+        )
+        parser.add_argument("--loop", action="store_true", help="Run forever.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.WEBHOOK_INTERVAL,
+            help="Seconds to sleep when nothing is due (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            count = deliver_due(options["batch_size"])
+            if count:
+                self.stdout.write(f"Handled {count} deliveries")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
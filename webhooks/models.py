@@ -0,0 +1,99 @@
+"""
+Webhooks: HTTP callbacks to merchants when they receive a transfer.
+
+WebhookSubscription is a URL registered by a user. The delivery worker
+(webhooks/delivery.py) turns wallet events into WebhookDelivery rows,
+one per subscription and event, and sends them with retries.
+"""
+
+import secrets
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+def new_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookSubscription(models.Model):
+    """
+    A URL that receives the user's incoming transfers.
+    Payloads are signed with the secret (see webhooks/signing.py).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="webhooks",
+    )
+
+    url = models.URLField(max_length=500)
+
+    secret = models.CharField(max_length=64, default=new_secret, editable=False)
+
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """Example: 'user_9999999999 https://shop.example/hooks'"""
+        return f"{self.user} {self.url}"
+
+
+class WebhookDelivery(models.Model):
+    """
+    One event to send to one subscription.
+    """
+
+    STATUSES = (
+        ("PENDING", "Pending"),  # Waiting for the worker (or a retry)
+        ("SENT", "Sent"),  # The endpoint answered 2xx
+        ("FAILED", "Failed"),  # Gave up after WEBHOOK_MAX_ATTEMPTS
+    )
+
+    subscription = models.ForeignKey(
+        WebhookSubscription,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+    )
+
+    event_id = models.BigIntegerField()
+
+    payload = models.TextField(help_text="The event as JSON.")
+
+    status = models.CharField(max_length=10, choices=STATUSES, default="PENDING")
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    # Also used as a lease while a worker is sending the delivery
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    response_status = models.PositiveIntegerField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "webhook deliveries"
+        constraints = [
+            # An event is queued once per subscription
+            models.UniqueConstraint(
+                fields=["subscription", "event_id"],
+                name="webhook_delivery_event_unique",
+            ),
+        ]
+        indexes = [
+            # Worker query: pending deliveries that are due
+            models.Index(
+                fields=["status", "next_attempt_at"], name="webhook_pending_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        """Example: 'event 42 -> 7 PENDING'"""
+        return f"event {self.event_id} -> {self.subscription_id} {self.status}"
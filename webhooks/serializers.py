@@ -0,0 +1,33 @@
+"""
+Serializers for webhook subscriptions.
+"""
+
+from rest_framework import serializers
+
+from .models import WebhookSubscription
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    """
+    Shows a subscription. The secret is only returned when it is created.
+    """
+
+    class Meta:
+        model = WebhookSubscription
+        fields = ("id", "url", "is_active", "created_at")
+        read_only_fields = ("created_at",)
+
+    def validate_url(self, value):
+        if not value.startswith(("https://", "http://")):
+            raise serializers.ValidationError("Use an http or https URL")
+        return value
+
+
+class WebhookCreateSerializer(WebhookSubscriptionSerializer):
+    """
+    Creates a subscription and returns its signing secret once.
+    """
+
+    class Meta(WebhookSubscriptionSerializer.Meta):
+        fields = WebhookSubscriptionSerializer.Meta.fields + ("secret",)
+        read_only_fields = ("created_at", "secret")
@@ -0,0 +1,44 @@
+"""
+Webhook signatures.
+
+Every request has a header
+
+    X-Lokanetra-Signature: t=<unix time>,v1=<hex HMAC-SHA256>
+
+where the HMAC is computed with the subscription secret over
+"<unix time>.<request body>". Receivers recompute it, compare in
+constant time and reject old timestamps to stop replays.
+"""
+
+import hashlib
+import hmac
+import time
+
+HEADER = "X-Lokanetra-Signature"
+
+
+def sign(secret, body, timestamp=None):
+    """
+    Return the signature header value for a request body (bytes).
+    """
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    digest = hmac.new(
+        secret.encode(), b"%d." % timestamp + body, hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify(secret, body, header, tolerance=300, now=None):
+    """
+    Check a signature header. For receivers written in Python and tests.
+    """
+    try:
+        parts = dict(item.split("=", 1) for item in header.split(","))
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+    now = now if now is not None else time.time()
+    if abs(now - timestamp) > tolerance:
+        return False
+    expected = sign(secret, body, timestamp)
+    return hmac.compare_digest(expected, header)
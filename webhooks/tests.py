@@ -0,0 +1,62 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from .client import AsyncHTTPClient, WebhookHTTPError
+
+
+class ResponseLimitTests(SimpleTestCase):
+    """
+    Responses from a local server that the client must not read in full.
+    """
+
+    def post(self, response):
+        async def run():
+            connections = []
+
+            async def handle(reader, writer):
+                connections.append(writer)
+                await reader.readuntil(b"\r\n\r\n")
+                await reader.readexactly(2)
+                writer.write(response)
+                await writer.drain()
+
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                async with AsyncHTTPClient(
+                    timeout=5, allow_private=True, max_body=10
+                ) as client:
+                    result = await client.post(f"http://127.0.0.1:{port}/", b"{}")
+                    return result, len(client._idle[("http", "127.0.0.1", port)])
+            finally:
+                for writer in connections:
+                    writer.close()
+                server.close()
+                await server.wait_closed()
+
+        return asyncio.run(run())
+
+    def test_long_body_is_cut_and_connection_closed(self):
+        (status, body), idle = self.post(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 100000000\r\n\r\n" + b"x" * 50
+        )
+        self.assertEqual((status, body, idle), (200, b"x" * 10, 0))
+
+    def test_short_body_keeps_connection(self):
+        (status, body), idle = self.post(
+            b"HTTP/1.1 201 Created\r\nContent-Length: 2\r\n\r\nok"
+        )
+        self.assertEqual((status, body, idle), (201, b"ok", 1))
+
+    def test_long_chunked_body_is_cut(self):
+        (status, body), idle = self.post(
+            b"HTTP/1.1 500 Error\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"8\r\n12345678\r\n8\r\n12345678\r\n"
+        )
+        self.assertEqual((status, body, idle), (500, b"1234567812", 0))
+
+    def test_invalid_content_length(self):
+        for length in (b"-1", b"1e9", b"abc"):
+            with self.subTest(length=length), self.assertRaises(WebhookHTTPError):
+                self.post(b"HTTP/1.1 200 OK\r\nContent-Length: " + length + b"\r\n\r\n")
@@ -0,0 +1,14 @@
+"""
+URLs for webhook subscriptions.
+"""
+
+from django.urls import path
+
+from .views import WebhookDetailView, WebhookListCreateView
+
+urlpatterns = [
+    # List and register webhooks
+    path("", WebhookListCreateView.as_view(), name="webhooks"),
+    # Show, change or delete one webhook
+    path("<int:pk>/", WebhookDetailView.as_view(), name="webhook-detail"),
+]
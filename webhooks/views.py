@@ -0,0 +1,46 @@
+"""
+Webhook subscription API for the logged-in user:
+- list and create subscriptions
+- show, update (url, is_active) and delete one
+
+Deliveries are sent by "manage.py deliver_webhooks", not by these views.
+"""
+
+from rest_framework import generics, permissions
+
+from .models import WebhookSubscription
+from .serializers import WebhookCreateSerializer, WebhookSubscriptionSerializer
+
+
+class WebhookListCreateView(generics.ListCreateAPIView):
+    """
+    List the user's webhooks or register a new URL.
+    The response to POST contains the signing secret.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.request.method == "POST":
+            return WebhookCreateSerializer
+        return WebhookSubscriptionSerializer
+
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(user=self.request.user).order_by(
+            "-id"
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class WebhookDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Show, change or delete one of the user's webhooks.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = WebhookSubscriptionSerializer
+
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(user=self.request.user)